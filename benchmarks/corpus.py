@@ -0,0 +1,100 @@
+"""Generates synthetic RSS and Atom feeds.
+
+Usage:
+    python -m benchmarks.corpus [--format rss|atom] [--feeds 10] [--entries 50] [--size 500] [--out DIR]
+"""
+# Python stdlib
+import os
+import sys
+from optparse import OptionParser
+from xml.sax.saxutils import escape
+
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do')
+
+
+def text(size, seed=0):
+    """Returns some text of about size characters."""
+    words = []
+    length = 0
+    i = seed
+    while length < size:
+        word = WORDS[i % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+        i += 7
+    return ' '.join(words)
+
+
+def rss(nb_entries, size=500, first=None, name='feed'):
+    """Returns a RSS document.
+
+    Args:
+        nb_entries: the number of items
+        size: the size of the description of each item, in characters
+        first: the number of the newest item. The items are numbered from first down to first - nb_entries + 1,
+            so that increasing it publishes new items. Default: nb_entries
+        name: the name of the feed, used in its title and in the guid of the items
+    """
+    if first is None:
+        first = nb_entries
+    items = []
+    for i in range(first, first - nb_entries, -1):
+        items.append(
+            '<item><title>%(name)s #%(i)s</title><link>http://example.com/%(name)s/%(i)s</link>'
+            '<guid>http://example.com/%(name)s/%(i)s</guid><pubDate>Mon, 07 Jan 2013 10:00:00 GMT</pubDate>'
+            '<description>%(text)s</description></item>' % {'name': escape(name), 'i': i, 'text': text(size, i)}
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<rss version="2.0"><channel><title>%s</title><link>http://example.com/%s</link><description>Benchmarks</description>%s</channel></rss>'
+        % (escape(name), escape(name), ''.join(items))
+    )
+
+
+def atom(nb_entries, size=500, first=None, name='feed'):
+    """Returns an Atom document. Same arguments as rss."""
+    if first is None:
+        first = nb_entries
+    entries = []
+    for i in range(first, first - nb_entries, -1):
+        entries.append(
+            '<entry><title>%(name)s #%(i)s</title><link href="http://example.com/%(name)s/%(i)s"/>'
+            '<id>http://example.com/%(name)s/%(i)s</id><updated>2013-01-07T10:00:00Z</updated>'
+            '<summary>%(text)s</summary></entry>' % {'name': escape(name), 'i': i, 'text': text(size, i)}
+        )
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom"><title>%s</title><id>http://example.com/%s</id>'
+        '<updated>2013-01-07T10:00:00Z</updated>%s</feed>'
+        % (escape(name), escape(name), ''.join(entries))
+    )
+
+FORMATS = {
+    'rss': rss,
+    'atom': atom,
+}
+
+
+def main(argv):
+    parser = OptionParser()
+    parser.add_option('--format', choices=sorted(FORMATS), default='rss')
+    parser.add_option('--feeds', type='int', default=10)
+    parser.add_option('--entries', type='int', default=50)
+    parser.add_option('--size', type='int', default=500)
+    parser.add_option('--out', default='corpus')
+    options, _ = parser.parse_args(argv)
+
+    if not os.path.isdir(options.out):
+        os.makedirs(options.out)
+    for i in range(options.feeds):
+        name = 'feed%s' % (i,)
+        f = open(os.path.join(options.out, '%s.xml' % (name,)), 'wb')
+        try:
+            f.write(FORMATS[options.format](options.entries, options.size, name=name))
+        finally:
+            f.close()
+    sys.stdout.write('%s feeds written in %s\n' % (options.feeds, options.out))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,254 @@
+"""Measures the fetching of feeds served by a local HTTP server in several scenarios.
+
+Scenarios:
+    cold: the first fetch of feeds, all the entries are new
+    steady: polling the same feeds, most of them answer 304 and a few have new entries
+    huge: feeds with thousands of entries
+    many_small: hundreds of feeds with a few entries
+    flaky: feeds answering slowly or with errors
+
+Each scenario runs in its own process, with a new in-memory database, so that its peak memory can be measured.
+It reports the throughput, the latency percentiles of a fetch, the number of queries and the peak memory,
+and writes the results as JSON to compare runs.
+
+Usage:
+    python -m benchmarks.fetching [--scenario cold] [--scale 1.0] [--output results.json] [--compare previous.json]
+"""
+# Python stdlib
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Django
+import django
+from django.core.management import call_command
+from django.db import connection
+
+# Internal
+from feedstorage.models import Feed, Entry
+from feedstorage.utils.timer import percentile
+from .corpus import rss, atom
+from .server import FeedServer
+from .settings import BENCHMARKS_DIR
+
+
+def _scaled(value, scale):
+    return max(1, int(value * scale))
+
+
+def _create_feeds(server, nb, nb_entries, size, fmt=rss, prefix='feed', **query):
+    """Serves nb feeds and creates them."""
+    feeds = []
+    for i in range(nb):
+        name = '%s%s' % (prefix, i)
+        server.set_feed(name, fmt(nb_entries, size, name=name))
+        feeds.append(Feed(url=server.url(name, **query)))
+    Feed.objects.bulk_create(feeds)
+
+
+def _fetch_all():
+    """Fetches all the Feeds.
+
+    Returns:
+        A tuple (number of fetches, seconds, latencies in seconds, number of queries, number of new entries).
+    """
+    latencies = []
+    last = [time.time()]
+
+    def progress(feed, ok):
+        now = time.time()
+        latencies.append(now - last[0])
+        last[0] = now
+
+    nb_entries = Entry.objects.count()
+    connection.queries = []
+    start = last[0] = time.time()
+    Feed.fetch_collection(Feed.objects.all(), '[Benchmarks]', progress=progress)
+    seconds = time.time() - start
+    nb_queries = len(connection.queries)
+    return len(latencies), seconds, latencies, nb_queries, Entry.objects.count() - nb_entries
+
+
+def cold(server, scale):
+    _create_feeds(server, _scaled(50, scale), 50, 500)
+    _create_feeds(server, _scaled(10, scale), 50, 500, fmt=atom, prefix='atom')
+    return _fetch_all()
+
+
+def steady(server, scale, rounds=3):
+    nb_feeds = _scaled(100, scale)
+    _create_feeds(server, nb_feeds, 50, 500)
+    _fetch_all()  # Warm up: not measured
+
+    results = []
+    for r in range(rounds):
+        for i in range(0, nb_feeds, 10):  # 10% of the feeds publish 2 entries
+            name = 'feed%s' % (i,)
+            server.set_feed(name, rss(50, 500, first=50 + 2 * (r + 1), name=name))
+        results.append(_fetch_all())
+
+    return (
+        sum(r[0] for r in results),
+        sum(r[1] for r in results),
+        sum((r[2] for r in results), []),
+        sum(r[3] for r in results),
+        sum(r[4] for r in results),
+    )
+
+
+def huge(server, scale):
+    _create_feeds(server, 3, _scaled(5000, scale), 1000)
+    return _fetch_all()
+
+
+def many_small(server, scale):
+    _create_feeds(server, _scaled(500, scale), 5, 200)
+    return _fetch_all()
+
+
+def flaky(server, scale):
+    nb = _scaled(20, scale)
+    _create_feeds(server, nb, 20, 500, prefix='ok')
+    _create_feeds(server, nb, 20, 500, prefix='slow', delay=0.05)
+    _create_feeds(server, nb, 20, 500, prefix='error', status=500)
+    return _fetch_all()
+
+SCENARIOS = (
+    ('cold', cold),
+    ('steady', steady),
+    ('huge', huge),
+    ('many_small', many_small),
+    ('flaky', flaky),
+)
+
+
+def peak_memory_kb():
+    """Returns the peak resident memory of the process in KB or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':  # In bytes
+        peak //= 1024
+    return peak
+
+
+def run_scenario(name, scale, use_gzip):
+    """Runs a scenario in the current process and returns its results as a dict."""
+    call_command('syncdb', interactive=False, verbosity=0)
+    connection.use_debug_cursor = True  # Count the queries
+
+    server = FeedServer(use_gzip=use_gzip)
+    server.start()
+    try:
+        nb_fetches, seconds, latencies, nb_queries, nb_entries = dict(SCENARIOS)[name](server, scale)
+    finally:
+        server.stop()
+
+    latencies = sorted(l * 1000 for l in latencies)
+    return {
+        'scenario': name,
+        'fetches': nb_fetches,
+        'new_entries': nb_entries,
+        'seconds': round(seconds, 4),
+        'fetches_per_s': round(nb_fetches / seconds, 2) if seconds else None,
+        'entries_per_s': round(nb_entries / seconds, 2) if seconds else None,
+        'latency_ms': dict(
+            [('p%s' % (p,), round(percentile(latencies, p), 2)) for p in (50, 95, 99)] + [('max', round(latencies[-1], 2))]
+        ) if latencies else {},
+        'queries': nb_queries,
+        'queries_per_fetch': round(float(nb_queries) / nb_fetches, 2) if nb_fetches else None,
+        'peak_memory_kb': peak_memory_kb(),
+    }
+
+
+def compare(results, previous):
+    """Writes the change of the main figures since a previous run."""
+    previous = dict((r['scenario'], r) for r in previous['results'])
+    sys.stdout.write('\nCompared to the previous run:\n')
+    for r in results:
+        p = previous.get(r['scenario'])
+        if p is None:
+            continue
+        changes = []
+        for label, new, old in (
+            ('fetches/s', r['fetches_per_s'], p['fetches_per_s']),
+            ('p95', r['latency_ms'].get('p95'), p['latency_ms'].get('p95')),
+            ('queries', r['queries'], p['queries']),
+            ('peak memory', r['peak_memory_kb'], p['peak_memory_kb']),
+        ):
+            if new and old:
+                changes.append('%s %+.1f%%' % (label, 100.0 * (new - old) / old))
+        sys.stdout.write('%-12s %s\n' % (r['scenario'], ', '.join(changes)))
+
+
+def main(argv):
+    parser = OptionParser()
+    parser.add_option('--scenario', action='append', dest='scenarios', choices=[s[0] for s in SCENARIOS],
+        help='Run this scenario only. Can be repeated. Default: all')
+    parser.add_option('--scale', type='float', default=1.0, help='Multiplies the number of feeds and entries.')
+    parser.add_option('--no-gzip', action='store_false', dest='use_gzip', default=True)
+    parser.add_option('--output', help='The JSON file to write the results to. Default: a new file in the benchmarks directory')
+    parser.add_option('--compare', help='A JSON file written by a previous run to compare to.')
+    parser.add_option('--child', action='store_true', default=False, help=SUPPRESS_HELP)
+    options, _ = parser.parse_args(argv)
+    scenarios = options.scenarios or [s[0] for s in SCENARIOS]
+
+    if options.child:  # Run in a process started below
+        sys.stdout.write(json.dumps(run_scenario(scenarios[0], options.scale, options.use_gzip)))
+        return
+
+    results = []
+    for name in scenarios:
+        args = [sys.executable, '-m', 'benchmarks.fetching', '--child', '--scenario', name, '--scale', str(options.scale)]
+        if not options.use_gzip:
+            args.append('--no-gzip')
+        out = subprocess.Popen(args, stdout=subprocess.PIPE).communicate()[0]
+        result = json.loads(out.strip().splitlines()[-1])
+        results.append(result)
+        sys.stdout.write('%(scenario)-12s %(fetches)6s fetches in %(seconds)8.3fs  %(fetches_per_s)8s fetches/s  %(entries_per_s)9s new entries/s  ' % result)
+        sys.stdout.write('p50/p95/p99 %s/%s/%sms  %s queries  peak %sKB\n' % (
+            result['latency_ms'].get('p50'), result['latency_ms'].get('p95'), result['latency_ms'].get('p99'),
+            result['queries'], result['peak_memory_kb']
+        ))
+
+    output = options.output
+    if not output:
+        if not os.path.isdir(BENCHMARKS_DIR):
+            os.makedirs(BENCHMARKS_DIR)
+        output = os.path.join(BENCHMARKS_DIR, 'fetching-%s.json' % (time.strftime('%Y%m%dT%H%M%S'),))
+    f = open(output, 'w')
+    try:
+        json.dump({
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'scale': options.scale,
+            'gzip': options.use_gzip,
+            'results': results,
+        }, f, indent=2, sort_keys=True)
+    finally:
+        f.close()
+    sys.stdout.write('\nResults written to %s\n' % (output,))
+
+    if options.compare:
+        f = open(options.compare)
+        try:
+            compare(results, json.load(f))
+        finally:
+            f.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,74 @@
+"""Measures the time needed to import the feedstorage modules and checks that importing them does not query the database.
+
+Each module is imported in a new process, several times, and the best time is reported
+since the others are slowed down by the rest of the machine.
+
+Usage:
+    python -m benchmarks.imports [--module feedstorage.models] [--repeat 5]
+"""
+# Python stdlib
+import os
+import sys
+import json
+import time
+import subprocess
+from optparse import OptionParser, SUPPRESS_HELP
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+MODULES = (
+    'feedstorage.settings',
+    'feedstorage.log',
+    'feedstorage.models',
+    'feedstorage.views',
+    'feedstorage.admin',
+)
+
+
+def import_module(name):
+    """Imports a module after Django and returns the time elapsed in seconds and the number of queries."""
+    # Django
+    from django.conf import settings
+    from django.db import connection
+
+    settings.DATABASES  # Loads the settings before timing
+    connection.use_debug_cursor = True
+
+    start = time.time()
+    __import__(name)
+    elapsed = time.time() - start
+
+    return elapsed, len(connection.queries)
+
+
+def main(argv):
+    parser = OptionParser()
+    parser.add_option('--module', action='append', dest='modules', help='Import this module only. Can be repeated. Default: the main modules')
+    parser.add_option('--repeat', type='int', default=5, help='The number of processes started per module. Default: 5')
+    parser.add_option('--child', action='store_true', default=False, help=SUPPRESS_HELP)
+    options, _ = parser.parse_args(argv)
+    modules = options.modules or MODULES
+
+    if options.child:  # Run in a process started below
+        sys.stdout.write(json.dumps(import_module(modules[0])))
+        return
+
+    failed = False
+    for name in modules:
+        timings = []
+        for _ in range(options.repeat):
+            args = [sys.executable, '-m', 'benchmarks.imports', '--child', '--module', name]
+            out = subprocess.Popen(args, stdout=subprocess.PIPE).communicate()[0]
+            elapsed, queries = json.loads(out.strip().splitlines()[-1])
+            timings.append(elapsed)
+        sys.stdout.write('%-24s %8.1fms  %s queries\n' % (name, min(timings) * 1000, queries))
+        if queries:
+            failed = True
+
+    if failed:
+        sys.stderr.write('Importing feedstorage must not query the database.\n')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
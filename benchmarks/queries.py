@@ -0,0 +1,105 @@
+"""Checks the query plans and the timings of the hot access paths on a seeded dataset.
+
+Usage:
+    python -m benchmarks.queries [--feeds 200] [--entries 500] [--repeat 20]
+
+Set FEEDSTORAGE_BENCHMARKS_DB to a file to keep the seeded database between runs.
+"""
+# Python stdlib
+import os
+import sys
+import time
+from optparse import OptionParser
+from datetime import timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+# Django
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Internal
+from feedstorage.models import Feed, FetchStatus, Entry
+from feedstorage.utils.iterators import chunked
+
+EXPLAIN = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+
+@transaction.commit_on_success
+def seed(nb_feeds, nb_entries):
+    """Creates feeds with their fetch statuses and entries, unless there are enough already."""
+    if Feed.objects.count() >= nb_feeds:
+        return
+
+    Feed.objects.bulk_create([Feed(url='http://feed%s.example.com/rss' % (i,)) for i in range(nb_feeds)])
+    now = timezone.now()
+    for feed in Feed.objects.all():
+        statuses = [
+            FetchStatus(feed=feed, timestamp_start=now - timedelta(minutes=i), http_status_code=200, error_msg='x' * 1000)
+            for i in range(nb_entries // 10)
+        ]
+        FetchStatus.objects.bulk_create(statuses)
+        status = FetchStatus.objects.filter(feed=feed)[0]
+        entries = (
+            Entry(feed=feed, fetch_status=status, uid_hash='%032d' % (i,), xml='<item>%s</item>' % ('x' * 2000,))
+            for i in range(nb_entries)
+        )
+        for chunk in chunked(entries, 500):
+            Entry.objects.bulk_create(chunk)
+
+
+def explain(queryset):
+    """Returns the query plan of a queryset."""
+    sql, params = queryset.query.sql_with_params()
+    cursor = connection.cursor()
+    cursor.execute(EXPLAIN.get(connection.vendor, 'EXPLAIN ') + sql, params)
+    return '\n'.join('    %s' % (' | '.join('%s' % (c,) for c in row),) for row in cursor.fetchall())
+
+
+def timeit(func, repeat):
+    """Returns the best time of several calls in milliseconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = (time.time() - start) * 1000
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main(argv):
+    parser = OptionParser()
+    parser.add_option('--feeds', type='int', default=200)
+    parser.add_option('--entries', type='int', default=500)
+    parser.add_option('--repeat', type='int', default=20)
+    options, _ = parser.parse_args(argv)
+
+    call_command('syncdb', interactive=False, verbosity=0)
+    seed(options.feeds, options.entries)
+
+    feed = Feed.objects.order_by('-pk')[0]
+    paths = (
+        ('recent entries of a feed', lambda: Entry.objects.recent(feed)[:50]),
+        ('recent entries of a feed (with xml)', lambda: Entry.objects.recent(feed, lean=False)[:50]),
+        ('recent entries of all feeds', lambda: Entry.objects.recent()[:50]),
+        ('entries of a feed after a cursor', lambda: Entry.objects.filter(feed=feed, pk__gt=0).order_by('pk')[:50]),
+        ('last status of a feed', lambda: FetchStatus.objects.filter(feed=feed).lean().order_by('-pk')[:1]),
+        ('last status of each feed', lambda: FetchStatus.objects.last_per_feed()),
+    )
+
+    sys.stdout.write('%s feeds, %s entries, %s fetch statuses on %s\n\n' % (
+        Feed.objects.count(), Entry.objects.count(), FetchStatus.objects.count(), connection.vendor
+    ))
+    for name, make_queryset in paths:
+        ms = timeit(lambda: list(make_queryset()), options.repeat)
+        sys.stdout.write('%s: %.2fms\n%s\n' % (name, ms, explain(make_queryset())))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
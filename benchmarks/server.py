@@ -0,0 +1,112 @@
+"""A local HTTP server standing in for the remote feeds.
+
+It serves the feeds registered with FeedServer.set_feed at /<name> with:
+- an ETag, and a 304 response when the If-None-Match header matches it
+- gzip compression when the client accepts it
+- a slow response with ?delay=SECONDS
+- an error with ?status=CODE
+"""
+# Python stdlib
+import gzip
+import time
+import hashlib
+import threading
+import urlparse
+from cStringIO import StringIO
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.0'
+
+    def do_GET(self):
+        url = urlparse.urlsplit(self.path)
+        query = urlparse.parse_qs(url.query)
+        if 'delay' in query:
+            time.sleep(float(query['delay'][0]))
+        if 'status' in query:
+            return self._respond(int(query['status'][0]), 'Error')
+
+        feed = self.server.get_feed(url.path.lstrip('/'))
+        if feed is None:
+            return self._respond(404, 'Not found')
+
+        body, etag, gzipped = feed
+        if self.headers.get('If-None-Match') == etag:
+            return self._respond(304, '', {'ETag': etag})
+
+        headers = {'ETag': etag, 'Content-Type': 'application/xml'}
+        if self.server.use_gzip and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            body = gzipped
+            headers['Content-Encoding'] = 'gzip'
+        self._respond(200, body, headers)
+
+    def _respond(self, status_code, body, headers=None):
+        self.send_response(status_code)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Quiet
+
+
+class FeedServer(ThreadingMixIn, HTTPServer):
+    """A threaded HTTP server serving feeds from memory, in a background thread.
+
+    Usage:
+        server = FeedServer()
+        server.start()
+        server.set_feed('blog', rss(50))
+        Feed.objects.create(url=server.url('blog'))
+        ...
+        server.stop()
+    """
+    daemon_threads = True
+
+    def __init__(self, port=0, use_gzip=True):
+        HTTPServer.__init__(self, ('127.0.0.1', port), _Handler)
+        self.use_gzip = use_gzip
+        self.feeds = {}  # name => (body, etag, gzipped body)
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def set_feed(self, name, body):
+        """Serves a feed, or a new version of it, at /name."""
+        out = StringIO()
+        f = gzip.GzipFile(fileobj=out, mode='wb')
+        f.write(body)
+        f.close()
+        etag = '"%s"' % (hashlib.md5(body).hexdigest(),)
+
+        self.lock.acquire()
+        try:
+            self.feeds[name] = (body, etag, out.getvalue())
+        finally:
+            self.lock.release()
+
+    def get_feed(self, name):
+        self.lock.acquire()
+        try:
+            return self.feeds.get(name)
+        finally:
+            self.lock.release()
+
+    def url(self, name, **query):
+        """Returns the URL of a feed. The query can contain delay and status."""
+        url = 'http://127.0.0.1:%s/%s' % (self.server_address[1], name)
+        if query:
+            url += '?' + '&'.join('%s=%s' % (k, v) for k, v in sorted(query.items()))
+        return url
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,25 @@
+# Python stdlib
+import os.path
+import tempfile
+
+# Django settings used by the benchmarks.
+BENCHMARKS_DIR = os.environ.get('FEEDSTORAGE_BENCHMARKS_DIR', os.path.join(tempfile.gettempdir(), 'feedstorage_benchmarks'))
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('FEEDSTORAGE_BENCHMARKS_DB', ':memory:'),
+    }
+}
+INSTALLED_APPS = (
+    'feedstorage',
+)
+SECRET_KEY = 'benchmarks'
+USE_TZ = True
+
+FEED_STORAGE_SETTINGS = {
+    'FILE_STORAGE_ARGS': {
+        'location': os.path.join(BENCHMARKS_DIR, 'files'),
+    },
+    'LOG_FILE': os.path.join(BENCHMARKS_DIR, 'feedstorage.log'),
+}
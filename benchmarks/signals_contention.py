@@ -0,0 +1,142 @@
+"""Measures the contention on the receivers registry of the new entries.
+
+Reader threads get the receivers of random feeds, as the send path does,
+while writer threads connect and disconnect receivers, as Hub.subscribe and Hub.unsubscribe do.
+The registry is compared to the previous implementation: one Django signal per feed guarded by a global lock.
+
+Usage:
+    python -m benchmarks.signals_contention [--readers 8] [--writers 2] [--feeds 1000] [--receivers 20] [--duration 3]
+"""
+# Python stdlib
+import os
+import sys
+import time
+import random
+import threading
+from optparse import OptionParser
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+# Django
+import django.dispatch
+from django.dispatch.dispatcher import _make_id
+
+# Internal
+from feedstorage.signals import ReceiverRegistry, SENDER
+
+
+class SignalsRegistry(object):
+    """The previous implementation: one Django signal per feed and a global lock."""
+
+    def __init__(self):
+        self.signals = {}
+        self.lock = threading.Lock()
+
+    def _exist(self, signal, dispatch_uid):
+        lookup_key = (dispatch_uid, _make_id(None))
+        signal.lock.acquire()
+        try:
+            for r_key, _ in signal.receivers:
+                if r_key == lookup_key:
+                    return True
+        finally:
+            signal.lock.release()
+        return False
+
+    def connect(self, key, receiver, dispatch_uid):
+        self.lock.acquire()
+        try:
+            if not key in self.signals:
+                self.signals[key] = django.dispatch.Signal(providing_args=['feed_url', 'new_entries'])
+            if not self._exist(self.signals[key], dispatch_uid):
+                self.signals[key].connect(receiver, dispatch_uid=dispatch_uid)
+                return True
+        finally:
+            self.lock.release()
+        return False
+
+    def disconnect(self, key, receiver, dispatch_uid):
+        self.lock.acquire()
+        try:
+            if key in self.signals and self._exist(self.signals[key], dispatch_uid):
+                self.signals[key].disconnect(receiver, dispatch_uid=dispatch_uid)
+                return True
+        finally:
+            self.lock.release()
+        return False
+
+    def receivers(self, key):
+        if key in self.signals:
+            return self.signals[key]._live_receivers(_make_id(SENDER))
+        return []
+
+
+def receiver(sender, **kwargs):
+    pass
+
+
+def run(registry, options):
+    """Runs the readers and the writers on a registry and returns the number of reads and writes per second."""
+    for key in range(options.feeds):
+        for i in range(options.receivers):
+            registry.connect(key, receiver, 'uid-%s' % (i,))
+
+    counts = {'reads': 0, 'writes': 0}
+    count_lock = threading.Lock()
+    stop = threading.Event()
+
+    def read():
+        n = 0
+        rand = random.Random()
+        while not stop.is_set():
+            for r in registry.receivers(rand.randrange(options.feeds)):
+                pass
+            n += 1
+        count_lock.acquire()
+        counts['reads'] += n
+        count_lock.release()
+
+    def write():
+        n = 0
+        rand = random.Random()
+        while not stop.is_set():
+            key = rand.randrange(options.feeds)
+            uid = 'extra-%s' % (rand.randrange(options.receivers),)
+            registry.connect(key, receiver, uid)
+            registry.disconnect(key, receiver, uid)
+            n += 2
+        count_lock.acquire()
+        counts['writes'] += n
+        count_lock.release()
+
+    threads = [threading.Thread(target=read) for _ in range(options.readers)]
+    threads += [threading.Thread(target=write) for _ in range(options.writers)]
+
+    start = time.time()
+    for t in threads:
+        t.start()
+    time.sleep(options.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+
+    return counts['reads'] / elapsed, counts['writes'] / elapsed
+
+
+def main(argv):
+    parser = OptionParser()
+    parser.add_option('--readers', type='int', default=8)
+    parser.add_option('--writers', type='int', default=2)
+    parser.add_option('--feeds', type='int', default=1000)
+    parser.add_option('--receivers', type='int', default=20)
+    parser.add_option('--duration', type='float', default=3)
+    options, _ = parser.parse_args(argv)
+
+    for name, registry in (('signals + global lock', SignalsRegistry()), ('copy-on-write registry', ReceiverRegistry())):
+        reads, writes = run(registry, options)
+        sys.stdout.write('%-24s reads/s: %12.0f   writes/s: %10.0f\n' % (name, reads, writes))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
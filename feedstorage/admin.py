@@ -1,41 +1,230 @@
 # Django
+from django.conf.urls import patterns, url
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.db.models import Count
+from django.db.models.query import QuerySet
+from django.http import HttpResponse, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render_to_response
+from django.template import RequestContext
 
 # Internal
-from .models import Feed, FetchStatus, Entry, Subscription
+from .managers import estimated_count
+from .models import Feed, FetchStatus, Entry, Subscription, Consumer, FetchJob, Payload
 
 
-class FeedAdmin(admin.ModelAdmin):
-    fields = ('url', 'enabled',)
+class EstimatedCountQuerySet(QuerySet):
+    """A QuerySet whose count is estimated from the statistics of the database when it is not filtered and the table is large.
+    Used by the changelists to avoid a COUNT(*) of multi-million rows tables."""
+    threshold = 100000  # Under this estimated number of rows, the exact count is used
+
+    def count(self):
+        if not self.query.where:
+            estimate = estimated_count(self.model, self.db)
+            if estimate is not None and estimate > self.threshold:
+                return estimate
+        return super(EstimatedCountQuerySet, self).count()
+
+
+class FeedFilter(admin.SimpleListFilter):
+    """Filters by feed without loading all the feeds.
+    Type a part of the URL to filter on it and get a short list of the matching feeds to choose from."""
+    title = 'feed'
+    parameter_name = 'feed'
+    template = 'admin/feedstorage/feed_filter.html'
+    max_choices = 20
+
+    def has_output(self):
+        return True  # Even without choices, to show the input
+
+    def lookups(self, request, model_admin):
+        value = request.GET.get(self.parameter_name)  # self.value() is not set yet
+        if not value:
+            return ()
+        if value.isdigit():
+            feeds = Feed.objects.filter(pk=value)
+        else:
+            feeds = Feed.objects.filter(url__icontains=value).order_by('url')[:self.max_choices]
+        return [(str(pk), url) for pk, url in feeds.values_list('pk', 'url')]
+
+    def choices(self, cl):
+        # The form submits its own field only: the other parameters of the changelist (ordering, filters, search) are kept as hidden inputs
+        self.hidden_params = sorted((k, v) for k, v in cl.params.items() if k != self.parameter_name)
+        return super(FeedFilter, self).choices(cl)
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(feed=value)
+        return queryset.filter(feed__url__icontains=value)
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    """ModelAdmin for large tables: estimated counts, the related objects shown fetched with a join,
+    heavy columns deferred and replaced by a short preview."""
+    select_related_fields = ()  # Names of the foreign keys fetched with a join. The others are not followed, unlike with list_select_related.
+    previews = ()  # Names of the heavy columns: deferred and replaced by <name>_preview
+    preview_length = 100
+
+    def queryset(self, request):
+        qs = super(ScalableAdmin, self).queryset(request)
+        if self.select_related_fields:
+            qs = qs.select_related(*self.select_related_fields)
+        if self.previews:
+            qn = connection.ops.quote_name
+            table = qn(self.model._meta.db_table)  # Qualified: the column can also exist in the joined tables
+            qs = qs.defer(*self.previews).extra(select=dict(
+                ('%s_preview' % (name,), 'SUBSTR(%s.%s, 1, %s)' % (table, qn(self.model._meta.get_field(name).column), self.preview_length))
+                for name in self.previews
+            ))
+        return qs._clone(klass=EstimatedCountQuerySet)
+
+
+class FeedChangeList(ChangeList):
+    """Counts the entries of the Feeds of the page with one query."""
+
+    def get_results(self, request):
+        super(FeedChangeList, self).get_results(request)
+        counts = dict(
+            Entry.objects.filter(feed__in=[feed.pk for feed in self.result_list]).order_by().values_list('feed').annotate(Count('id'))
+        )
+        for feed in self.result_list:
+            feed.nb_entries_count = counts.get(feed.pk, 0)
+
+
+class FeedAdmin(ScalableAdmin):
+    fields = ('url', 'enabled', 'alias_of',)
     list_display = ('id', 'url', 'nb_entries', 'enabled', 'etag',)
+    raw_id_fields = ('alias_of',)
     list_editable = ('url', 'enabled',)
     search_fields = ('url', 'enabled',)
     list_filter = ('enabled',)
     actions = ('fetch',)
 
+    def get_changelist(self, request, **kwargs):
+        return FeedChangeList
+
+    def nb_entries(self, obj):
+        return obj.nb_entries_count
+
+    nb_entries.short_description = 'Nb Entries'
+
     def fetch(self, request, queryset):
-        Feed.fetch_collection(queryset, '[FeedAdmin]')
+        job = FetchJob.queue(queryset, '[FeedAdmin]')
+        return HttpResponseRedirect(reverse('admin:feedstorage_fetchjob_status', args=(job.pk,)))
 
     fetch.short_description = 'Fetch'
 
 
-class FetchStatusAdmin(admin.ModelAdmin):
-    list_display = ('feed', 'http_status_code', 'size_bytes', 'timestamp_start', 'timestamp_end', 'nb_entries', 'nb_new_entries', 'error_msg',)
-    list_filter = ('feed', 'http_status_code', 'feed__enabled',)
+class FetchStatusAdmin(ScalableAdmin):
+    list_display = ('feed', 'http_status_code', 'size_bytes', 'timestamp_start', 'timestamp_end', 'nb_entries', 'nb_new_entries', 'error_msg_preview',)
+    list_filter = (FeedFilter, 'http_status_code', 'feed__enabled',)
+    raw_id_fields = ('feed', 'payload',)
+    select_related_fields = ('feed',)
+    previews = ('error_msg',)
+
+    def error_msg_preview(self, obj):
+        return obj.error_msg_preview
 
+    error_msg_preview.short_description = 'Error msg'
 
-class EntryAdmin(admin.ModelAdmin):
-    list_display = ('feed', 'uid_hash', 'add_date', 'xml',)
-    list_filter = ('feed',)
+
+class PayloadAdmin(admin.ModelAdmin):
+    list_display = ('hash', 'size_bytes', 'stored_bytes', 'add_date', 'last_seen', 'body',)
+    search_fields = ('hash',)
+    readonly_fields = ('hash', 'size_bytes', 'stored_bytes', 'last_seen',)
+
+    def body(self, obj):
+        return '<a href="%s">Body</a>' % (reverse('admin:feedstorage_payload_body', args=(obj.pk,)),)
+
+    body.short_description = 'Body'
+    body.allow_tags = True
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = patterns('',
+            url(r'^(\d+)/body/$', self.admin_site.admin_view(self.body_view), name='feedstorage_payload_body'),
+        )
+        return urls + super(PayloadAdmin, self).get_urls()
+
+    def body_view(self, request, payload_id):
+        """Shows the decompressed body."""
+        payload = get_object_or_404(Payload, pk=payload_id)
+        return HttpResponse(payload.read(), content_type='text/plain')
+
+
+class EntryAdmin(ScalableAdmin):
+    list_display = ('feed', 'uid_hash', 'add_date', 'xml_preview',)
+    list_filter = (FeedFilter,)
     search_fields = ('feed__url', 'uid_hash',)
+    raw_id_fields = ('feed', 'fetch_status',)
+    select_related_fields = ('feed',)
+    previews = ('xml',)
+
+    def xml_preview(self, obj):
+        return obj.xml_preview
+
+    xml_preview.short_description = 'Xml'
 
 
-class SubscriptionAdmin(admin.ModelAdmin):
+class SubscriptionAdmin(ScalableAdmin):
     fields = ('feed', 'callback', 'dispatch_uid',)
     list_display = ('id', 'feed', 'callback', 'dispatch_uid',)
-    list_filter = ('feed', 'feed__enabled',)
+    list_filter = (FeedFilter, 'feed__enabled',)
+    raw_id_fields = ('feed',)
+    select_related_fields = ('feed',)
+
+
+class FetchJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'prefix_log', 'status', 'progress', 'nb_errors', 'add_date', 'start_date', 'end_date',)
+    list_filter = ('status',)
+    readonly_fields = ('prefix_log', 'status', 'nb_feeds', 'nb_fetched', 'nb_errors', 'error_msg', 'start_date', 'end_date', 'heartbeat_date',)
+    exclude = ('feeds',)
+
+    def progress(self, obj):
+        return '<a href="%s">%s/%s</a>' % (
+            reverse('admin:feedstorage_fetchjob_status', args=(obj.pk,)),
+            obj.nb_fetched,
+            obj.nb_feeds
+        )
+
+    progress.short_description = 'Progress'
+    progress.allow_tags = True
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        urls = patterns('',
+            url(r'^(\d+)/status/$', self.admin_site.admin_view(self.status_view), name='feedstorage_fetchjob_status'),
+        )
+        return urls + super(FetchJobAdmin, self).get_urls()
+
+    def status_view(self, request, job_id):
+        """Shows the progress of a job and refreshes itself until the job is finished."""
+        job = get_object_or_404(FetchJob, pk=job_id)
+        return render_to_response('admin/feedstorage/fetchjob/status.html', {
+            'title': 'Fetch job %s' % (job,),
+            'job': job,
+            'opts': self.model._meta,
+            'refresh': 2,
+        }, context_instance=RequestContext(request))
+
+
+class ConsumerAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'position', 'edit_date',)
+    search_fields = ('name',)
 
 admin.site.register(Feed, FeedAdmin)
 admin.site.register(FetchStatus, FetchStatusAdmin)
+admin.site.register(Payload, PayloadAdmin)
 admin.site.register(Entry, EntryAdmin)
 admin.site.register(Subscription, SubscriptionAdmin)
+admin.site.register(Consumer, ConsumerAdmin)
+admin.site.register(FetchJob, FetchJobAdmin)
@@ -1,15 +1,59 @@
+# Python stdlib
+import json
+
 # Django
 from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction, IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 # Internal
 import models
 from .log import default_logger as logger
+from .managers import iter_keyset, bulk_insert_raw
+from .utils.feeds import AtomWriter
+from .utils.iterators import chunked
+from .utils.opml import iter_outlines, OPMLWriter
+from .utils.urls import normalize_url
+
+
+def _dump_date(value):
+    """Returns a datetime as an ISO 8601 string, with its UTC offset if it is aware, or None."""
+    return value is not None and value.isoformat() or None
+
+
+def _load_date(value):
+    """Parses a date written by _dump_date."""
+    return value is not None and parse_datetime(value) or None
 
 
 class Hub(object):
     """Interface to use the feed storage."""
     log_desc = '[Hub]'
 
+    # Results of the bulk methods
+    CREATED = 'created'
+    EXISTING = 'existing'
+    DELETED = 'deleted'
+    MISSING = 'missing'
+    FAILED = 'failed'
+
+    # Maximum number of values used in one query by the bulk methods
+    CHUNK_SIZE = 500
+
+    # Formats and record types of the exports of the entries, see export_entries
+    NDJSON = 'ndjson'
+    ATOM = 'atom'
+    ARCHIVE_VERSION = 1
+    HEADER = 'header'
+    FEED = 'feed'
+    FETCH_STATUS = 'status'
+    ENTRY = 'entry'
+
+    # Attributes of the OPML outlines used to store the subscriptions
+    OPML_CALLBACK = 'feedstorageCallback'
+    OPML_DISPATCH_UID = 'feedstorageDispatchUid'
+
     @classmethod
     def subscribe(cls, feed_url, callback, dispatch_uid=None):
         """Subscribes a callback to a feed to get notified of new entries.
@@ -24,6 +68,7 @@ class Hub(object):
             A Boolean to tell whether something went wrong.
         """
 
+        feed_url = normalize_url(feed_url) or feed_url
         log_desc = '%s - Subscribing to %s' % (cls.log_desc, feed_url)
 
         # Get or create the Feed
@@ -71,6 +116,7 @@ class Hub(object):
 
         """
 
+        feed_url = normalize_url(feed_url) or feed_url
         log_desc = '%s - Unsubscribing to %s' % (cls.log_desc, feed_url)
 
         callback = models.Subscription.prepare_callback(callback)
@@ -101,3 +147,538 @@ class Hub(object):
                 )
             )
             return False
+
+    @classmethod
+    def subscribe_many(cls, subscriptions):
+        """Subscribes callbacks to feeds in bulk.
+        The missing Feeds and Subscriptions are created with a few queries and the subscriptions are loaded and ready right away.
+
+        Args:
+            subscriptions: an iterable of tuples (feed_url, callback, dispatch_uid). See subscribe.
+
+        Returns:
+            A list of tuples (feed_url, result) in the same order as the subscriptions,
+            result being Hub.CREATED, Hub.EXISTING or Hub.FAILED.
+        """
+        log_desc = '%s - Subscribing in bulk' % (cls.log_desc,)
+        items, results = cls._prepare_many(subscriptions, log_desc)
+
+        try:
+            feeds, _ = cls._get_or_create_feeds(set(feed_url for _, feed_url, _, _ in items))
+
+            # Get the existing subscriptions: (feed_id, callback) => dispatch_uid
+            existing = {}
+            for chunk in chunked(set(f.pk for f in feeds.values()), cls.CHUNK_SIZE):
+                for feed_id, callback, dispatch_uid in models.Subscription.objects.filter(feed__in=chunk).values_list('feed_id', 'callback', 'dispatch_uid'):
+                    existing[(feed_id, callback)] = dispatch_uid
+
+            to_create = []
+            to_load = []
+            for i, feed_url, callback, dispatch_uid in items:
+                feed = feeds[feed_url]
+                key = (feed.pk, callback)
+                if key in existing:
+                    results[i] = (feed_url, cls.EXISTING)
+                else:
+                    existing[key] = dispatch_uid
+                    to_create.append(models.Subscription(feed=feed, callback=callback, dispatch_uid=dispatch_uid))
+                    results[i] = (feed_url, cls.CREATED)
+                to_load.append(models.Subscription(feed=feed, callback=callback, dispatch_uid=existing[key]))
+
+            for chunk in chunked(to_create, cls.CHUNK_SIZE):
+                models.Subscription.objects.bulk_create(chunk)
+                models.SubscriptionChange.record(chunk, models.SubscriptionChange.LOAD)  # bulk_create does not send post_save
+
+        except Exception as e:
+            logger.error('%s => Cannot get or create the Subscriptions [KO]\n%s' % (log_desc, e))
+            return [(feed_url, cls.FAILED) for feed_url, _ in results]
+
+        logger.info('%s => %s Subscriptions created out of %s' % (log_desc, len(to_create), len(results)))
+
+        # Load them
+        for sub in to_load:
+            sub.load()
+
+        return results
+
+    @classmethod
+    def unsubscribe_many(cls, subscriptions):
+        """Unsubscribes callbacks from feeds in bulk.
+
+        Args:
+            subscriptions: an iterable of tuples (feed_url, callback, dispatch_uid). See unsubscribe.
+
+        Returns:
+            A list of tuples (feed_url, result) in the same order as the subscriptions,
+            result being Hub.DELETED, Hub.MISSING or Hub.FAILED.
+        """
+        log_desc = '%s - Unsubscribing in bulk' % (cls.log_desc,)
+        items, results = cls._prepare_many(subscriptions, log_desc)
+
+        try:
+            # Get the existing subscriptions: (feed_url, callback, dispatch_uid) => Subscription
+            existing = {}
+            callbacks = list(set(callback for _, _, callback, _ in items))
+            for chunk in chunked(set(feed_url for _, feed_url, _, _ in items), cls.CHUNK_SIZE):
+                for callbacks_chunk in chunked(callbacks, cls.CHUNK_SIZE):
+                    for sub in models.Subscription.objects.filter(feed__url__in=chunk, callback__in=callbacks_chunk).select_related('feed'):
+                        existing[(sub.feed.url, sub.callback, sub.dispatch_uid)] = sub
+
+            to_delete = {}
+            for i, feed_url, callback, dispatch_uid in items:
+                sub = existing.get((feed_url, callback, dispatch_uid))
+                if sub is None:
+                    results[i] = (feed_url, cls.MISSING)
+                else:
+                    to_delete[sub.pk] = sub
+                    results[i] = (feed_url, cls.DELETED)
+
+            # Unload them here because the feeds are already fetched, then delete them
+            for sub in to_delete.values():
+                sub.unload()
+            for chunk in chunked(to_delete.keys(), cls.CHUNK_SIZE):
+                models.Subscription.objects.filter(pk__in=chunk).delete()
+
+        except Exception as e:
+            logger.error('%s => Cannot delete the Subscriptions [KO]\n%s' % (log_desc, e))
+            return [(feed_url, cls.FAILED) for feed_url, _ in results]
+
+        logger.info('%s => %s Subscriptions deleted out of %s' % (log_desc, len(to_delete), len(results)))
+        return results
+
+    @classmethod
+    def _prepare_many(cls, subscriptions, log_desc):
+        """Prepares the URLs, the callbacks and the dispatch_uids of several subscriptions.
+
+        Returns:
+            A tuple (items, results):
+                items: a list of tuples (index, feed_url, callback, dispatch_uid) for the subscriptions which could be prepared, with the URLs normalized
+                results: a list of tuples (feed_url, result) with result being Hub.FAILED for the subscriptions which could not be prepared
+        """
+        items = []
+        results = []
+        for i, (feed_url, callback, dispatch_uid) in enumerate(subscriptions):
+            results.append((feed_url, None))
+            try:
+                callback = models.Subscription.prepare_callback(callback)
+                dispatch_uid = models.Subscription.prepare_dispatch_uid(dispatch_uid, callback)
+                items.append((i, normalize_url(feed_url) or feed_url, callback, dispatch_uid))
+            except Exception as e:
+                logger.error('%s - %s => Cannot prepare the callback %s [KO]\n%s' % (log_desc, feed_url, callback, e))
+                results[i] = (feed_url, cls.FAILED)
+
+        return items, results
+
+    @classmethod
+    def _get_or_create_feeds(cls, feed_urls):
+        """Gets or creates several Feeds with a few queries.
+        The URLs are normalized first since bulk_create does not call Feed.save.
+
+        Returns:
+            A tuple (feeds, created): feeds is a dict feed_url => Feed and created is the set of the URLs of the created Feeds,
+            both with the URLs as given.
+        """
+        normalized = dict((feed_url, normalize_url(feed_url) or feed_url) for feed_url in feed_urls)
+        urls = sorted(set(normalized.values()))
+
+        feeds = {}
+        for chunk in chunked(urls, cls.CHUNK_SIZE):
+            feeds.update((f.url, f) for f in models.Feed.objects.filter(url__in=chunk))
+
+        missing = [feed_url for feed_url in urls if feed_url not in feeds]
+        created = set()
+        for chunk in chunked(missing, cls.CHUNK_SIZE):
+            if transaction.is_managed():
+                # Only this insert is rolled back on failure, not the caller's transaction
+                sid = transaction.savepoint()
+                try:
+                    created.update(cls._create_feeds(chunk))
+                    transaction.savepoint_commit(sid)
+                except IntegrityError:  # Some of them have just been created by someone else
+                    transaction.savepoint_rollback(sid)
+                    created.update(cls._get_or_create_each(chunk))
+            else:
+                # bulk_create would commit on its own, releasing any savepoint: one transaction per chunk instead
+                with transaction.commit_manually():
+                    try:
+                        try:
+                            created.update(cls._create_feeds(chunk))
+                        except IntegrityError:
+                            transaction.rollback()
+                            created.update(cls._get_or_create_each(chunk))
+                        transaction.commit()
+                    except:
+                        transaction.rollback()
+                        raise
+
+            # bulk_create does not set the primary keys
+            feeds.update((f.url, f) for f in models.Feed.objects.filter(url__in=chunk))
+
+        return (
+            dict((feed_url, feeds[url]) for feed_url, url in normalized.items()),
+            set(feed_url for feed_url, url in normalized.items() if url in created)
+        )
+
+    @classmethod
+    def _create_feeds(cls, feed_urls):
+        """Inserts Feeds with one query. Returns their URLs."""
+        models.Feed.objects.bulk_create([models.Feed(url=feed_url) for feed_url in feed_urls])
+        return feed_urls
+
+    @classmethod
+    def _get_or_create_each(cls, feed_urls):
+        """Gets or creates Feeds one by one. Returns the URLs of the created ones."""
+        return [feed_url for feed_url in feed_urls if models.Feed.objects.get_or_create(url=feed_url)[1]]
+
+    @classmethod
+    def import_opml(cls, source, callback=None, dispatch_uid=None):
+        """Imports the feeds of an OPML document and subscribes a callback to them.
+        The document is parsed incrementally, and the URLs are normalized and deduplicated before being stored in bulk.
+
+        The feeds nested in an outline written by export_opml are subscribed to the callback of this outline.
+
+        Args:
+            source: a filename or a file-like object
+            callback: a callable function to subscribe to the feeds. See subscribe. Default: None, i.e. the Feeds are just created.
+            dispatch_uid: A unique identifier for a signal receiver. See subscribe.
+
+        Returns:
+            A list of tuples (feed_url, result) for each distinct feed (and callback), result being Hub.CREATED, Hub.EXISTING or Hub.FAILED.
+        """
+        log_desc = '%s - Importing OPML' % (cls.log_desc,)
+
+        feed_urls = []
+        subscriptions = []
+        seen = set()
+        for attrib, ancestors in iter_outlines(source):
+            feed_url = normalize_url(attrib['xmlUrl'])
+            if feed_url is None:
+                logger.warning('%s - %s => Not a HTTP URL, ignored.' % (log_desc, attrib['xmlUrl']))
+                continue
+
+            sub_callback, sub_dispatch_uid = callback, dispatch_uid
+            for a in ancestors:
+                if a.get(cls.OPML_CALLBACK):
+                    sub_callback, sub_dispatch_uid = a[cls.OPML_CALLBACK], a.get(cls.OPML_DISPATCH_UID)
+
+            key = (feed_url, sub_callback and models.Subscription.prepare_callback(sub_callback))
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if sub_callback:
+                subscriptions.append((feed_url, sub_callback, sub_dispatch_uid))
+            else:
+                feed_urls.append(feed_url)
+
+        results = []
+        if feed_urls:
+            try:
+                _, created = cls._get_or_create_feeds(feed_urls)
+                results = [(feed_url, feed_url in created and cls.CREATED or cls.EXISTING) for feed_url in feed_urls]
+            except Exception as e:
+                logger.error('%s => Cannot get or create the Feeds [KO]\n%s' % (log_desc, e))
+                results = [(feed_url, cls.FAILED) for feed_url in feed_urls]
+
+        if subscriptions:
+            results += cls.subscribe_many(subscriptions)
+
+        logger.info('%s => %s feeds imported' % (log_desc, len(results)))
+        return results
+
+    @classmethod
+    def export_opml(cls, out, title='feedstorage'):
+        """Writes all the Feeds and their subscriptions in an OPML document.
+        The feeds are grouped in one outline per callback (and dispatch_uid) so that the subscriptions can be imported with import_opml.
+        The Feeds without subscriptions are written at the top level.
+
+        Args:
+            out: a file-like object
+            title: the title of the document
+        """
+        writer = OPMLWriter(out, title)
+
+        current = None
+        subscriptions = models.Subscription.objects.order_by('callback', 'dispatch_uid', 'feed__url').values_list('callback', 'dispatch_uid', 'feed__url')
+        for callback, dispatch_uid, feed_url in subscriptions.iterator():
+            if (callback, dispatch_uid) != current:
+                if current is not None:
+                    writer.end()
+                writer.start(callback, **{cls.OPML_CALLBACK: callback, cls.OPML_DISPATCH_UID: dispatch_uid})
+                current = (callback, dispatch_uid)
+            writer.feed(feed_url)
+        if current is not None:
+            writer.end()
+
+        for feed_url in models.Feed.objects.filter(subscription__isnull=True).order_by('url').values_list('url', flat=True).iterator():
+            writer.feed(feed_url)
+
+        writer.close()
+
+    @classmethod
+    def export_entries(cls, out, feed_urls=None, since=None, until=None, format=NDJSON, batch_size=1000, feed_ids=None):
+        """Exports Feeds with their fetch statuses and entries, to archive them or move them to another database.
+        The rows are read by keyset batches so that the memory used does not depend on the number of rows.
+
+        With NDJSON, one JSON object is written per line: a header, then the Feeds, the FetchStatus and the Entry,
+        which reference their Feed by URL and their FetchStatus by start date. See import_entries.
+        With Atom, only the entries are written, in one Atom document.
+
+        Args:
+            out: a file-like object
+            feed_urls: the URLs of the Feeds to export. Default: None, i.e. all the Feeds
+            since: only the fetches started and the entries added since this datetime. Default: None
+            until: only the fetches started and the entries added before this datetime. Default: None
+            format: Hub.NDJSON or Hub.ATOM. Default: Hub.NDJSON
+            batch_size: the number of rows read with one query. Default: 1000
+            feed_ids: the pk of the Feeds to export, in addition to feed_urls. Default: None
+
+        Returns:
+            A dict: record type => number of exported records.
+        """
+        feeds = models.Feed.objects.all()
+        statuses = models.FetchStatus.objects.all()
+        entries = models.Entry.objects.all()
+        if feed_urls is not None or feed_ids is not None:
+            feed_ids = set(feed_ids or ())
+            if feed_urls is not None:
+                feed_ids.update(models.Feed.objects.filter(url__in=[normalize_url(u) or u for u in feed_urls]).values_list('pk', flat=True))
+            feed_ids = list(feed_ids)
+            feeds = feeds.filter(pk__in=feed_ids)
+            statuses = statuses.filter(feed__in=feed_ids)
+            entries = entries.filter(feed__in=feed_ids)
+        if since is not None:
+            statuses = statuses.filter(timestamp_start__gte=since)
+            entries = entries.filter(add_date__gte=since)
+        if until is not None:
+            statuses = statuses.filter(timestamp_start__lt=until)
+            entries = entries.filter(add_date__lt=until)
+
+        counts = {}
+        if format == cls.ATOM:
+            writer = AtomWriter(out, title='feedstorage', feed_id='urn:feedstorage:export:%s' % (timezone.now().strftime('%Y%m%dT%H%M%S'),))
+            for entry in iter_keyset(entries.values('pk', 'xml'), batch_size):
+                writer.entry(entry['xml'])
+                counts[cls.ENTRY] = counts.get(cls.ENTRY, 0) + 1
+            writer.close()
+            return counts
+
+        def write(record):
+            out.write(json.dumps(record, separators=(',', ':')) + '\n')
+            counts[record['type']] = counts.get(record['type'], 0) + 1
+
+        write({'type': cls.HEADER, 'version': cls.ARCHIVE_VERSION, 'date': _dump_date(timezone.now())})
+
+        feed_urls_by_id = {}
+        for feed in iter_keyset(feeds.values('pk', 'url', 'enabled'), batch_size):
+            feed_urls_by_id[feed['pk']] = feed['url']
+            write({'type': cls.FEED, 'url': feed['url'], 'enabled': feed['enabled']})
+
+        fields = ('http_status_code', 'size_bytes', 'nb_entries', 'nb_new_entries', 'error_msg', 'timings', 'permanent_redirect', 'nb_temporary_redirects')
+        for status in iter_keyset(statuses.values('pk', 'feed', 'timestamp_start', 'timestamp_end', *fields), batch_size):
+            record = dict((f, status[f]) for f in fields)
+            record.update({
+                'type': cls.FETCH_STATUS,
+                'feed': feed_urls_by_id[status['feed']],
+                'timestamp_start': _dump_date(status['timestamp_start']),
+                'timestamp_end': _dump_date(status['timestamp_end']),
+            })
+            write(record)
+
+        for entry in iter_keyset(entries.values('pk', 'feed', 'fetch_status__timestamp_start', 'uid_hash', 'xml', 'add_date', 'edit_date'), batch_size):
+            write({
+                'type': cls.ENTRY,
+                'feed': feed_urls_by_id[entry['feed']],
+                'fetch_status': _dump_date(entry['fetch_status__timestamp_start']),
+                'uid_hash': entry['uid_hash'],
+                'xml': entry['xml'],
+                'add_date': _dump_date(entry['add_date']),
+                'edit_date': _dump_date(entry['edit_date']),
+            })
+
+        return counts
+
+    @classmethod
+    def import_entries(cls, source, batch_size=CHUNK_SIZE):
+        """Imports Feeds with their fetch statuses and entries exported as NDJSON by export_entries.
+        The records are read one line at a time and inserted in bulk, batch by batch, each batch in a transaction.
+
+        The Feeds are got or created. The FetchStatus (same Feed and start date) and the Entry (same Feed and uid hash)
+        which already exist are skipped, the other ones are inserted as they are, with their dates and uid hash,
+        so that the imported entries are not created again when the Feeds are fetched.
+        An Entry whose FetchStatus is not in the export gets an empty one with the same start date.
+
+        Args:
+            source: a file-like object
+            batch_size: the maximum number of records inserted at once. Default: Hub.CHUNK_SIZE
+
+        Returns:
+            A dict: record type => [number of created records, number of existing ones].
+        """
+        log_desc = '%s - Importing entries' % (cls.log_desc,)
+        importers = {
+            cls.FEED: cls._import_feeds,
+            cls.FETCH_STATUS: cls._import_statuses,
+            cls.ENTRY: cls._import_entries,
+        }
+        counts = {}
+        feed_ids = {}  # url => pk
+
+        def flush(record_type, records):
+            if records:
+                with transaction.commit_on_success():
+                    created = importers[record_type](records, feed_ids)
+                count = counts.setdefault(record_type, [0, 0])
+                count[0] += created
+                count[1] += len(records) - created
+
+        batch_type = None
+        batch = []
+        for i, line in enumerate(source):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record_type = record.get('type')
+            if record_type == cls.HEADER:
+                if record.get('version') != cls.ARCHIVE_VERSION:
+                    raise ValueError('Unsupported version of the export: %s' % (record.get('version'),))
+                continue
+            if record_type not in importers:
+                raise ValueError('Line %s: unknown type of record: %s' % (i + 1, record_type))
+
+            if record_type != batch_type or len(batch) >= batch_size:
+                flush(batch_type, batch)
+                batch_type, batch = record_type, []
+            batch.append(record)
+        flush(batch_type, batch)
+
+        logger.info('%s => %s' % (log_desc, ', '.join(
+            '%s %s created, %s existing' % (record_type, created, existing) for record_type, (created, existing) in sorted(counts.items())
+        )))
+        return counts
+
+    @classmethod
+    def _feed_ids(cls, feed_urls, feed_ids):
+        """Fills the dict url => pk with the Feeds of some URLs, created if needed.
+        The URLs are the ones of the records: an unnormalized URL gets the Feed of the normalized one.
+
+        Returns:
+            The set of the URLs of the created Feeds.
+        """
+        missing = set(feed_url for feed_url in feed_urls if feed_url not in feed_ids)
+        if not missing:
+            return set()
+        feeds, created = cls._get_or_create_feeds(missing)
+        feed_ids.update((feed_url, f.pk) for feed_url, f in feeds.items())
+        return created
+
+    @classmethod
+    def _import_feeds(cls, records, feed_ids):
+        """Gets or creates the Feeds of a batch of records. Returns the number of created Feeds."""
+        for record in records:
+            record['url'] = normalize_url(record['url']) or record['url']
+        created = cls._feed_ids([record['url'] for record in records], feed_ids)
+
+        disabled = [record['url'] for record in records if record['url'] in created and not record.get('enabled', True)]
+        if disabled:
+            models.Feed.objects.filter(url__in=disabled).update(enabled=False)
+        return len(created)
+
+    @classmethod
+    def _import_statuses(cls, records, feed_ids):
+        """Inserts the FetchStatus of a batch of records which do not exist yet. Returns the number of created FetchStatus."""
+        cls._feed_ids(set(record['feed'] for record in records), feed_ids)
+
+        starts = set(parse_datetime(record['timestamp_start']) for record in records)
+        existing = set(models.FetchStatus.objects.filter(timestamp_start__in=starts).values_list('feed', 'timestamp_start'))
+
+        to_create = []
+        for record in records:
+            status = models.FetchStatus(
+                feed_id=feed_ids[record['feed']],
+                timestamp_start=parse_datetime(record['timestamp_start']),
+                timestamp_end=_load_date(record.get('timestamp_end')),
+            )
+            if (status.feed_id, status.timestamp_start) in existing:
+                continue
+            existing.add((status.feed_id, status.timestamp_start))
+            for f in ('http_status_code', 'size_bytes', 'nb_entries', 'nb_new_entries', 'error_msg', 'timings', 'permanent_redirect', 'nb_temporary_redirects'):
+                setattr(status, f, record.get(f))
+            to_create.append(status)
+
+        bulk_insert_raw(models.FetchStatus, to_create)
+        return len(to_create)
+
+    @classmethod
+    def _import_entries(cls, records, feed_ids):
+        """Inserts the Entry of a batch of records which do not exist yet. Returns the number of created Entry."""
+        cls._feed_ids(set(record['feed'] for record in records), feed_ids)
+
+        # Get the FetchStatus: (feed_id, timestamp_start) => pk, with an empty one for those which are missing
+        starts = set(parse_datetime(record['fetch_status']) for record in records)
+        keys = set((feed_ids[record['feed']], parse_datetime(record['fetch_status'])) for record in records)
+        status_ids = {}
+        for feed_id, start, pk in models.FetchStatus.objects.filter(timestamp_start__in=starts).values_list('feed', 'timestamp_start', 'pk'):
+            status_ids[(feed_id, start)] = pk
+        missing = [models.FetchStatus(feed_id=feed_id, timestamp_start=start) for feed_id, start in keys if (feed_id, start) not in status_ids]
+        if missing:
+            bulk_insert_raw(models.FetchStatus, missing)
+            for feed_id, start, pk in models.FetchStatus.objects.filter(timestamp_start__in=starts).values_list('feed', 'timestamp_start', 'pk'):
+                status_ids[(feed_id, start)] = pk
+
+        existing = set(models.Entry.objects.filter(uid_hash__in=set(record['uid_hash'] for record in records)).values_list('feed', 'uid_hash'))
+
+        to_create = []
+        for record in records:
+            feed_id = feed_ids[record['feed']]
+            if (feed_id, record['uid_hash']) in existing:
+                continue
+            existing.add((feed_id, record['uid_hash']))
+            to_create.append(models.Entry(
+                feed_id=feed_id,
+                fetch_status_id=status_ids[(feed_id, parse_datetime(record['fetch_status']))],
+                xml=record['xml'],
+                uid_hash=record['uid_hash'],
+                add_date=parse_datetime(record['add_date']),
+                edit_date=parse_datetime(record['edit_date']),
+            ))
+
+        bulk_insert_raw(models.Entry, to_create)
+        for feed_id in set(entry.feed_id for entry in to_create):
+            models.Entry.invalidate_latest(feed_id)
+        return len(to_create)
+
+    @classmethod
+    def pull(cls, consumer_name, limit=100, feed_urls=None):
+        """Pulls the entries a consumer has not consumed yet.
+        The consumer is created the first time. Its cursor is not moved: see commit.
+
+        Args:
+            consumer_name: the unique name of the consumer
+            limit: the maximum number of entries
+            feed_urls: the URLs of the feeds to read the entries of, including the entries of the Feeds they are an alias of. Default: None, i.e. all the Feeds
+
+        Returns:
+            An iterator of Entry, ordered by pk.
+        """
+        consumer, _ = models.Consumer.objects.get_or_create(name=consumer_name)
+        feeds = None
+        if feed_urls is not None:
+            feeds = set()
+            for pk, alias_of_id in models.Feed.objects.filter(url__in=[normalize_url(u) or u for u in feed_urls]).values_list('pk', 'alias_of'):
+                feeds.add(pk)
+                if alias_of_id is not None:
+                    feeds.add(alias_of_id)
+            feeds = list(feeds)
+        return consumer.pull(limit, feeds)
+
+    @classmethod
+    def commit(cls, consumer_name, entry):
+        """Moves the cursor of a consumer after an entry it has consumed.
+
+        Args:
+            consumer_name: the unique name of the consumer
+            entry: the last consumed Entry or its pk
+        """
+        consumer, _ = models.Consumer.objects.get_or_create(name=consumer_name)
+        consumer.commit(getattr(entry, 'pk', entry))
@@ -3,23 +3,43 @@ from django.core.files.storage import get_storage_class
 from django.utils.functional import LazyObject
 
 # Internal
-from .settings import (
-    FILE_STORAGE, FILE_STORAGE_ARGS,
-    LOGGER_NAME, LOG_FILE, LOG_SIZE, LOGGER_FORMAT, LOG_LEVEL
-)
+from .settings import settings
 from .utils.loggers import LoggerWithStorage
+from .utils.writers import BackgroundWriter
 
 
 class DefaultFileStorage(LazyObject):
     def _setup(self):
-        self._wrapped = get_storage_class(FILE_STORAGE)(**FILE_STORAGE_ARGS)
+        self._wrapped = get_storage_class(settings.FILE_STORAGE)(**settings.FILE_STORAGE_ARGS)
 
+
+class DefaultLoggerWithStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = LoggerWithStorage(
+            storage=default_file_storage,
+            logger_name=settings.LOGGER_NAME,
+            level=settings.LOG_LEVEL,
+            log_file=settings.LOG_FILE,
+            log_size=settings.LOG_SIZE,
+            logger_format=settings.LOGGER_FORMAT,
+            queue_size=settings.LOG_QUEUE_SIZE,
+            queue_overflow=settings.LOG_QUEUE_OVERFLOW
+        )
+
+
+def _payload_error(name, err):
+    default_logger.error('[Payloads] - Saving <%s> => [KO]\n%s', name, err)
+
+
+class DefaultPayloadWriter(LazyObject):
+    def _setup(self):
+        self._wrapped = BackgroundWriter(
+            storage=default_file_storage,
+            in_thread=settings.STORE_PAYLOADS_IN_THREAD,
+            on_error=_payload_error
+        )
+
+# Nothing is set up before being used.
 default_file_storage = DefaultFileStorage()
-default_logger = LoggerWithStorage(
-    storage=default_file_storage,
-    logger_name=LOGGER_NAME,
-    level=LOG_LEVEL,
-    log_file=LOG_FILE,
-    log_size=LOG_SIZE,
-    logger_format=LOGGER_FORMAT
-)
+default_logger = DefaultLoggerWithStorage()
+default_payload_writer = DefaultPayloadWriter()
@@ -0,0 +1,39 @@
+# Python stdlib
+from datetime import datetime, time
+
+# Django
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_date_option(value):
+    """Parses a date given as YYYY-MM-DD or YYYY-MM-DD HH:MM[:SS] into a datetime."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError('Invalid date: %s' % (value,))
+        parsed = datetime.combine(date, time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+    return parsed
+
+
+def parse_feeds_option(values):
+    """Returns the ids of the Feeds given by id or URL. Raises a CommandError for an unknown Feed."""
+    # Internal: imported here because Django imports the management package of the application for every command
+    from ..models import Feed
+    from ..utils.urls import normalize_url
+
+    feed_ids = []
+    for value in values:
+        if value.isdigit():
+            feeds = Feed.objects.filter(pk=value)
+        else:
+            feeds = Feed.objects.filter(url=normalize_url(value) or value)
+        pks = list(feeds.values_list('pk', flat=True))
+        if not pks:
+            raise CommandError('Unknown Feed: %s' % (value,))
+        feed_ids.append(pks[0])
+    return feed_ids
@@ -0,0 +1,50 @@
+# Python stdlib
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Internal
+from ...models import Feed
+
+
+class Command(BaseCommand):
+    """Django command to normalize the URLs of the Feeds, find the Feeds serving the same content and make them aliases of one of them."""
+    help = ('List the Feeds whose URL is not normalized and the Feeds whose last fetched bodies are identical. '
+        'With --apply, normalize their URL, merging them into the Feed having the normalized URL if any, and make the duplicates aliases of the oldest one.')
+    option_list = BaseCommand.option_list + (
+        make_option('--apply', action='store_true', dest='apply', default=False,
+            help='Normalize the URLs and make the duplicate Feeds aliases of the oldest Feed of their group, fetched instead of them.'),
+    )
+
+    def handle(self, *args, **options):
+        try:
+            feeds = Feed.unnormalized()
+            for feed, url in feeds:
+                self.stdout.write('%s => %s\n' % (feed.url, url))
+                if options.get('apply'):
+                    feed.move(url)
+
+            self.stdout.write('%s Feeds with a URL not normalized%s.\n' % (
+                len(feeds),
+                options.get('apply') and ' normalized' or ''
+            ))
+        except Exception as err:
+            self.stderr.write('Cannot normalize the URLs of the Feeds. \n%s\n' % (err,))
+
+        try:
+            groups = Feed.duplicates()
+            for group in groups:
+                canonical, duplicates = group[0], group[1:]
+                self.stdout.write('%s\n' % (canonical.url,))
+                for feed in duplicates:
+                    self.stdout.write('    %s\n' % (feed.url,))
+                    if options.get('apply'):
+                        feed.alias_to(canonical)
+
+            self.stdout.write('%s groups of duplicate Feeds%s.\n' % (
+                len(groups),
+                options.get('apply') and ' coalesced' or ''
+            ))
+        except Exception as err:
+            self.stderr.write('Cannot coalesce the Feeds. \n%s\n' % (err,))
@@ -0,0 +1,63 @@
+# Python stdlib
+import sys
+import gzip
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Internal
+from .. import parse_date_option, parse_feeds_option
+from ...hub import Hub
+
+
+class Command(BaseCommand):
+    """Django command to export the Feeds with their fetch statuses and entries."""
+    args = '<file>'
+    help = 'Export the Feeds with their fetch statuses and entries as NDJSON, or their entries as Atom. ' \
+        'The file is compressed with gzip if its name ends with .gz. Use - for the standard output.'
+    option_list = BaseCommand.option_list + (
+        make_option('--feed', dest='feeds', action='append', default=[],
+            help='Only this Feed, given by id or URL. Can be repeated.'),
+        make_option('--since', dest='since',
+            help='Only the fetches started and the entries added since this date: YYYY-MM-DD[ HH:MM[:SS]].'),
+        make_option('--until', dest='until',
+            help='Only the fetches started and the entries added before this date: YYYY-MM-DD[ HH:MM[:SS]].'),
+        make_option('--format', dest='format', choices=[Hub.NDJSON, Hub.ATOM], default=Hub.NDJSON,
+            help='ndjson: the Feeds, fetch statuses and entries, to be imported with feedstorage_import. atom: the entries only. Default: ndjson'),
+        make_option('--batch-size', dest='batch_size', type='int', default=1000,
+            help='Number of rows read with one query. Default: 1000'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('A file must be provided.')
+
+        feed_ids = options.get('feeds') and parse_feeds_option(options['feeds']) or None
+        since = options.get('since') and parse_date_option(options['since']) or None
+        until = options.get('until') and parse_date_option(options['until']) or None
+
+        filename = args[0]
+        try:
+            start = timezone.now()
+            if filename == '-':
+                out = sys.stdout
+            elif filename.endswith('.gz'):
+                out = gzip.open(filename, 'wb')
+            else:
+                out = open(filename, 'wb')
+            try:
+                counts = Hub.export_entries(out, None, since, until, options['format'], options['batch_size'], feed_ids)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            delta = timezone.now() - start
+
+            if out is not sys.stdout:
+                self.stdout.write('Exported in %ss: %s.\n' % (
+                    delta.total_seconds(),
+                    ', '.join('%s %s' % (n, record_type) for record_type, n in sorted(counts.items()))
+                ))
+        except Exception as err:
+            self.stderr.write('Cannot export the entries. \n%s\n' % (err,))
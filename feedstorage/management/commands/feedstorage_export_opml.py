@@ -0,0 +1,30 @@
+# Python stdlib
+import sys
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Internal
+from ...hub import Hub
+
+
+class Command(BaseCommand):
+    """Django command to export the Feeds and their subscriptions as OPML."""
+    args = '[opml_file]'
+    help = 'Export the Feeds and their subscriptions as OPML, in a file or on the standard output.'
+
+    def handle(self, *args, **options):
+        if len(args) > 1:
+            raise CommandError('Only one OPML file can be provided.')
+
+        try:
+            if args:
+                out = open(args[0], 'wb')
+                try:
+                    Hub.export_opml(out)
+                finally:
+                    out.close()
+            else:
+                Hub.export_opml(sys.stdout)
+        except Exception as err:
+            self.stderr.write('Cannot export the OPML file. \n%s\n' % (err,))
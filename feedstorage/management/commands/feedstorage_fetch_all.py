@@ -1,19 +1,73 @@
+# Python stdlib
+from optparse import make_option
+
 # Django
+from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
 # Internal
+from .. import parse_feeds_option
+from ...log import default_file_storage
 from ...models import Feed
+from ...utils.profiling import Profiler, SamplingProfiler
 
 
 class Command(BaseCommand):
     """Django command to fetch all the enabled Feeds."""
     help = 'Fetch all the enabled Feeds.'
+    option_list = BaseCommand.option_list + (
+        make_option('--profile', dest='profile', action='store_true', default=False,
+            help='Profile the whole run.'),
+        make_option('--profile-feeds', dest='profile_feeds', action='append', default=[],
+            help='Profile the fetching of this Feed only, given by id or URL. Can be repeated.'),
+        make_option('--profile-sampling', dest='profile_sampling', type='float', default=None, metavar='SECONDS',
+            help='Sample the stack every SECONDS instead of using cProfile, to bound the overhead on a live process.'),
+        make_option('--profile-top', dest='profile_top', type='int', default=25,
+            help='Number of functions to print, by cumulative time. Default: 25'),
+    )
 
     def handle(self, *args, **options):
+        profiled_ids = set(parse_feeds_option(options.get('profile_feeds')))
+        profiler = None
+        if options.get('profile') or profiled_ids:
+            if options.get('profile_sampling'):
+                profiler = SamplingProfiler(interval=options['profile_sampling'])
+            else:
+                profiler = Profiler()
 
         try:
-            feeds = Feed.objects.filter(enabled=True)
-            t = Feed.fetch_collection(feeds, '[Commands]')
-            self.stdout.write('%s enabled Feeds fetched in %ss.' % (feeds.count(), t))
+            feeds = Feed.objects.filter(enabled=True, alias_of__isnull=True)  # The aliases are fetched through the Feed they are an alias of
+            if profiled_ids:
+                # Only the fetch of the selected Feeds is profiled
+                feeds = list(feeds)
+                for feed in feeds:
+                    if feed.pk in profiled_ids:
+                        feed.fetch = profiler.wrap(feed.fetch)
+
+            if profiler is not None and not profiled_ids:
+                profiler.start()
+                try:
+                    t = Feed.fetch_collection(feeds, '[Commands]')
+                finally:
+                    profiler.stop()
+            else:
+                t = Feed.fetch_collection(feeds, '[Commands]')
+            self.stdout.write('%s enabled Feeds fetched in %ss.' % (len(feeds), t))
         except Exception as err:
             self.stderr.write('Cannot fetch the enabled Feeds. \n%s' % (err,))
+
+        if profiler is not None:
+            self.save_profile(profiler, options.get('profile_top'))
+
+    def save_profile(self, profiler, top):
+        """Saves the profile with the file storage and prints the top functions."""
+        try:
+            name = default_file_storage.save(
+                'profiles/feedstorage_fetch_all_%s.%s' % (timezone.now().strftime('%Y%m%dT%H%M%S'), profiler.extension),
+                ContentFile(profiler.dump())
+            )
+            self.stdout.write('\nProfile saved as %s\n' % (name,))
+            self.stdout.write(profiler.report(top))
+        except Exception as err:
+            self.stderr.write('Cannot save the profile. \n%s' % (err,))
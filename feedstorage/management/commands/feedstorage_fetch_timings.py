@@ -0,0 +1,68 @@
+# Python stdlib
+import json
+from datetime import timedelta
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+# Internal
+from .. import parse_date_option, parse_feeds_option
+from ...models import FetchStatus
+from ...utils.timer import percentile
+
+PHASES = ('connect', 'download', 'parse', 'dedup', 'insert', 'notify')
+PERCENTILES = (50, 95, 99)
+
+
+class Command(BaseCommand):
+    """Django command to report the time spent in each phase of the fetching."""
+    help = 'Report the 50th, 95th and 99th percentiles of the time spent in each phase of the fetching, in milliseconds.'
+    option_list = BaseCommand.option_list + (
+        make_option('--feed', dest='feeds', action='append', default=[],
+            help='Only the fetches of this Feed, given by id or URL. Can be repeated.'),
+        make_option('--since', dest='since',
+            help='Only the fetches started since this date: YYYY-MM-DD[ HH:MM[:SS]].'),
+        make_option('--until', dest='until',
+            help='Only the fetches started before this date: YYYY-MM-DD[ HH:MM[:SS]].'),
+        make_option('--days', dest='days', type='int',
+            help='Only the fetches started in the last DAYS days.'),
+    )
+
+    def handle(self, *args, **options):
+        statuses = FetchStatus.objects.filter(timings__isnull=False)
+
+        if options.get('feeds'):
+            statuses = statuses.filter(feed__in=parse_feeds_option(options['feeds']))
+        if options.get('days'):
+            statuses = statuses.filter(timestamp_start__gte=timezone.now() - timedelta(days=options['days']))
+        if options.get('since'):
+            statuses = statuses.filter(timestamp_start__gte=parse_date_option(options['since']))
+        if options.get('until'):
+            statuses = statuses.filter(timestamp_start__lt=parse_date_option(options['until']))
+
+        # phase => list of durations in milliseconds
+        durations = dict((phase, []) for phase in PHASES)
+        durations['total'] = []
+        nb = 0
+        for timings in statuses.values_list('timings', flat=True).iterator():
+            nb += 1
+            timings = json.loads(timings)
+            for phase, seconds in timings.items():
+                durations.setdefault(phase, []).append(seconds * 1000)
+            durations['total'].append(sum(timings.values()) * 1000)
+
+        self.stdout.write('%s fetches.\n' % (nb,))
+        if not nb:
+            return
+
+        phases = list(PHASES) + sorted(p for p in durations if p not in PHASES and p != 'total') + ['total']
+        self.stdout.write('%-10s %8s %10s %10s %10s %10s\n' % (('phase', 'count') + tuple('p%s' % p for p in PERCENTILES) + ('max',)))
+        for phase in phases:
+            values = sorted(durations[phase])
+            if not values:
+                continue
+            self.stdout.write('%-10s %8s %10.1f %10.1f %10.1f %10.1f\n' % (
+                (phase, len(values)) + tuple(percentile(values, p) for p in PERCENTILES) + (values[-1],)
+            ))
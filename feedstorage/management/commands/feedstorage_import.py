@@ -0,0 +1,49 @@
+# Python stdlib
+import sys
+import gzip
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Internal
+from ...hub import Hub
+
+
+class Command(BaseCommand):
+    """Django command to import the Feeds with their fetch statuses and entries exported by feedstorage_export."""
+    args = '<file>'
+    help = 'Import the Feeds with their fetch statuses and entries exported as NDJSON by feedstorage_export. ' \
+        'The file is decompressed with gzip if its name ends with .gz. Use - for the standard input.'
+    option_list = BaseCommand.option_list + (
+        make_option('--batch-size', dest='batch_size', type='int', default=Hub.CHUNK_SIZE,
+            help='Maximum number of rows inserted at once. Default: %s' % (Hub.CHUNK_SIZE,)),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('A file must be provided.')
+
+        filename = args[0]
+        try:
+            start = timezone.now()
+            if filename == '-':
+                source = sys.stdin
+            elif filename.endswith('.gz'):
+                source = gzip.open(filename, 'rb')
+            else:
+                source = open(filename, 'rb')
+            try:
+                counts = Hub.import_entries(source, options['batch_size'])
+            finally:
+                if source is not sys.stdin:
+                    source.close()
+            delta = timezone.now() - start
+
+            self.stdout.write('Imported in %ss: %s.\n' % (
+                delta.total_seconds(),
+                ', '.join('%s %s created, %s existing' % (record_type, created, existing) for record_type, (created, existing) in sorted(counts.items()))
+            ))
+        except Exception as err:
+            self.stderr.write('Cannot import the entries. \n%s\n' % (err,))
@@ -0,0 +1,49 @@
+# Python stdlib
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Internal
+from ...hub import Hub
+from ...utils.serializers import deserialize_function, DeserializationFailed
+
+
+class Command(BaseCommand):
+    """Django command to import the Feeds of an OPML file."""
+    args = '<opml_file>'
+    help = 'Import the Feeds of an OPML file and optionally subscribe a callback to them.'
+    option_list = BaseCommand.option_list + (
+        make_option('--callback', dest='callback', default=None,
+            help='The callback to subscribe to the Feeds: module.function or module.Class.classmethod'),
+        make_option('--dispatch-uid', dest='dispatch_uid', default=None,
+            help='The dispatch_uid of the subscriptions.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError('An OPML file must be provided.')
+
+        callback = options.get('callback')
+        if callback:
+            try:
+                deserialize_function(callback)
+            except DeserializationFailed as err:
+                raise CommandError(err)
+
+        try:
+            start = timezone.now()
+            results = Hub.import_opml(args[0], callback=callback, dispatch_uid=options.get('dispatch_uid'))
+            delta = timezone.now() - start
+
+            counts = {}
+            for _, result in results:
+                counts[result] = counts.get(result, 0) + 1
+            self.stdout.write('%s Feeds imported in %ss: %s.\n' % (
+                len(results),
+                delta.total_seconds(),
+                ', '.join('%s %s' % (n, result) for result, n in sorted(counts.items()))
+            ))
+        except Exception as err:
+            self.stderr.write('Cannot import the OPML file. \n%s\n' % (err,))
@@ -0,0 +1,22 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# Internal
+from ...models import SubscriptionChange, Payload
+
+
+class Command(BaseCommand):
+    """Django command to delete the data kept for a limited time: the old subscription changes and the least recently seen payloads."""
+    help = 'Delete the subscription changes older than SYNC_RETENTION days and the least recently seen payloads above PAYLOAD_RETENTION_BYTES.'
+
+    def handle(self, *args, **options):
+        try:
+            SubscriptionChange.prune()
+        except Exception as err:
+            self.stderr.write('Cannot prune the subscription changes. \n%s\n' % (err,))
+
+        try:
+            nb = Payload.prune()
+            self.stdout.write('%s payloads deleted.\n' % (nb,))
+        except Exception as err:
+            self.stderr.write('Cannot prune the payloads. \n%s\n' % (err,))
@@ -0,0 +1,33 @@
+# Python stdlib
+import time
+from optparse import make_option
+
+# Django
+from django.core.management.base import BaseCommand
+
+# Internal
+from ...models import FetchJob
+
+
+class Command(BaseCommand):
+    """Django command to run the pending fetch jobs queued from the admin."""
+    help = 'Run the pending fetch jobs queued from the admin.'
+    option_list = BaseCommand.option_list + (
+        make_option('--loop', dest='loop', type='int', default=0,
+            help='Keep running and check for pending jobs every LOOP seconds.'),
+    )
+
+    def handle(self, *args, **options):
+        loop = options.get('loop')
+
+        while True:
+            try:
+                nb = FetchJob.run_pending()
+                if nb:
+                    self.stdout.write('%s fetch jobs run.\n' % (nb,))
+            except Exception as err:
+                self.stderr.write('Cannot run the fetch jobs. \n%s\n' % (err,))
+
+            if not loop:
+                break
+            time.sleep(loop)
@@ -1,5 +1,74 @@
 # Django
-from django.db import models
+from django.db import models, connections
+from django.db.models import Max
+from django.db.models.query import QuerySet
+
+
+def estimated_count(model, using='default'):
+    """Returns the number of rows of the table of a model estimated from the statistics of the database.
+    This is instantaneous whereas COUNT(*) reads the whole table or index.
+
+    Returns:
+        An integer or None if the database does not provide statistics (SQLite) or they are not computed yet.
+    """
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE relname = %s'
+    elif connection.vendor == 'mysql':
+        sql = 'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s'
+    else:
+        return None
+
+    cursor = connection.cursor()
+    cursor.execute(sql, [model._meta.db_table])
+    row = cursor.fetchone()
+    if row and row[0] and row[0] > 0:
+        return int(row[0])
+    return None
+
+
+def iter_keyset(queryset, batch_size=1000):
+    """Iterates over a queryset in the order of the pk, batch by batch after the last pk read (keyset pagination).
+    Each batch is read with iterator() so that only one batch is in memory at a time,
+    and reading the last batch is as fast as reading the first one.
+
+    Args:
+        queryset: a queryset of model instances, or of dicts with a 'pk' key (values('pk', ...))
+        batch_size: the number of rows read with one query. Default: 1000
+
+    Returns:
+        A generator of the items of the queryset.
+    """
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+
+        nb = 0
+        for item in batch[:batch_size].iterator():
+            nb += 1
+            last_pk = isinstance(item, dict) and item['pk'] or item.pk
+            yield item
+
+        if nb < batch_size:
+            return
+
+
+def bulk_insert_raw(model, objs, using='default'):
+    """Inserts objects with a few queries, like bulk_create, but with the values of their fields as they are:
+    the dates having auto_now or auto_now_add are not set to now, as when loading a fixture.
+
+    Args:
+        model: the model of the objects
+        objs: a list of instances without pk
+        using: the alias of the database. Default: 'default'
+    """
+    fields = [f for f in model._meta.local_fields if not isinstance(f, models.AutoField)]
+    batch_size = max(connections[using].ops.bulk_batch_size(fields, objs), 1)
+    for i in range(0, len(objs), batch_size):
+        model._base_manager._insert(objs[i:i + batch_size], fields=fields, using=using, raw=True)
 
 
 class FeedManager(models.Manager):
@@ -7,15 +76,88 @@ class FeedManager(models.Manager):
         return self.get(url=url)
 
 
+class FetchStatusQuerySet(QuerySet):
+    def lean(self):
+        """Defers the large error_msg column."""
+        return self.defer('error_msg')
+
+    def last_of_feed(self, feed, lean=True):
+        """Returns the last FetchStatus of a feed, i.e. with the greatest id like last_per_feed, or None. Uses the (feed_id, id) index."""
+        statuses = self.filter(feed=feed).order_by('-pk')
+        if lean:
+            statuses = statuses.lean()
+        statuses = list(statuses[:1])
+        return statuses and statuses[0] or None
+
+    def last_per_feed(self, feeds=None, lean=True):
+        """Returns the last FetchStatus of each feed. Uses the (feed_id, id) index.
+
+        Args:
+            feeds: a collection of Feed (or a queryset). Default: None, i.e. all the Feeds
+            lean: whether to defer the large columns. Default: True
+        """
+        statuses = self
+        if feeds is not None:
+            statuses = statuses.filter(feed__in=feeds)
+        last_ids = statuses.values('feed').annotate(last_id=Max('id')).values_list('last_id', flat=True)
+
+        statuses = self.filter(pk__in=list(last_ids))
+        if lean:
+            statuses = statuses.lean()
+        return statuses
+
+
 class FetchStatusManager(models.Manager):
+    def get_query_set(self):
+        return FetchStatusQuerySet(self.model, using=self._db)
+
     def get_by_natural_key(self, feed_url, timestamp_start):
         return self.get(feed__url=feed_url, timestamp_start=timestamp_start)
 
+    def lean(self):
+        return self.get_query_set().lean()
+
+    def last_of_feed(self, feed, lean=True):
+        return self.get_query_set().last_of_feed(feed, lean)
+
+    def last_per_feed(self, feeds=None, lean=True):
+        return self.get_query_set().last_per_feed(feeds, lean)
+
+
+class EntryQuerySet(QuerySet):
+    def lean(self):
+        """Defers the large xml column."""
+        return self.defer('xml')
+
+    def recent(self, feed=None, lean=True):
+        """Returns the entries, the most recent first.
+        Uses the (feed_id, add_date) index for a feed and the add_date index otherwise.
+
+        Args:
+            feed: a Feed. Default: None, i.e. all the Feeds
+            lean: whether to defer the large columns. Default: True
+        """
+        entries = self
+        if feed is not None:
+            entries = entries.filter(feed=feed)
+        if lean:
+            entries = entries.lean()
+        return entries.order_by('-add_date')
+
 
 class EntryManager(models.Manager):
+    def get_query_set(self):
+        return EntryQuerySet(self.model, using=self._db)
+
     def get_by_natural_key(self, feed_url, uid_hash):
         return self.get(feed__url=feed_url, uid_hash=uid_hash)
 
+    def lean(self):
+        return self.get_query_set().lean()
+
+    def recent(self, feed=None, lean=True):
+        return self.get_query_set().recent(feed, lean)
+
 
 class SubscriptionManager(models.Manager):
     def get_by_natural_key(self, feed_url, callback):
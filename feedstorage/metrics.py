@@ -0,0 +1,18 @@
+# Django
+from django.utils.functional import LazyObject
+from django.utils.importlib import import_module
+
+# Internal
+from .settings import settings
+from .utils.metrics import NullSink
+
+
+class DefaultMetricsSink(LazyObject):
+    def _setup(self):
+        if not settings.METRICS_SINK:
+            self._wrapped = NullSink()
+        else:
+            module_name, class_name = settings.METRICS_SINK.rsplit('.', 1)
+            self._wrapped = getattr(import_module(module_name), class_name)(**settings.METRICS_SINK_ARGS)
+
+default_metrics = DefaultMetricsSink()
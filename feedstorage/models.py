@@ -1,22 +1,34 @@
 # Python stdlib
+import time
+import json
+import random
 import hashlib
+import threading
+from datetime import timedelta
 
 # Django
-from django.db import models, DatabaseError
+from django.db import models, transaction, connection
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q, Count, Min, Sum
 from django.utils import timezone
 from django.dispatch import receiver
-from django.db.models.signals import pre_delete
+from django.db.models.signals import pre_delete, post_delete, post_save
 
 # Third-party apps
 from lxml import etree
 
 # Internal
-from .settings import USE_HTTP_COMPRESSION
-from .log import default_logger as logger
+from .settings import settings
+from .log import default_logger as logger, default_file_storage, default_payload_writer
+from .metrics import default_metrics as metrics
 from .managers import FeedManager, FetchStatusManager, EntryManager, SubscriptionManager
 import signals
 from .utils import http
+from .utils.urls import normalize_url
 from .utils.serializers import deserialize_function, serialize_function
+from .utils.iterators import chunked
+from .utils.loggers import DiagnosticContext
+from .utils.writers import gunzip_data
 
 FEED_FORMAT = {
     'RSS': {
@@ -34,12 +46,19 @@ FEED_FORMAT = {
 }
 
 
+LATEST_ENTRY_CACHE_KEY = 'feedstorage:latest_entry:%s:%s'  # feed pk, version
+LATEST_ENTRY_VERSION_KEY = 'feedstorage:latest_entry_version:%s'  # Incremented to invalidate the cached latest entry of a feed
+
+
 class Feed(models.Model):
     """A Feed"""
     url = models.URLField(unique=True, db_index=True)
     etag = models.CharField(max_length=255, null=True, blank=True)
     # Whether it must be fetched automatically when using the ``feedstorage_fetch_all`` management command, Default: True
     enabled = models.BooleanField(default=True)
+    body_hash = models.CharField(max_length=40, null=True, blank=True, db_index=True)  # SHA-1 of the last body fetched
+    # The Feed serving the same content, fetched instead of this one. Its new entries are notified to the subscribers of this one.
+    alias_of = models.ForeignKey('self', null=True, blank=True, related_name='aliases', on_delete=models.SET_NULL)
 
     objects = FeedManager()
 
@@ -55,132 +74,405 @@ class Feed(models.Model):
     def log_desc(self):
         return '<Feed: %s>' % (self,)
 
+    def save(self, *args, **kwargs):
+        """Overrides the save method.
+        Normalizes the URL so that the same feed is not stored twice."""
+        self.url = normalize_url(self.url) or self.url
+
+        super(Feed, self).save(*args, **kwargs)  # Call the "real" save() method.
+
     def nb_entries(self):
         """Returns the number of entries."""
         return self.entry_set.count()
 
     nb_entries.short_description = 'Nb Entries'
 
+    def alias_to(self, feed):
+        """Makes this Feed an alias of another Feed serving the same content:
+        this one is not fetched anymore and its subscribers are notified of the new entries of the other one.
+        The aliases of this Feed become aliases of the other one.
+
+        Args:
+            feed: the Feed to fetch instead. If it is an alias itself, the Feed it is an alias of is used.
+
+        Returns:
+            The Feed fetched instead.
+        """
+        feed = feed.root()
+        if feed.pk == self.pk:
+            raise ValueError('%s cannot be an alias of itself.' % (self.log_desc,))
+
+        self.aliases.update(alias_of=feed)
+        self.alias_of = feed
+        self.save()
+        logger.info('%s - Aliasing to %s => [OK]', self.log_desc, feed.log_desc)
+        return feed
+
+    def unalias(self):
+        """Makes this Feed fetched again instead of the Feed it is an alias of."""
+        self.alias_of = None
+        self.save()
+
+    def root(self):
+        """Returns the Feed fetched instead of this one: the end of the chain of aliases, this Feed if it is not an alias.
+
+        Raises:
+            ValueError if the aliases form a cycle.
+        """
+        feed, seen = self, set([self.pk])
+        while feed.alias_of_id is not None:
+            if feed.alias_of_id in seen:
+                raise ValueError('The aliases of %s form a cycle.' % (self.log_desc,))
+            seen.add(feed.alias_of_id)
+            feed = feed.alias_of
+        return feed
+
+    def clean(self):
+        """Validates the Feed this one is an alias of: an alias cannot be an alias of itself, of an alias or have aliases."""
+        if self.alias_of_id is None:
+            return
+        if self.alias_of_id == self.pk:
+            raise ValidationError('A Feed cannot be an alias of itself.')
+        if self.alias_of.alias_of_id is not None:
+            raise ValidationError('%s is an alias of %s: use this one instead.' % (self.alias_of, self.alias_of.alias_of))
+        if self.pk is not None and self.aliases.exists():
+            raise ValidationError('A Feed having aliases cannot be an alias: make its aliases aliases of the other Feed first.')
+
+    @classmethod
+    def unnormalized(cls):
+        """Returns the Feeds whose URL is not normalized, e.g. saved before the URLs were normalized.
+        See move to normalize them. The disabled Feeds already merged into the Feed having their normalized URL are skipped.
+
+        Returns:
+            A list of tuples (Feed, normalized URL), ordered by pk.
+        """
+        feeds = []
+        for feed in cls.objects.order_by('pk').iterator():
+            url = normalize_url(feed.url)
+            if url is not None and url != feed.url:
+                feeds.append((feed, url))
+
+        existing = set()
+        for chunk in chunked([url for feed, url in feeds if not feed.enabled], 500):
+            existing.update(cls.objects.filter(url__in=chunk).values_list('url', flat=True))
+        return [(feed, url) for feed, url in feeds if feed.enabled or url not in existing]
+
+    @classmethod
+    def duplicates(cls):
+        """Returns the Feeds, not aliased, whose last fetched bodies are identical.
+
+        Returns:
+            A list of groups of duplicate Feeds, as lists ordered by pk.
+        """
+        hashes = cls.objects.filter(alias_of__isnull=True, body_hash__isnull=False).values('body_hash').annotate(
+            nb=Count('pk')
+        ).filter(nb__gt=1).values_list('body_hash', flat=True)
+
+        groups = {}
+        for feed in cls.objects.filter(alias_of__isnull=True, body_hash__in=list(hashes)).order_by('pk'):
+            groups.setdefault(feed.body_hash, []).append(feed)
+        return sorted(groups.values(), key=lambda group: group[0].pk)
+
     @classmethod
-    def fetch_collection(cls, feeds, prefix_log):
+    def fetch_collection(cls, feeds, prefix_log, batch=None, progress=None):
         """Fetches a collection of Feed.
 
         Args:
             feeds: the collection of Feed to fetch
             prefix_log: a prefix to use in the log to know who called it
+            batch: a NotificationBatch to collect the new entries. Default: a new one if the BATCH_NOTIFICATIONS setting is True.
+            progress: a callable called with each Feed once fetched and whether it was fetched without error. Default: None
 
         Returns:
             The time elapsed in seconds.
         """
         start = timezone.now()
-        log_desc = '%s - Fetching %s Feeds' % (prefix_log, feeds.count())
+        log_desc = '%s - Fetching %s Feeds' % (prefix_log, len(feeds))  # Also a list. Loads a queryset once for the loop below
+
+        logger.info('%s => start', log_desc)
 
-        logger.info('%s => start' % (log_desc,))
+        if batch is None and settings.BATCH_NOTIFICATIONS:
+            batch = signals.NotificationBatch(
+                window=settings.BATCH_WINDOW,
+                merged=settings.BATCH_MERGED_XML,
+                workers=settings.NOTIFY_WORKERS,
+                timeout=settings.NOTIFY_TIMEOUT
+            )
 
         for feed in feeds:
+            ok = False
             try:
-                feed.fetch()
+                ok = feed.fetch(batch=batch)
             except Exception as err:
-                logger.error('%s - Fetching => [KO]\n%s' % (feed.log_desc, err))
+                logger.error('%s - Fetching => [KO]\n%s', feed.log_desc, err)
+
+            if progress is not None:
+                progress(feed, ok)
+
+        if batch is not None:
+            Subscription.notify_batch(batch)
 
         delta = timezone.now() - start
-        logger.info('%s in %ss => end' % (log_desc, delta.total_seconds()))
+        logger.info('%s in %ss => end', log_desc, delta.total_seconds())
+        if metrics.enabled:
+            metrics.timing('feedstorage_fetch_collection_duration_seconds', delta.total_seconds())
 
         return delta
 
-    def fetch(self):
-        """Fetches a Feed and creates the new entries. A Fetch status report is also created."""
+    def fetch(self, batch=None, context=None):
+        """Fetches a Feed and creates the new entries. A Fetch status report is also created.
+
+        Args:
+            batch: a NotificationBatch to collect the new entries instead of notifying the subscribers right away. Default: None
+            context: a DiagnosticContext collecting the error messages and the timings of this fetch. Default: a new one
+
+        Returns:
+            A boolean saying whether it was fetched without error.
+        """
+        if self.alias_of_id is not None:
+            try:
+                root = self.root()
+            except ValueError as err:
+                logger.error('%s - Fetching => [KO]\n%s', self.log_desc, err)
+                return False
+            logger.info('%s - Fetching => Alias of %s', self.log_desc, root.log_desc)
+            return root.fetch(batch=batch, context=context)
+
+        if context is None:
+            context = DiagnosticContext()
+        timer = context.timer
         data = etag = status_code = entries = None
+        redirects = []
+        body_changed = False
+        dedup_hits = 0
         status = FetchStatus(feed=self)
         status.timestamp_start = timezone.now()
         status.save()  # Important to save it here because we need an ID
 
         try:
             # Get content
-            data, etag, status_code = http.get_content(
+            data, etag, status_code, redirects = http.get_content(
                 url=self.url,
                 etag=self.etag,
-                use_http_compression=USE_HTTP_COMPRESSION,
+                use_http_compression=settings.USE_HTTP_COMPRESSION,
                 return_etag=True,
-                return_status_code=True
+                return_status_code=True,
+                return_redirects=True,
+                timer=timer
             )
         except Exception as e:
-            logger.append_msg('Error while getting the content.\n%s' % (e,))
+            context.append('Error while getting the content.\n%s', e)
 
         status.http_status_code = status_code
+        status.nb_temporary_redirects = len([code for code, _ in redirects if code not in http.PERMANENT_REDIRECT_CODES])
+        # Only follow a permanent redirect to a working feed
+        if status_code == 200 or status_code == 304:
+            status.permanent_redirect = normalize_url(http.permanent_location(redirects))
         if status_code != 200 and status_code != 304:
-            logger.append_msg('HTTP Status code = %s != 200 or 304.' % (status_code,))
+            context.append('HTTP Status code = %s != 200 or 304.', status_code)
         elif status_code == 200:  # There is data to parse
             status.size_bytes = len(data)
+            body_hash = hashlib.sha1(data).hexdigest()
+            body_changed = body_hash != self.body_hash
+            self.body_hash = body_hash
 
             try:
                 # Parse the xml and get the entries
+                timer.start('parse')
                 entries = self._get_entries(data)
             except Exception as e:
-                logger.append_msg('Feed cannot be parsed.\n%s' % (e, ))
+                context.append('Feed cannot be parsed.\n%s', e)
+            timer.stop()
 
             if not entries:
-                logger.append_msg('No entries found.')
+                context.append('No entries found.')
             else:  # There are entries to parse
                 status.nb_entries = len(entries)
-                new_entries = []
+                delivery = settings.NOTIFY_DELIVERY
+                nb_new_entries = 0
+                new_entries = []  # The new Entry not notified yet, or only their pk if they are delivered lazily
                 # Get all the existing uid hash to compare
                 # Not very efficient but OK for now
                 # Later, assumes that taking the X (TBD) last entries is sufficient
+                timer.start('dedup')
                 existing_entries_uid_hash = [v for v in self.entry_set.values_list('uid_hash', flat=True)]  # Use of list comprehension because values_list returns a ValuesListQuerySet which does not have an append attribute.
 
                 # Foreach entry, check whether it must be saved
                 for i, entry in enumerate(entries):
+                    timer.start('dedup')
                     uid = self.make_uid(entry)
                     if not uid:
-                        logger.append_msg('Entry #%s: UID cannot be made.' % (i, ))
+                        context.append('Entry #%s: UID cannot be made.', i)
                     elif uid not in existing_entries_uid_hash:
+                        timer.start('insert')
                         try:
                             e_xml = etree.tostring(entry, encoding=unicode)
                             new_entry = self.entry_set.create(fetch_status=status, xml=e_xml, uid_hash=uid)  # Do not use bulk_create because the size of the requests can be too big and leads to an error!
-                            new_entries.append(new_entry)
+                            nb_new_entries += 1
+                            if delivery == 'lazy':
+                                new_entries.append(new_entry.pk)
+                            else:
+                                new_entries.append(new_entry)
                             existing_entries_uid_hash.append(uid)
                         except Exception as err:
-                            logger.append_msg('Entry #%s cannot be parsed.\n%s' % (i, err))
+                            context.append('Entry #%s cannot be parsed.\n%s', i, err)
+
+                        if delivery == 'chunks' and len(new_entries) >= settings.NOTIFY_CHUNK_SIZE:
+                            self._notify_new_entries(new_entries, batch, context)
+                            new_entries = []
+                    else:
+                        dedup_hits += 1
+                    entry.clear()  # Its parsed content is not needed anymore
+                timer.stop()
 
-                status.nb_new_entries = len(new_entries)
+                status.nb_new_entries = nb_new_entries
                 if new_entries:
-                    try:
-                        Subscription.notify(self, new_entries)
-                    except Exception as err:
-                        logger.append_msg('New entries cannot be notified to the subscribers.\n%s' % (err,))
+                    if delivery == 'lazy':
+                        new_entries = LazyEntries(new_entries, settings.NOTIFY_CHUNK_SIZE)
+                    self._notify_new_entries(new_entries, batch, context)
 
         if etag:
             self.etag = etag
-            self.save()
+        if etag or body_changed:
+            try:
+                # Not save: it would also normalize the URL of a Feed saved before the URLs were normalized
+                Feed.objects.filter(pk=self.pk).update(etag=self.etag, body_hash=self.body_hash)
+            except Exception as err:
+                context.append('The ETag and the body hash cannot be saved.\n%s', err)
+        if body_changed:
+            self._log_duplicates()
+
+        if status.permanent_redirect and status.permanent_redirect != self.url:
+            try:
+                self.move(status.permanent_redirect)
+            except Exception as err:
+                context.append('The permanent redirect to %s cannot be applied.\n%s', status.permanent_redirect, err)
 
         status.timestamp_end = timezone.now()
+        status.timings = timer.to_json()
 
         # Log
-        log_desc = '%s - Fetching' % (self.log_desc,)
-        error_msg = logger.flush_messages()
+        error_msg = context.flush()
         if error_msg:
-            # Store the file if it has been downloaded
+            # Store the body if it has been downloaded
             if data:
-                error_msg += '\n' + logger.store(data, self.url, status.timestamp_start)
+                try:
+                    status.payload, created = Payload.store(data)
+                    error_msg += '\n[Payload] => <%s> %s' % (status.payload.hash, created and 'stored' or 'already stored')
+                except Exception as err:
+                    error_msg += '\n[Payload] => Cannot store the payload.\n%s' % (err,)
             status.error_msg = error_msg
-            logger.error(log_desc + '\n' + error_msg)
+            logger.error('%s - Fetching\n%s', self.log_desc, error_msg)
         else:
             if status_code == 304:
-                logger.info('%s => 304 Feed not modified.' % (log_desc,))
+                logger.info('%s - Fetching => 304 Feed not modified.', self.log_desc)
             else:
-                delta = status.timestamp_end - status.timestamp_start
-                logger.info('%s => %s bytes fetched in %ss. %s new entries out of %s.' % (
-                    log_desc,
+                logger.info(
+                    '%s - Fetching => %s bytes fetched in %ss. %s new entries out of %s.',
+                    self.log_desc,
                     status.size_bytes,
-                    delta.total_seconds(),
+                    (status.timestamp_end - status.timestamp_start).total_seconds(),
                     status.nb_new_entries,
                     status.nb_entries
-                ))
+                )
 
         status.save()  # At the end to save all changes
+
+        if metrics.enabled:
+            metrics.incr('feedstorage_fetches_total', labels={'status_code': status_code or 'error'})
+            metrics.timing('feedstorage_fetch_duration_seconds', (status.timestamp_end - status.timestamp_start).total_seconds())
+            if status.size_bytes:
+                metrics.incr('feedstorage_downloaded_bytes_total', status.size_bytes)
+            if status.nb_entries:
+                metrics.incr('feedstorage_entries_parsed_total', status.nb_entries)
+            if status.nb_new_entries:
+                metrics.incr('feedstorage_entries_new_total', status.nb_new_entries)
+            if dedup_hits:
+                metrics.incr('feedstorage_dedup_hits_total', dedup_hits)
+            if status.nb_temporary_redirects:
+                metrics.incr('feedstorage_redirects_total', status.nb_temporary_redirects, labels={'type': 'temporary'})
+            if status.permanent_redirect:
+                metrics.incr('feedstorage_redirects_total', labels={'type': 'permanent'})
+
         return error_msg == ''  # Whether there was an error
 
+    def _notify_new_entries(self, new_entries, batch, context):
+        """Notifies the subscribers of this Feed and of its aliases of new entries.
+        The cached latest entry of this Feed is forgotten first so that the subscribers read the new entries."""
+        try:
+            Entry.invalidate_latest(self.pk)
+        except Exception as err:
+            context.append('The cached latest entry cannot be forgotten.\n%s', err)
+
+        context.timer.start('notify')
+        try:
+            Subscription.notify(self, new_entries, batch=batch)
+            for alias in self.aliases.all():
+                Subscription.notify(alias, new_entries, batch=batch)
+        except Exception as err:
+            context.append('New entries cannot be notified to the subscribers.\n%s', err)
+        context.timer.stop()
+
+    def _log_duplicates(self):
+        """Warns about the other Feeds, not aliased, whose last fetched body is the same as the one of this Feed."""
+        duplicates = Feed.objects.filter(alias_of__isnull=True, body_hash=self.body_hash).exclude(pk=self.pk)
+        for feed in duplicates.only('url'):
+            logger.warning('%s - Same content as %s: see feedstorage_coalesce_feeds', self.log_desc, feed.log_desc)
+
+    def move(self, url):
+        """Applies a permanent redirect: the Feed is fetched from its new URL from now on.
+
+        If another Feed already has this URL, the subscriptions and the aliases are moved to this other Feed
+        and this Feed is disabled, since the URL is unique. Its entries are kept.
+        It runs in a transaction of its own, or in a savepoint when the caller manages the transaction, which is not committed.
+
+        Args:
+            url: the new URL
+
+        Returns:
+            The Feed now fetched from the URL.
+        """
+        log_desc = '%s - Moving to %s' % (self.log_desc, url)
+
+        if transaction.is_managed():  # Part of the caller's transaction: only this move is rolled back on failure
+            sid = transaction.savepoint()
+            try:
+                feed = self._move(url)
+            except:
+                transaction.savepoint_rollback(sid)
+                raise
+            transaction.savepoint_commit(sid)
+        else:
+            with transaction.commit_on_success():
+                feed = self._move(url)
+
+        if feed is self:
+            logger.info('%s => [OK]', log_desc)
+        else:
+            logger.warning('%s => %s already exists: subscriptions moved and Feed disabled [OK]', log_desc, feed.log_desc)
+        return feed
+
+    def _move(self, url):
+        """Moves this Feed to a URL, or its subscriptions and aliases to the Feed having it. Returns the Feed now fetched from the URL."""
+        try:
+            other = Feed.objects.exclude(pk=self.pk).get(url=url)
+        except Feed.DoesNotExist:
+            self.url = url
+            self.save()
+            return self
+
+        existing_callbacks = set(other.subscription_set.values_list('callback', flat=True))
+        for sub in self.subscription_set.all():
+            if sub.callback not in existing_callbacks:
+                moved = Subscription.objects.create(feed=other, callback=sub.callback, dispatch_uid=sub.dispatch_uid)
+                moved.load()
+            sub.delete()  # Unloaded when deleted
+        self.aliases.update(alias_of=other)
+
+        self.enabled = False
+        Feed.objects.filter(pk=self.pk).update(enabled=False)  # Not save: it would normalize the URL of a Feed saved before the URLs were normalized
+        return other
+
     def _get_entries(self, xml):
         """Get all the entries."""
         parser = etree.XMLParser(strip_cdata=False)  # Do not replace CDATA sections by normal text content (on by default)
@@ -221,6 +513,105 @@ class Feed(models.Model):
         return None
 
 
+class Payload(models.Model):
+    """The body of a response which could not be fetched without error, stored once whatever the number of fetches returning it.
+
+    It is stored compressed with the file storage, under a name made of the hash of the body.
+    """
+    hash = models.CharField(max_length=40, unique=True)  # SHA-1 of the body
+    size_bytes = models.PositiveIntegerField()  # Before compression
+    stored_bytes = models.PositiveIntegerField(null=True, blank=True)  # Size of the compressed file, None until it is written
+    add_date = models.DateTimeField('date created', auto_now_add=True)
+    last_seen = models.DateTimeField(db_index=True)
+
+    def __unicode__(self):
+        return '%s' % (
+            self.hash,
+        )
+
+    @property
+    def name(self):
+        """The name of the compressed file in the storage."""
+        return 'payloads/%s/%s.gz' % (self.hash[:2], self.hash)
+
+    @classmethod
+    def store(cls, data):
+        """Gets the Payload of some data, creating it if needed.
+        The file is written with default_payload_writer, in a background thread by default.
+        It is written again if the Payload exists but its file does not, e.g. when the first write failed.
+
+        Returns:
+            A tuple (Payload, created)
+        """
+        now = timezone.now()
+        payload, created = cls.objects.get_or_create(
+            hash=hashlib.sha1(data).hexdigest(),
+            defaults={'size_bytes': len(data), 'last_seen': now}
+        )
+        if created:
+            default_payload_writer.write(payload.name, data, payload._saved)
+        else:
+            cls.objects.filter(pk=payload.pk).update(last_seen=now)
+            if not default_file_storage.exists(payload.name):
+                default_payload_writer.write(payload.name, data, payload._saved)  # Not written if it has been meanwhile
+        return payload, created
+
+    def _saved(self, size):
+        """Records the size of the compressed file once written, summed by prune."""
+        Payload.objects.filter(pk=self.pk).update(stored_bytes=size)
+
+    def read(self):
+        """Returns the body."""
+        f = default_file_storage.open(self.name, 'rb')
+        try:
+            return gunzip_data(f.read())
+        finally:
+            f.close()
+
+    @classmethod
+    def prune(cls, max_bytes=None):
+        """Deletes the least recently seen Payloads and their files so that the files take at most max_bytes.
+        The sizes of the files are summed from the stored_bytes column: the storage is only asked for the files
+        whose size is not known yet, written before it was recorded.
+
+        Args:
+            max_bytes: the maximum size of the files. Default: the PAYLOAD_RETENTION_BYTES setting, no limit if it is None
+
+        Returns:
+            The number of deleted Payloads.
+        """
+        if max_bytes is None:
+            max_bytes = settings.PAYLOAD_RETENTION_BYTES
+        if max_bytes is None:
+            return 0
+
+        for pk, hash in cls.objects.filter(stored_bytes__isnull=True).values_list('pk', 'hash'):
+            try:
+                cls.objects.filter(pk=pk).update(stored_bytes=default_file_storage.size(cls(hash=hash).name))
+            except (OSError, IOError, NotImplementedError):  # Not written yet or lost
+                pass
+
+        if (cls.objects.aggregate(total=Sum('stored_bytes'))['total'] or 0) <= max_bytes:
+            return 0
+
+        total = 0
+        to_delete = []
+        for pk, hash, stored_bytes in cls.objects.order_by('-last_seen').values_list('pk', 'hash', 'stored_bytes').iterator():
+            total += stored_bytes or 0
+            if total > max_bytes:
+                to_delete.append((pk, cls(hash=hash).name))
+
+        for chunk in chunked(to_delete, 500):
+            for pk, name in chunk:
+                try:
+                    default_file_storage.delete(name)
+                except (OSError, IOError, NotImplementedError):
+                    pass
+            cls.objects.filter(pk__in=[pk for pk, name in chunk]).delete()
+
+        return len(to_delete)
+
+
 class FetchStatus(models.Model):
     """A fetch status"""
     feed = models.ForeignKey(Feed)
@@ -231,6 +622,10 @@ class FetchStatus(models.Model):
     nb_entries = models.PositiveIntegerField(null=True, blank=True)
     nb_new_entries = models.PositiveIntegerField(null=True, blank=True)
     error_msg = models.TextField(null=True)
+    timings = models.TextField(null=True, blank=True)  # JSON object: phase => seconds
+    payload = models.ForeignKey(Payload, null=True, blank=True, on_delete=models.SET_NULL)  # The body if there was an error
+    permanent_redirect = models.URLField(null=True, blank=True)  # The URL the feed moved to
+    nb_temporary_redirects = models.PositiveSmallIntegerField(null=True, blank=True)
 
     class Meta:
         verbose_name_plural = 'Fetch statuses'
@@ -247,6 +642,12 @@ class FetchStatus(models.Model):
             self.feed,
         )
 
+    def get_timings(self):
+        """Returns the time spent in each phase of the fetching as a dict: phase => seconds."""
+        if not self.timings:
+            return {}
+        return json.loads(self.timings)
+
 
 class Entry(models.Model):
     """An entry"""
@@ -255,7 +656,7 @@ class Entry(models.Model):
     xml = models.TextField()
     uid_hash = models.CharField(max_length=32, db_index=True)
 
-    add_date = models.DateTimeField('date created', auto_now_add=True)  # auto_now_add gives error while loading fixtures
+    add_date = models.DateTimeField('date created', auto_now_add=True, db_index=True)  # auto_now_add gives error while loading fixtures
     edit_date = models.DateTimeField('date last modified', auto_now=True)
 
     class Meta:
@@ -273,6 +674,312 @@ class Entry(models.Model):
             self.feed,
         )
 
+    @classmethod
+    def cache(cls):
+        """Returns the Django cache set with the ENTRIES_CACHE setting."""
+        from django.core.cache import get_cache  # Imported here: importing it sets up the default cache
+        return get_cache(settings.ENTRIES_CACHE)
+
+    @classmethod
+    def latest_of_feeds(cls, feed_ids):
+        """Returns the pk and the add_date of the latest Entry of several Feeds.
+        They are kept in the cache until the Feed gets new entries: see invalidate_latest.
+
+        The cache key includes a version per Feed, incremented by invalidate_latest, so that a value read
+        from the database before an invalidation and cached after it is never read again.
+
+        Args:
+            feed_ids: a list of Feed pk
+
+        Returns:
+            A dict: feed_id => (pk, add_date), being (0, None) if the Feed has no entries.
+        """
+        cache = cls.cache()
+        versions = cls._latest_versions(cache, feed_ids)
+        keys = dict((LATEST_ENTRY_CACHE_KEY % (feed_id, versions[feed_id]), feed_id) for feed_id in feed_ids)
+        latest = dict((keys[key], value) for key, value in cache.get_many(keys.keys()).items())
+
+        missing = [feed_id for feed_id in feed_ids if feed_id not in latest]
+        for feed_id in missing:  # Uses the (feed_id, id) index
+            rows = list(cls.objects.filter(feed=feed_id).order_by('-pk').values_list('pk', 'add_date')[:1])
+            latest[feed_id] = rows and rows[0] or (0, None)
+        if missing:
+            cache.set_many(dict((LATEST_ENTRY_CACHE_KEY % (feed_id, versions[feed_id]), latest[feed_id]) for feed_id in missing), settings.ENTRIES_CACHE_TIMEOUT)
+
+        return latest
+
+    @classmethod
+    def _latest_versions(cls, cache, feed_ids):
+        """Returns the versions of the cached latest entry of several Feeds: feed_id => version.
+        A missing version starts from a random number, not to reuse the keys of an evicted one."""
+        keys = dict((LATEST_ENTRY_VERSION_KEY % (feed_id,), feed_id) for feed_id in feed_ids)
+        versions = dict((keys[key], value) for key, value in cache.get_many(keys.keys()).items())
+        for feed_id in feed_ids:
+            if feed_id not in versions:
+                key = LATEST_ENTRY_VERSION_KEY % (feed_id,)
+                cache.add(key, random.getrandbits(48), settings.ENTRIES_CACHE_TIMEOUT)
+                versions[feed_id] = cache.get(key, 0)  # Added by another process meanwhile
+        return versions
+
+    @classmethod
+    def invalidate_latest(cls, feed_id):
+        """Forgets the cached latest Entry of a Feed, after new entries have been stored, by incrementing its version."""
+        cache = cls.cache()
+        key = LATEST_ENTRY_VERSION_KEY % (feed_id,)
+        try:
+            cache.incr(key)
+        except ValueError:  # Not cached: a new version
+            cache.set(key, random.getrandbits(48), settings.ENTRIES_CACHE_TIMEOUT)
+
+
+class LazyEntries(object):
+    """New entries kept as their ids and read from the database by chunks when iterated,
+    so that they are never all in memory at the same time. Used when the NOTIFY_DELIVERY setting is 'lazy'."""
+
+    def __init__(self, ids, chunk_size=500):
+        """
+        Args:
+            ids: the list of the pk of the entries, in the order they are iterated
+            chunk_size: the maximum number of entries read with one query. Default: 500
+        """
+        self.ids = ids
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        """Iterates over the entries which still exist."""
+        for chunk in chunked(self.ids, self.chunk_size):
+            entries = Entry.objects.in_bulk(chunk)
+            for pk in chunk:
+                if pk in entries:
+                    yield entries[pk]
+
+
+class FetchJob(models.Model):
+    """A job fetching a collection of Feeds in the background and recording its progress.
+
+    A running job whose process has died is marked as failed once it has not made progress
+    for FETCH_JOBS_STALE_AFTER seconds, see fail_stale.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    feeds = models.ManyToManyField(Feed)
+    prefix_log = models.CharField(max_length=255)
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    nb_feeds = models.PositiveIntegerField(default=0)
+    nb_fetched = models.PositiveIntegerField(default=0)
+    nb_errors = models.PositiveIntegerField(default=0)
+    error_msg = models.TextField(null=True, blank=True)
+
+    add_date = models.DateTimeField('date created', auto_now_add=True)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    heartbeat_date = models.DateTimeField(null=True, blank=True)  # Last time a running job made progress
+
+    VISIBLE_TIMEOUT = 60  # Maximum number of seconds a thread waits for the job it runs to be committed
+
+    def __unicode__(self):
+        return '#%s %s' % (
+            self.pk,
+            self.prefix_log,
+        )
+
+    @property
+    def log_desc(self):
+        return '<FetchJob: %s>' % (self,)
+
+    @property
+    def finished(self):
+        return self.status in (self.DONE, self.FAILED)
+
+    def percent(self):
+        """Returns the percentage of fetched Feeds."""
+        if not self.nb_feeds:
+            return 100
+        return 100 * self.nb_fetched // self.nb_feeds
+
+    @classmethod
+    def queue(cls, feeds, prefix_log):
+        """Creates a job to fetch a collection of Feeds.
+        It is run right away in a thread if the FETCH_JOBS_IN_THREAD setting is True,
+        otherwise by the ``feedstorage_run_fetch_jobs`` management command.
+
+        The transaction of the caller is not committed here: the thread waits for the job to be committed
+        and gives up after VISIBLE_TIMEOUT seconds, e.g. if it has been rolled back.
+
+        Returns:
+            The FetchJob.
+        """
+        cls.fail_stale()
+        feed_ids = list(feeds.values_list('pk', flat=True))
+        job = cls.objects.create(prefix_log=prefix_log, nb_feeds=len(feed_ids))
+        job.feeds.add(*feed_ids)
+
+        if settings.FETCH_JOBS_IN_THREAD:
+            t = threading.Thread(target=job.run_in_thread)
+            t.daemon = True
+            t.start()
+
+        return job
+
+    @classmethod
+    def fail_stale(cls):
+        """Marks as failed the running jobs which have not made progress for FETCH_JOBS_STALE_AFTER seconds:
+        the process running them has most likely died.
+
+        Returns:
+            The number of jobs marked as failed.
+        """
+        stale_date = timezone.now() - timedelta(seconds=settings.FETCH_JOBS_STALE_AFTER)
+        nb = cls.objects.filter(status=cls.RUNNING, heartbeat_date__lt=stale_date).update(
+            status=cls.FAILED,
+            error_msg='No progress since %s: the process running the job has stopped.' % (stale_date,),
+            end_date=timezone.now()
+        )
+        if nb:
+            logger.error('[FetchJob] - %s running jobs without progress => Failed [KO]', nb)
+        return nb
+
+    @classmethod
+    def run_pending(cls):
+        """Runs the pending jobs one after the other.
+
+        Returns:
+            The number of jobs run.
+        """
+        cls.fail_stale()
+        nb = 0
+        for job in cls.objects.filter(status=cls.PENDING).order_by('pk'):
+            if job.run():
+                nb += 1
+        return nb
+
+    def run_in_thread(self):
+        """Runs the job once it is committed and closes the database connection of the thread."""
+        try:
+            deadline = time.time() + self.VISIBLE_TIMEOUT
+            while not FetchJob.objects.filter(pk=self.pk).exists():
+                transaction.rollback_unless_managed()  # Ends the read transaction to see the new commits
+                if time.time() > deadline:
+                    logger.error('%s - Running => The job has not been committed. [KO]', self.log_desc)
+                    return
+                time.sleep(0.1)
+            self.run()
+        finally:
+            connection.close()
+
+    def run(self):
+        """Runs the job if no one else has started it yet.
+
+        Returns:
+            A boolean saying whether it has been run.
+        """
+        # Claim the job
+        now = timezone.now()
+        if not FetchJob.objects.filter(pk=self.pk, status=self.PENDING).update(status=self.RUNNING, start_date=now, heartbeat_date=now):
+            return False
+
+        status, error_msg = self.DONE, None
+        try:
+            Feed.fetch_collection(self.feeds.all(), '%s %s' % (self.prefix_log, self.log_desc), progress=self.progress)
+        except Exception as err:
+            status, error_msg = self.FAILED, '%s' % (err,)
+            logger.error('%s - Running => [KO]\n%s', self.log_desc, err)
+
+        # Unless it has been marked as failed meanwhile
+        FetchJob.objects.filter(pk=self.pk, status=self.RUNNING).update(status=status, error_msg=error_msg, end_date=timezone.now())
+        return True
+
+    def progress(self, feed, ok):
+        """Records that a Feed has been fetched."""
+        FetchJob.objects.filter(pk=self.pk).update(
+            nb_fetched=F('nb_fetched') + 1,
+            nb_errors=F('nb_errors') + (not ok and 1 or 0),
+            heartbeat_date=timezone.now()
+        )
+
+
+class Consumer(models.Model):
+    """A consumer pulling the entries with a durable cursor.
+
+    The cursor is the pk of the last consumed Entry: the entries are read after it
+    in the order of their pk (keyset pagination) so that reading is as fast at the end as at the beginning.
+
+    The pks are not committed in order: an Entry can become visible after entries with a greater pk,
+    e.g. on PostgreSQL when its transaction commits later, and would be skipped by a cursor moved past it.
+    So the entries are only read up to the first one created less than PULL_LAG seconds ago.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    position = models.PositiveIntegerField(default=0)
+
+    add_date = models.DateTimeField('date created', auto_now_add=True)
+    edit_date = models.DateTimeField('date last modified', auto_now=True)
+
+    def __unicode__(self):
+        return '%s' % (
+            self.name,
+        )
+
+    def pull(self, limit=100, feeds=None):
+        """Gets the entries after the cursor. The cursor is not moved: see commit.
+
+        Args:
+            limit: the maximum number of entries
+            feeds: a collection of Feed (or a queryset) to read the entries of. Default: None, i.e. all the Feeds
+
+        Returns:
+            An iterator of Entry, ordered by pk.
+        """
+        entries = Entry.objects.filter(pk__gt=self.position)
+        # Uses the add_date index: only the entries of the last PULL_LAG seconds are read
+        recent = entries.filter(add_date__gt=timezone.now() - timedelta(seconds=settings.PULL_LAG)).aggregate(pk=Min('pk'))['pk']
+        if recent is not None:
+            entries = entries.filter(pk__lt=recent)
+        if feeds is not None:
+            entries = entries.filter(feed__in=feeds)
+        return entries.select_related('feed').order_by('pk')[:limit].iterator()
+
+    def commit(self, position):
+        """Moves the cursor forward.
+
+        Args:
+            position: the pk of the last consumed Entry
+        """
+        if position > self.position:
+            Consumer.objects.filter(pk=self.pk, position__lt=position).update(position=position)
+            self.position = position
+
+    def consume(self, batch_size=1000, feeds=None):
+        """Reads all the entries after the cursor, batch by batch, with a constant memory.
+        The cursor is committed when all the entries of a batch have been read.
+
+        Args:
+            batch_size: the number of entries read per query
+            feeds: a collection of Feed (or a queryset) to read the entries of. Default: None, i.e. all the Feeds
+
+        Returns:
+            A generator of Entry, ordered by pk.
+        """
+        while True:
+            last = None
+            for entry in self.pull(batch_size, feeds):
+                yield entry
+                last = entry.pk
+            if last is None:
+                return
+            self.commit(last)
+
 
 class Subscription(models.Model):
     """A subscription from a callback to a Feed."""
@@ -309,47 +1016,124 @@ class Subscription(models.Model):
 
     def save(self, *args, **kwargs):
         """Overrides the save method.
-        Converts the callback and ensures a dispatch_uid is used."""
+        Converts the callback and ensures a dispatch_uid is used.
+        When the feed, the callback or the dispatch_uid of an existing subscription is changed, the previous receiver is unloaded."""
         self.callback = self.prepare_callback(self.callback)
         self.dispatch_uid = self.prepare_dispatch_uid(self.dispatch_uid, self.callback)
 
+        previous = []
+        if self.pk is not None:
+            previous = list(Subscription.objects.filter(pk=self.pk).exclude(feed=self.feed_id, callback=self.callback, dispatch_uid=self.dispatch_uid))
+
         super(Subscription, self).save(*args, **kwargs)  # Call the "real" save() method.
 
+        for sub in previous:
+            sub.unload()
+            SubscriptionChange.record([sub], SubscriptionChange.UNLOAD)
+
     def load(self):
         """Loads the subscription, i.e. connects it to the signal so that the receiver will be notified."""
         try:
-            if signals.new_entries_connect(self.feed, deserialize_function(self.callback), self.dispatch_uid):
-                logger.info('%s - Loading => [OK]' % (self.log_desc,))
+            if signals.new_entries_connect(self.feed_id, deserialize_function(self.callback), self.dispatch_uid):
+                logger.info('%s - Loading => [OK]', self.log_desc)
         except Exception as e:
-            logger.error('%s - Loading => The receiver cannot be connected. [KO]\n%s' % (self.log_desc, e))
+            logger.error('%s - Loading => The receiver cannot be connected. [KO]\n%s', self.log_desc, e)
+
+    @classmethod
+    def load_feed(cls, feed):
+        """Loads all the subscriptions of a feed with one query."""
+        log_desc = '[Subscriptions] - Loading subscriptions of %s' % (feed.log_desc,)
+        try:
+            SubscriptionChange.start_sync()  # Before loading so that no later change can be missed
+            for s in cls.objects.filter(feed=feed).select_related('feed'):
+                s.load()
+        except Exception as err:
+            logger.error('%s => failed [KO]\n%s', log_desc, err)
+            raise
 
     def unload(self):
         """Unloads the subscription, i.e. disconnects it from the  signal."""
         try:
-            if signals.new_entries_disconnect(self.feed, deserialize_function(self.callback), self.dispatch_uid):
-                logger.info('%s - Unloading => [OK]' % (self.log_desc,))
+            if signals.new_entries_disconnect(self.feed_id, deserialize_function(self.callback), self.dispatch_uid):
+                logger.info('%s - Unloading => [OK]', self.log_desc)
         except Exception as e:
-            logger.error('%s - Unloading => The receiver cannot be disconnected. [KO]\n%s' % (self.log_desc, e))
+            logger.error('%s - Unloading => The receiver cannot be disconnected. [KO]\n%s', self.log_desc, e)
 
     @classmethod
-    def notify(cls, feed, new_entries):
-        """Notifies all the subscribers."""
+    def notify(cls, feed, new_entries, batch=None):
+        """Notifies all the subscribers.
+
+        Args:
+            feed: the Feed having new entries
+            new_entries: the list of new Entry
+            batch: a NotificationBatch to collect the new entries instead of notifying right away. Default: None
+        """
+        log_desc = 'New entries for %s' % (feed.log_desc,)
         try:
-            receivers_responses = signals.new_entries_send(feed, new_entries)
+            SubscriptionChange.sync()
+
+            if batch is not None:
+                latencies = []
+                receivers_responses = batch.add(feed, new_entries, latencies=latencies)
+                if receivers_responses:
+                    cls._log_responses('Batched new entries', receivers_responses, latencies)
+                return
+
+            latencies = []
+            receivers_responses = signals.new_entries_send(
+                feed,
+                new_entries,
+                workers=settings.NOTIFY_WORKERS,
+                timeout=settings.NOTIFY_TIMEOUT,
+                latencies=latencies
+            )
 
             # If there are no receivers, be quiet.
             if not receivers_responses:
-                logger.info('New entries for %s - No receivers to notify' % (feed.log_desc))
+                logger.info('%s - No receivers to notify', log_desc)
                 return
 
             # Otherwise check their response.
-            for receiver, response in receivers_responses:
-                if not response:
-                    logger.info('New entries for %s - Notifying receiver %s => [OK]' % (feed.log_desc, receiver))
-                else:
-                    logger.error('New entries for %s - Notifying receiver %s => [KO]\n%s' % (feed.log_desc, receiver, response))
+            cls._log_responses(log_desc, receivers_responses, latencies)
+        except Exception as e:
+            logger.error('%s - Notifying all subscribers => [KO]\n%s', log_desc, e)
+
+    @classmethod
+    def notify_batch(cls, batch):
+        """Delivers the new entries collected in a NotificationBatch."""
+        log_desc = 'Batched new entries'
+        try:
+            latencies = []
+            receivers_responses = batch.flush(latencies)
+            cls._log_responses(log_desc, receivers_responses, latencies)
         except Exception as e:
-            logger.error('New entries for %s - Notifying all subscribers => [KO]\n%s' % (feed.log_desc, e))
+            logger.error('%s - Notifying all subscribers => [KO]\n%s', log_desc, e)
+
+    @classmethod
+    def _log_responses(cls, log_desc, receivers_responses, latencies=None):
+        """Logs the responses of the notified receivers and how long each one took if known."""
+        for i, (receiver, response) in enumerate(receivers_responses):
+            took = ''
+            if latencies:
+                took = ' in %.3fs' % (latencies[i],)
+            if not response:
+                logger.info('%s - Notifying receiver %s%s => [OK]', log_desc, receiver, took)
+            else:
+                logger.error('%s - Notifying receiver %s%s => [KO]\n%s', log_desc, receiver, took, response)
+
+            if metrics.enabled:
+                labels = {'receiver': cls._receiver_name(receiver)}
+                metrics.incr('feedstorage_notifications_total', labels=dict(labels, result=response and 'error' or 'ok'))
+                if latencies:
+                    metrics.timing('feedstorage_notification_latency_seconds', latencies[i], labels=labels)
+
+    @classmethod
+    def _receiver_name(cls, receiver):
+        """Returns the name of a receiver to use as a metrics label."""
+        try:
+            return serialize_function(receiver)
+        except Exception:
+            return '%s' % (receiver,)
 
     @classmethod
     def prepare_callback(cls, callback):
@@ -377,6 +1161,151 @@ class Subscription(models.Model):
         return dispatch_uid
 
 
+class SubscriptionChange(models.Model):
+    """A change of the subscriptions, used to synchronize the loaded subscriptions between processes.
+    The pk is the version of the subscriptions.
+
+    The pks are not committed in order: a change can become visible after changes with a greater pk,
+    e.g. on PostgreSQL when its transaction commits later. So the changes of the last SYNC_WINDOW seconds
+    are read again at each synchronization and the ones already seen are skipped.
+    """
+    LOAD = 'load'
+    UNLOAD = 'unload'
+    ACTION_CHOICES = (
+        (LOAD, 'Load'),
+        (UNLOAD, 'Unload'),
+    )
+
+    feed_pk = models.IntegerField()  # Not a ForeignKey: the change must be kept when the Feed is deleted
+    callback = models.TextField()
+    dispatch_uid = models.CharField(max_length=255)
+    action = models.CharField(max_length=6, choices=ACTION_CHOICES)
+    add_date = models.DateTimeField('date created', auto_now_add=True, db_index=True)
+
+    # Synchronization state of this process
+    version = None  # greatest pk of the seen changes
+    last_check = 0  # time of the last check
+    seen = {}  # pk => add_date of the changes of the window already seen
+    last_seen = {}  # (feed_pk, callback, dispatch_uid) => pk of the last change seen for this subscription
+    sync_lock = threading.Lock()
+
+    def __unicode__(self):
+        return '#%s %s <Feed: %s> <%s>' % (self.pk, self.action, self.feed_pk, self.callback)
+
+    @classmethod
+    def record(cls, subscriptions, action):
+        """Records that subscriptions have been loaded or unloaded.
+
+        Args:
+            subscriptions: a list of Subscription
+            action: LOAD or UNLOAD
+        """
+        cls.objects.bulk_create([
+            cls(feed_pk=s.feed_id, callback=s.callback, dispatch_uid=s.dispatch_uid, action=action)
+            for s in subscriptions
+        ])
+
+    @classmethod
+    def latest_version(cls):
+        """Returns the pk of the last change, 0 if there is none. Uses the pk index only."""
+        latest = list(cls.objects.order_by('-pk').values_list('pk', flat=True)[:1])
+        return latest and latest[0] or 0
+
+    @classmethod
+    def start_sync(cls):
+        """Starts the synchronization of this process at the current version if it has not been started yet.
+        The changes made so far are seen but not applied since the subscriptions loaded afterwards include them."""
+        if cls.version is None:
+            cls.version = cls.latest_version()
+            cls.last_check = time.time()
+            cls.seen = {}
+            cls.last_seen = {}
+            for change in cls._recent_changes():
+                cls._see(change)
+
+    @classmethod
+    def _recent_changes(cls):
+        """Returns the changes made after the version or during the last SYNC_WINDOW seconds, ordered by pk."""
+        window_start = timezone.now() - timedelta(seconds=settings.SYNC_WINDOW)
+        return cls.objects.filter(Q(pk__gt=cls.version) | Q(add_date__gte=window_start)).order_by('pk')
+
+    @classmethod
+    def _see(cls, change):
+        """Marks a change as seen.
+
+        Returns:
+            A boolean saying whether it must be applied: False if it has already been seen or if a later change of the same subscription has.
+        """
+        if change.pk in cls.seen:
+            return False
+        cls.seen[change.pk] = change.add_date
+        cls.version = max(cls.version, change.pk)
+
+        key = (change.feed_pk, change.callback, change.dispatch_uid)
+        if cls.last_seen.get(key, 0) > change.pk:
+            return False
+        cls.last_seen[key] = change.pk
+        return True
+
+    @classmethod
+    def sync(cls, force=False):
+        """Applies the changes made since the last synchronization, possibly by other processes,
+        to the feeds whose subscriptions are loaded in this process.
+        The other feeds will load their current subscriptions when needed.
+
+        Args:
+            force: whether to check for changes even if the last check is less than SYNC_INTERVAL seconds old. Default: False
+        """
+        if cls.version is None:
+            return
+        if not force and time.time() - cls.last_check < settings.SYNC_INTERVAL:
+            return
+        if not cls.sync_lock.acquire(False):  # Another thread is synchronizing
+            return
+
+        try:
+            cls.last_check = time.time()
+            for change in cls._recent_changes():
+                if cls._see(change) and change.feed_pk in signals.LOADED_FEEDS:
+                    change.apply()
+
+            # Forget the changes which cannot be read again
+            window_start = timezone.now() - timedelta(seconds=settings.SYNC_WINDOW)
+            for pk, add_date in cls.seen.items():
+                if add_date < window_start:
+                    del cls.seen[pk]
+        except Exception as e:
+            logger.error('[Subscriptions] - Synchronizing => failed [KO]\n%s', e)
+        finally:
+            cls.sync_lock.release()
+
+    def apply(self):
+        """Connects or disconnects the receiver of the subscription."""
+        try:
+            callback = deserialize_function(self.callback)
+            if self.action == self.LOAD:
+                done = signals.new_entries_connect(self.feed_pk, callback, self.dispatch_uid)
+            else:
+                done = signals.new_entries_disconnect(self.feed_pk, callback, self.dispatch_uid)
+            if done:
+                logger.info('<SubscriptionChange: %s> - Applying => [OK]', self)
+        except Exception as e:
+            logger.error('<SubscriptionChange: %s> - Applying => [KO]\n%s', self, e)
+
+    @classmethod
+    def prune(cls, days=None):
+        """Deletes the changes older than a number of days. Default: the SYNC_RETENTION setting"""
+        if days is None:
+            days = settings.SYNC_RETENTION
+        cls.objects.filter(add_date__lt=timezone.now() - timedelta(days=days)).delete()
+
+
+# Record the subscription changes for the other processes.
+@receiver(post_save, sender=Subscription)
+def subscription_saved(sender, **kwargs):
+    SubscriptionChange.record([kwargs.get('instance')], SubscriptionChange.LOAD)
+
+
 # Unload the subscription when being deleted.
 # To ensure customized delete logic gets executed, you can use pre_delete and/or post_delete signals instead of overriding the delete method.
 # See note in Django doc: Note that the delete() method for an object is not necessarily called when deleting objects in bulk using a QuerySet.
@@ -384,14 +1313,18 @@ class Subscription(models.Model):
 def subscription_deleted(sender, **kwargs):
     instance = kwargs.get('instance')
     instance.unload()
+    SubscriptionChange.record([instance], SubscriptionChange.UNLOAD)
+
 
-# Load the existing subscriptions when starting.
-# You must ignore the errors when syncdb is used for the first time: this is normal because the DB is not created yet
-try:
-    logger.info('[Subscriptions] - Loading existing subscriptions => init')
-    for s in Subscription.objects.all():
-        s.load()
-    logger.info('[Subscriptions] - Loading existing subscriptions => ready')
+# Forget the cached latest entry of the Feed when an entry is deleted, also when its Feed or its FetchStatus is,
+# otherwise the entries view keeps answering 304 with the ETag of the deleted entry.
+@receiver(post_delete, sender=Entry)
+def entry_deleted(sender, **kwargs):
+    instance = kwargs.get('instance')
+    try:
+        Entry.invalidate_latest(instance.feed_id)
+    except Exception as err:
+        logger.error('Deleted entry of Feed #%s - Forgetting the cached latest entry => [KO]\n%s', instance.feed_id, err)
 
-except DatabaseError as err:
-    logger.error('[Subscriptions] - Loading existing subscriptions => failed [KO]\n%s' % (err,))
+# Load the existing subscriptions of a feed the first time its new entries are sent, not when starting.
+signals.set_subscriptions_loader(Subscription.load_feed)
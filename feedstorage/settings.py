@@ -1,12 +1,19 @@
 # Python stdlib
 import os.path
+import sys
 import logging
 
 # Django
 from django.conf import settings as django_settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.functional import LazyObject
 
 # Internal
-from .utils import PROJECT_ROOT
+from .utils import get_project_root, DeprecatedNamesModule
+
+
+# The values of the NOTIFY_DELIVERY setting
+NOTIFY_DELIVERIES = ('list', 'chunks', 'lazy')
 
 
 DEFAULT_SETTINGS = {
@@ -15,25 +22,116 @@ DEFAULT_SETTINGS = {
     # Storage used to save the retrieved feed as a file if an error occurs while fetching.
     'FILE_STORAGE': 'django.core.files.storage.FileSystemStorage',
     # Dict of arguments to pass to the Storage
-    'FILE_STORAGE_ARGS': {
-        # Absolute file system path to the directory that will hold downloaded feed files when an error occurs.
-        'location': os.path.join(PROJECT_ROOT, 'logs/feedstorage_files/'),
-    },
+    # None: the location, i.e. the absolute file system path to the directory that will hold downloaded feed files when an error occurs,
+    # is the logs/feedstorage_files/ folder in the outer directory of the project.
+    'FILE_STORAGE_ARGS': None,
+    # Whether the payloads of the failed fetches are compressed and saved in a background thread.
+    'STORE_PAYLOADS_IN_THREAD': True,
+    # Maximum total size in bytes of the stored payloads, once compressed. The least recently seen ones are deleted first. None: no limit.
+    'PAYLOAD_RETENTION_BYTES': 500 * 2 ** 20,  # 500 MB
 
     # Logging settings
     'LOGGER_NAME': 'feedstorage',
     'LOGGER_FORMAT': '%(asctime)s %(levelname)s %(message)s',
-    'LOG_FILE': os.path.join(PROJECT_ROOT, 'logs/feedstorage.log'),
+    # None: the logs/feedstorage.log file in the outer directory of the project.
+    'LOG_FILE': None,
     # Maximum size of one log file: when the size is reached, the file is archived and a new file is created.
     'LOG_SIZE': 5 * 1024 * 2 ** 10,  # 5 MB
     'LOG_LEVEL': logging.INFO,
+    # Size of the queue of log records written by a background thread. None: the records are written by the logging thread.
+    'LOG_QUEUE_SIZE': None,
+    # What to do when the queue is full: 'drop' the new record, 'drop_oldest' record or 'block' until there is room.
+    'LOG_QUEUE_OVERFLOW': 'drop',
+
+    # Metrics settings
+    # Class of the sink receiving the metrics of the fetching. None: metrics disabled.
+    # 'feedstorage.utils.metrics.MemorySink' exposes them in the Prometheus text format with the metrics view.
+    'METRICS_SINK': None,
+    # Dict of arguments to pass to the sink
+    'METRICS_SINK_ARGS': {},
+    # IP addresses allowed to read the metrics view without logging in as a staff member, e.g. the one of the Prometheus server.
+    'METRICS_ALLOWED_IPS': (),
 
     # Use HTTP Compression to download data
     'USE_HTTP_COMPRESSION': True,
+
+    # Whether the fetch jobs queued from the admin are run in a thread of the web process.
+    # Otherwise, they are run by the ``feedstorage_run_fetch_jobs`` management command.
+    'FETCH_JOBS_IN_THREAD': True,
+    # Number of seconds without progress after which a running fetch job is marked as failed, its process having most likely died.
+    'FETCH_JOBS_STALE_AFTER': 900,
+
+    # Notification settings
+    # Maximum number of receivers notified at the same time. 1: one after the other.
+    'NOTIFY_WORKERS': 1,
+    # Maximum number of seconds to wait for each receiver when they are notified concurrently. None: no timeout.
+    'NOTIFY_TIMEOUT': None,
+    # How the new entries of a fetch are passed to the receivers: 'list' of all of them once stored,
+    # 'chunks' of at most NOTIFY_CHUNK_SIZE entries as soon as they are stored, or 'lazy' iterable reading them from their ids.
+    'NOTIFY_DELIVERY': 'list',
+    # Maximum number of entries in a chunk, or read at a time by a lazy iterable.
+    'NOTIFY_CHUNK_SIZE': 500,
+    # Whether the receivers are notified once per fetching run with the new entries of all their feeds instead of once per feed.
+    'BATCH_NOTIFICATIONS': False,
+    # Number of seconds after which the batched new entries are delivered without waiting for the end of the run. None: at the end of the run only.
+    'BATCH_WINDOW': None,
+    # Whether the batched new entries are also delivered as one merged Atom document.
+    'BATCH_MERGED_XML': False,
+
+    # Entries view
+    # Maximum and default number of most recent entries rendered by the entries view.
+    'ENTRIES_VIEW_LIMIT': 50,
+    # Alias of the Django cache keeping the rendered entries and the latest entry of each feed.
+    # Use a cache shared by the processes, e.g. memcached, when the feeds are fetched by another process than the web one.
+    'ENTRIES_CACHE': 'default',
+    # Number of seconds the rendered entries and the latest entry of each feed are cached.
+    'ENTRIES_CACHE_TIMEOUT': 3600,
+
+    # Pulling the entries
+    # Number of seconds before a new entry can be pulled, for the entries committed after entries with a greater pk.
+    'PULL_LAG': 60,
+
+    # Synchronization of the subscriptions between processes
+    # Minimum number of seconds between two checks for subscription changes made by other processes.
+    'SYNC_INTERVAL': 5,
+    # Number of days the subscription changes are kept.
+    'SYNC_RETENTION': 7,
+    # Number of seconds the subscription changes are read again, for the ones committed after changes with a greater pk.
+    'SYNC_WINDOW': 60,
 }
 
-# Get the user settings to update the default settings.
-user_settings = getattr(django_settings, 'FEED_STORAGE_SETTINGS', {})
-FEED_STORAGE_SETTINGS = dict(DEFAULT_SETTINGS.items() + user_settings.items())
 
-globals().update(FEED_STORAGE_SETTINGS)
+class FeedStorageSettings(object):
+    """The settings of the application: the default settings updated with the user settings."""
+
+    def __init__(self, user_settings):
+        self.__dict__.update(DEFAULT_SETTINGS)
+        self.__dict__.update(user_settings)
+
+        if self.FILE_STORAGE_ARGS is None:
+            self.FILE_STORAGE_ARGS = {'location': os.path.join(get_project_root(), 'logs/feedstorage_files/')}
+        if self.LOG_FILE is None:
+            self.LOG_FILE = os.path.join(get_project_root(), 'logs/feedstorage.log')
+        if self.NOTIFY_DELIVERY not in NOTIFY_DELIVERIES:
+            raise ImproperlyConfigured('The NOTIFY_DELIVERY setting must be one of %s.' % (', '.join(NOTIFY_DELIVERIES),))
+
+
+class LazySettings(LazyObject):
+    """Resolves the settings on first access, from the FEED_STORAGE_SETTINGS dict of the Django settings."""
+    def _setup(self):
+        self._wrapped = FeedStorageSettings(getattr(django_settings, 'FEED_STORAGE_SETTINGS', {}))
+
+settings = LazySettings()
+
+
+def _resolve_deprecated(name):
+    """The settings were module-level names, e.g. ``from feedstorage.settings import LOG_FILE``: use ``settings.LOG_FILE`` instead."""
+    if name == 'FEED_STORAGE_SETTINGS':
+        return dict((key, getattr(settings, key)) for key in dir(settings) if key.isupper())
+    if name == 'user_settings':
+        return getattr(django_settings, 'FEED_STORAGE_SETTINGS', {})
+    if name.isupper():
+        return getattr(settings, name)
+    raise AttributeError(name)
+
+sys.modules[__name__] = DeprecatedNamesModule(sys.modules[__name__], _resolve_deprecated)
@@ -1,85 +1,281 @@
 # Python stdlib
+import time
 import threading
 
 # Django
-import django.dispatch
+from django.dispatch.dispatcher import _make_id
+
+# Internal
+from .utils.feeds import merge_entries
+from .utils.pool import call_all
 
 SENDER = 'feedstorage'
-FEED_NEW_ENTRIES_SIGNALS = {}  # Store all the new entries signals: 1 new entries signal per feed
-LOCK = threading.Lock()  # Used to control the access to the FEED_NEW_ENTRIES_SIGNALS dict
+LOADED_FEEDS = set()  # The pk of the feeds whose subscriptions have been loaded
+LOAD_LOCK = threading.Lock()  # Used to load the subscriptions of a feed only once
+SUBSCRIPTIONS_LOADER = None  # Callable loading all the subscriptions of a feed, see set_subscriptions_loader
 
 
-from django.dispatch.dispatcher import _make_id
+def make_lookup_key(receiver, dispatch_uid):
+    """Code adapted from Django code to make the key identifying a receiver."""
+    if dispatch_uid:
+        return dispatch_uid
+    return _make_id(receiver)
 
 
-def receiver_exist(receiver, signal, dispatch_uid):
-    """Code adapted from Django code to test whether a receiver already exists."""
-    if dispatch_uid:
-        lookup_key = (dispatch_uid, _make_id(None))  # _make_id(sender) not use of sender
-    else:
-        lookup_key = (_make_id(receiver), _make_id(None))
+class ReceiverRegistry(object):
+    """Stores the receivers of the new entries: a list of receivers per feed.
 
-    signal.lock.acquire()
-    try:
-        for r_key, _ in signal.receivers:
-            if r_key == lookup_key:
-                return True
-    finally:
-        signal.lock.release()
+    Each feed has an immutable snapshot (index, connections, receivers) where index is the set of the lookup keys
+    for O(1) membership tests, connections is a tuple of (lookup key, receiver) pairs in connection order
+    and receivers is the tuple of the receivers in the same order.
+    Connecting or disconnecting replaces the snapshot of the feed under the lock of this feed (copy-on-write)
+    so that reading the receivers never locks.
+
+    Unlike the Django signals, the receivers are strongly referenced: they are module functions or class methods
+    deserialized from the subscriptions, which live as long as the process anyway, and are only removed by disconnect.
+    """
+    EMPTY = (frozenset(), (), ())
+
+    def __init__(self):
+        self._snapshots = {}  # feed pk => (index, connections, receivers)
+        self._locks = {}  # feed pk => Lock used by the writers
+
+    def _lock(self, key):
+        """Returns the writers lock of a feed."""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks.setdefault(key, threading.Lock())  # setdefault is atomic
+        return lock
+
+    def receivers(self, key):
+        """Returns the tuple of the receivers of a feed."""
+        return self._snapshots.get(key, self.EMPTY)[2]
 
-    return False
+    def contains(self, key, receiver, dispatch_uid):
+        """Tests whether a receiver is connected to a feed."""
+        return make_lookup_key(receiver, dispatch_uid) in self._snapshots.get(key, self.EMPTY)[0]
 
+    def connect(self, key, receiver, dispatch_uid):
+        """Connects a receiver to a feed only if it is not connected already.
 
-def make_new_entries_signal():
-    """Factory to create a new entries signal."""
-    return django.dispatch.Signal(providing_args=['feed_url', 'new_entries'])
+        Returns:
+            A boolean saying if it has been newly connected.
+        """
+        lookup_key = make_lookup_key(receiver, dispatch_uid)
+        lock = self._lock(key)
+        lock.acquire()
+        try:
+            index, connections, receivers = self._snapshots.get(key, self.EMPTY)
+            if lookup_key in index:
+                return False
 
+            self._snapshots[key] = (index | set([lookup_key]), connections + ((lookup_key, receiver),), receivers + (receiver,))
+            return True
+        finally:
+            lock.release()
+
+    def disconnect(self, key, receiver, dispatch_uid):
+        """Disconnects a receiver from a feed only if it is already connected.
 
-def new_entries_connect(feed, callback, dispatch_uid):
+        Returns:
+            A boolean saying if it was connected and has been disconnected.
+        """
+        lookup_key = make_lookup_key(receiver, dispatch_uid)
+        lock = self._lock(key)
+        lock.acquire()
+        try:
+            index, connections, receivers = self._snapshots.get(key, self.EMPTY)
+            if not lookup_key in index:
+                return False
+
+            connections = tuple((k, r) for k, r in connections if k != lookup_key)
+            self._snapshots[key] = (index - set([lookup_key]), connections, tuple(r for _, r in connections))
+            return True
+        finally:
+            lock.release()
+
+
+REGISTRY = ReceiverRegistry()  # The receivers of the new entries of all the feeds
+
+
+def receiver_exist(receiver, feed_id, dispatch_uid):
+    """Tests whether a receiver is already connected to a feed."""
+    return REGISTRY.contains(feed_id, receiver, dispatch_uid)
+
+
+def new_entries_connect(feed_id, callback, dispatch_uid):
     """Connects a callback to a feed only if it is not connected already.
 
+    Args:
+        feed_id: the pk of the feed
+
     Returns:
         A boolen saying if it has been newly connected.
     """
-    LOCK.acquire()
-    try:
-        if not feed.pk in FEED_NEW_ENTRIES_SIGNALS:
-            FEED_NEW_ENTRIES_SIGNALS[feed.pk] = make_new_entries_signal()
-
-        if not receiver_exist(callback, FEED_NEW_ENTRIES_SIGNALS[feed.pk], dispatch_uid):
-            FEED_NEW_ENTRIES_SIGNALS[feed.pk].connect(callback, dispatch_uid=dispatch_uid)
-            return True
-    finally:
-        LOCK.release()
-
-    return False
+    return REGISTRY.connect(feed_id, callback, dispatch_uid)
 
 
-def new_entries_disconnect(feed, callback, dispatch_uid):
+def new_entries_disconnect(feed_id, callback, dispatch_uid):
     """Disconnects a callback to a feed only if it is already connected.
 
+    Args:
+        feed_id: the pk of the feed
+
     Returns:
         A boolen saying if it was connected and has been disconnected.
     """
-    LOCK.acquire()
-    try:
-        if feed.pk in FEED_NEW_ENTRIES_SIGNALS and receiver_exist(callback, FEED_NEW_ENTRIES_SIGNALS[feed.pk], dispatch_uid):
-            FEED_NEW_ENTRIES_SIGNALS[feed.pk].disconnect(callback, dispatch_uid=dispatch_uid)
-            return True
-    finally:
-        LOCK.release()
+    return REGISTRY.disconnect(feed_id, callback, dispatch_uid)
 
-    return False
 
+def new_entries_send(feed, new_entries, workers=1, timeout=None, latencies=None):
+    """Sends notifications to the receivers of the new entries of a feed.
 
-def new_entries_send(feed, new_entries):
-    """Sends notifications to the receivers of the new entries signals.
+    Like the send_robust method of the Django signals, ensures all receivers are notified,
+    but the receivers can also be called concurrently. The signal argument is always None.
 
-    Uses send_robust to ensure all receivers are notified of the signal.
+    Args:
+        feed: the Feed having new entries
+        new_entries: the list of new Entry
+        workers: the maximum number of receivers called at the same time. Default: 1, i.e. one after the other
+        timeout: the maximum number of seconds to wait for each receiver when they are called concurrently. Default: None
+        latencies: a list to fill with the time elapsed in seconds by each receiver, in the same order as the returned list. Default: None
 
     Returns:
         A list of tuple pairs [(receiver, response), ... ], representing the list of called receiver functions and their response values.
         See the Django documentation about signals for further information.
     """
-    if feed.pk in FEED_NEW_ENTRIES_SIGNALS:
-        return FEED_NEW_ENTRIES_SIGNALS[feed.pk].send_robust(sender=SENDER, feed_url=feed.url, new_entries=new_entries)
+    receivers = new_entries_receivers(feed)
+    named = {'signal': None, 'sender': SENDER, 'feed_url': feed.url, 'new_entries': new_entries}
+
+    results = call_all([(receiver, (), named) for receiver in receivers], workers=workers, timeout=timeout)
+
+    if latencies is not None:
+        latencies.extend(latency for _, latency in results)
+    return [(receiver, response) for receiver, (response, _) in zip(receivers, results)]
+
+
+def set_subscriptions_loader(loader):
+    """Sets the callable used to load all the subscriptions of a feed the first time its receivers are needed.
+
+    Args:
+        loader: a callable taking a feed and connecting all its subscriptions
+    """
+    global SUBSCRIPTIONS_LOADER
+    SUBSCRIPTIONS_LOADER = loader
+
+
+def load_subscriptions(feed):
+    """Loads the subscriptions of a feed if it has not been done yet."""
+    if feed.pk in LOADED_FEEDS or SUBSCRIPTIONS_LOADER is None:
+        return
+
+    LOAD_LOCK.acquire()
+    try:
+        if not feed.pk in LOADED_FEEDS:
+            SUBSCRIPTIONS_LOADER(feed)
+            LOADED_FEEDS.add(feed.pk)
+    finally:
+        LOAD_LOCK.release()
+
+
+def new_entries_receivers(feed):
+    """Returns the receivers connected to the new entries of a feed.
+    The subscriptions of the feed are loaded first if needed."""
+    load_subscriptions(feed)
+    return REGISTRY.receivers(feed.pk)
+
+
+class NotificationBatch(object):
+    """Collects the new entries of several feeds so that each receiver is notified only once.
+
+    The receivers are called with the same arguments as the new entries signals except that:
+        - feed_url is None
+        - new_entries contains the new entries of all the feeds the receiver is connected to
+        - new_entries_by_feed is a dict: {feed_url: new_entries}
+        - merged_xml is the new entries merged in one Atom document (only if merged is True)
+    """
+
+    def __init__(self, window=None, merged=False, workers=1, timeout=None):
+        """
+        Args:
+            window: the number of seconds after which the collected entries are delivered when adding new ones. Default: None, i.e. only when flush is called
+            merged: whether the new entries are also delivered as one merged Atom document. Default: False
+            workers: the maximum number of receivers called at the same time. Default: 1, i.e. one after the other
+            timeout: the maximum number of seconds to wait for each receiver when they are called concurrently. Default: None
+        """
+        self.window = window
+        self.merged = merged
+        self.workers = workers
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.pending = {}  # receiver => [(feed, new_entries), ...]
+
+    def add(self, feed, new_entries, latencies=None):
+        """Adds the new entries of a feed for all its receivers.
+
+        Args:
+            feed: the Feed having new entries
+            new_entries: the list of new Entry
+            latencies: a list to fill with the time elapsed in seconds by each receiver if the batch is flushed. Default: None
+
+        Returns:
+            The list of tuple pairs [(receiver, response), ... ] if the window has been reached and the batch flushed, an empty list otherwise.
+        """
+        receivers = new_entries_receivers(feed)
+
+        self.lock.acquire()
+        try:
+            for receiver in receivers:
+                self.pending.setdefault(receiver, []).append((feed, new_entries))
+        finally:
+            self.lock.release()
+
+        if self.window is not None and time.time() - self.started >= self.window:
+            return self.flush(latencies)
+        return []
+
+    def flush(self, latencies=None):
+        """Notifies each receiver once with all the new entries collected for it,
+        concurrently like new_entries_send if the batch has several workers.
+
+        Args:
+            latencies: a list to fill with the time elapsed in seconds by each receiver, in the same order as the returned list. Default: None
+
+        Returns:
+            A list of tuple pairs [(receiver, response), ... ] like send_robust.
+        """
+        self.lock.acquire()
+        try:
+            pending, self.pending = self.pending, {}
+            started, self.started = self.started, time.time()
+        finally:
+            self.lock.release()
+
+        receivers = list(pending.keys())
+        results = call_all([(self._deliver, (receiver, pending[receiver], started), {}) for receiver in receivers], workers=self.workers, timeout=self.timeout)
+
+        if latencies is not None:
+            latencies.extend(latency for _, latency in results)
+        return [(receiver, response) for receiver, (response, _) in zip(receivers, results)]
+
+    def _deliver(self, receiver, items, started):
+        """Calls a receiver with the new entries collected for it since started, the start time of the window."""
+        new_entries = []
+        new_entries_by_feed = {}
+        for feed, entries in items:
+            new_entries.extend(entries)
+            new_entries_by_feed.setdefault(feed.url, []).extend(entries)
+
+        kwargs = {
+            'feed_url': None,
+            'new_entries': new_entries,
+            'new_entries_by_feed': new_entries_by_feed,
+        }
+        if self.merged:
+            kwargs['merged_xml'] = merge_entries(
+                (e.xml for e in new_entries),
+                title='New entries',
+                feed_id='urn:feedstorage:batch:%s' % (int(started),)
+            )
+        return receiver(signal=None, sender=SENDER, **kwargs)
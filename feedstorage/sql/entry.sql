@@ -0,0 +1,4 @@
+-- Keyset pagination of the entries of some feeds, see Consumer.pull
+CREATE INDEX feedstorage_entry_feed_id_id ON feedstorage_entry (feed_id, id);
+-- Most recent entries of a feed, see EntryQuerySet.recent
+CREATE INDEX feedstorage_entry_feed_id_add_date ON feedstorage_entry (feed_id, add_date);
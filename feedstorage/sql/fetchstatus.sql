@@ -0,0 +1,2 @@
+-- Last fetch status of each feed, see FetchStatusQuerySet.last_per_feed
+CREATE INDEX feedstorage_fetchstatus_feed_id_id ON feedstorage_fetchstatus (feed_id, id);
@@ -1,3 +1,20 @@
+from .admin import *
+from .hub import *
+from .imports import *
+from .management import *
+from .managers import *
+from .models import *
+from .signals import *
+from .views import *
+from .utils.feeds import *
 from .utils.http import *
+from .utils.iterators import *
 from .utils.loggers import *
+from .utils.metrics import *
+from .utils.opml import *
+from .utils.pool import *
+from .utils.profiling import *
 from .utils.serializers import *
+from .utils.timer import *
+from .utils.urls import *
+from .utils.writers import *
@@ -0,0 +1,86 @@
+# Django
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+
+# Internal
+from ..models import Feed, Entry
+from .models import create_entries
+
+
+class AdminTestCase(TestCase):
+    urls = 'feedstorage.tests.urls'
+
+    def setUp(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+
+    def count_queries(self, path):
+        """Returns the response of a GET and the number of queries it made."""
+        debug = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            response = self.client.get(path)
+            return response, len(connection.queries)  # Reset when the request starts
+        finally:
+            connection.use_debug_cursor = debug
+
+
+class FeedAdminKnownValues(AdminTestCase):
+
+    def test_nb_entries(self):
+        feed = Feed.objects.create(url='http://example.com/1')
+        create_entries(feed, 3)
+        Feed.objects.create(url='http://example.com/2')
+
+        response = self.client.get('/admin/feedstorage/feed/')
+        counts = dict((f.url, f.nb_entries_count) for f in response.context['cl'].result_list)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'http://example.com/1': 3, 'http://example.com/2': 0}, counts)
+
+    def test_queries_per_page(self):
+        create_entries(Feed.objects.create(url='http://example.com/1'), 1)
+        _, nb_queries = self.count_queries('/admin/feedstorage/feed/')
+
+        for i in range(2, 6):
+            create_entries(Feed.objects.create(url='http://example.com/%s' % (i,)), 1)
+        _, nb_more_queries = self.count_queries('/admin/feedstorage/feed/')
+
+        self.assertEqual(nb_queries, nb_more_queries)
+
+
+class EntryAdminKnownValues(AdminTestCase):
+
+    def test_only_feed_joined(self):
+        create_entries(Feed.objects.create(url='http://example.com/1'), 2)
+
+        response = self.client.get('/admin/feedstorage/entry/')
+        entry = response.context['cl'].result_list[0]
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue(hasattr(entry, '_feed_cache'))
+        self.assertFalse(hasattr(entry, '_fetch_status_cache'))
+        self.assertFalse('xml' in entry.__dict__)  # Deferred
+        self.assertTrue(entry.xml_preview.startswith('<entry>'))
+
+    def test_preview_qualified(self):
+        qs = admin.site._registry[Entry].queryset(None)
+
+        self.assertTrue('SUBSTR(%s.%s, 1, ' % (connection.ops.quote_name('feedstorage_entry'), connection.ops.quote_name('xml')) in str(qs.query))
+
+
+class FeedFilterKnownValues(AdminTestCase):
+
+    def test_other_parameters_kept(self):
+        feed = Feed.objects.create(url='http://example.com/1')
+        create_entries(feed, 1)
+
+        response = self.client.get('/admin/feedstorage/fetchstatus/', {'feed': 'example', 'o': '2', 'q': 'x', 'http_status_code': '200'})
+
+        self.assertEqual(200, response.status_code)
+        self.assertContains(response, '<input type="hidden" name="o" value="2" />')
+        self.assertContains(response, '<input type="hidden" name="q" value="x" />')
+        self.assertContains(response, '<input type="hidden" name="http_status_code" value="200" />')
+        self.assertNotContains(response, '<input type="hidden" name="feed"')
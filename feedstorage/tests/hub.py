@@ -0,0 +1,211 @@
+# Python stdlib
+import json
+from StringIO import StringIO
+from datetime import timedelta
+
+# Django
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+# Internal
+from .. import signals
+from ..hub import Hub
+from ..models import Feed, FetchStatus, Entry, Subscription
+from ..settings import settings
+from .models import SubscriptionsTestCase, create_entries, receiver1, receiver2
+
+
+class SubscribeManyKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.chunk_size = Hub.CHUNK_SIZE
+        Hub.CHUNK_SIZE = 2  # Several chunks with a few subscriptions
+
+    def tearDown(self):
+        Hub.CHUNK_SIZE = self.chunk_size
+        super(SubscribeManyKnownValues, self).tearDown()
+
+    def test_subscribe_many(self):
+        Feed.objects.create(url='http://example.com/1')
+        results = Hub.subscribe_many([
+            ('http://example.com/1', receiver1, None),
+            ('HTTP://Example.com/2', receiver1, None),
+            ('http://example.com/3', receiver2, None),
+        ])
+
+        self.assertEqual([Hub.CREATED] * 3, [result for _, result in results])
+        self.assertEqual(3, Feed.objects.count())
+        self.assertEqual(3, Subscription.objects.count())
+        feed = Feed.objects.get(url='http://example.com/2')
+        self.assertEqual((receiver1,), signals.REGISTRY.receivers(feed.pk))
+
+    def test_existing(self):
+        Hub.subscribe('http://example.com/1', receiver1)
+        results = Hub.subscribe_many([
+            ('http://example.com/1', receiver1, None),
+            ('http://example.com/1', receiver2, None),
+            ('http://example.com/1', receiver2, None),
+        ])
+
+        self.assertEqual([Hub.EXISTING, Hub.CREATED, Hub.EXISTING], [result for _, result in results])
+        self.assertEqual(2, Subscription.objects.count())
+
+    def test_not_a_callback(self):
+        results = Hub.subscribe_many([
+            ('http://example.com/1', staticmethod(receiver1), None),
+            ('http://example.com/2', receiver1, None),
+        ])
+
+        self.assertEqual([Hub.FAILED, Hub.CREATED], [result for _, result in results])
+
+    def test_unsubscribe_many(self):
+        Hub.subscribe_many([
+            ('http://example.com/1', receiver1, None),
+            ('http://example.com/1', receiver2, None),
+            ('http://example.com/2', receiver1, None),
+        ])
+        feed = Feed.objects.get(url='http://example.com/1')
+        results = Hub.unsubscribe_many([
+            ('http://example.com/1', receiver1, None),
+            ('HTTP://Example.com/2', receiver1, None),
+            ('http://example.com/2', receiver2, None),
+            ('http://example.com/3', receiver1, None),
+        ])
+
+        self.assertEqual([Hub.DELETED, Hub.DELETED, Hub.MISSING, Hub.MISSING], [result for _, result in results])
+        self.assertEqual([feed.pk], list(Subscription.objects.values_list('feed', flat=True)))
+        self.assertEqual((receiver2,), signals.REGISTRY.receivers(feed.pk))
+
+    def test_unsubscribe_many_dispatch_uid(self):
+        Hub.subscribe('http://example.com/1', receiver1, 'uid')
+        results = Hub.unsubscribe_many([('http://example.com/1', receiver1, None)])
+
+        self.assertEqual([Hub.MISSING], [result for _, result in results])
+        self.assertEqual(1, Subscription.objects.count())
+
+
+class FeedCollisionMixin(object):
+    """Creates one of the missing Feeds from another transaction right before they are inserted in bulk."""
+    OPML = '''<?xml version="1.0"?>
+        <opml version="1.0"><body>
+            <outline text="1" xmlUrl="http://example.com/1" />
+            <outline text="2" xmlUrl="http://example.com/2" />
+            <outline text="3" xmlUrl="http://example.com/3" />
+        </body></opml>'''
+
+    def setUp(self):
+        Feed.objects.create(url='http://example.com/1')
+
+        def bulk_create(objs):
+            del Feed.objects.bulk_create
+            Feed.objects.create(url='http://example.com/2')
+            transaction.commit()  # Committed by someone else
+            return Feed.objects.bulk_create(objs)
+        Feed.objects.bulk_create = bulk_create
+
+    def tearDown(self):
+        Feed.objects.__dict__.pop('bulk_create', None)
+
+    def test_collision(self):
+        self.assertEqual(
+            [('http://example.com/1', Hub.EXISTING), ('http://example.com/2', Hub.EXISTING), ('http://example.com/3', Hub.CREATED)],
+            Hub.import_opml(StringIO(self.OPML))
+        )
+        self.assertEqual(3, Feed.objects.count())
+
+
+class FeedCollisionKnownValues(FeedCollisionMixin, TestCase):
+    """Inside the transaction of the caller: a savepoint."""
+
+
+class FeedCollisionNotManagedKnownValues(FeedCollisionMixin, TransactionTestCase):
+    """Without transaction management: one transaction per chunk."""
+
+    def test_not_managed(self):
+        self.assertFalse(transaction.is_managed())
+
+
+class PullKnownValues(TestCase):
+
+    def setUp(self):
+        self.pull_lag = settings.PULL_LAG
+        settings.PULL_LAG = 0
+        self.feed1 = Feed.objects.create(url='http://example.com/1')
+        self.feed2 = Feed.objects.create(url='http://example.com/2')
+        self.entries = create_entries(self.feed1, 2) + create_entries(self.feed2, 2, start=2)
+
+    def tearDown(self):
+        settings.PULL_LAG = self.pull_lag
+
+    def test_pull_feed(self):
+        self.assertEqual(self.entries[2:], list(Hub.pull('consumer', feed_urls=['HTTP://Example.com/2'])))
+
+    def test_pull_alias(self):
+        alias = Feed.objects.create(url='http://example.com/alias')
+        alias.alias_to(self.feed1)
+
+        # The entries of the Feed fetched instead of the alias
+        self.assertEqual(self.entries[:2], list(Hub.pull('consumer', feed_urls=[alias.url])))
+
+
+class ExportImportKnownValues(TestCase):
+
+    def setUp(self):
+        self.feed = Feed.objects.create(url='http://example.com/1')
+        Feed.objects.create(url='http://example.com/2', enabled=False)
+        create_entries(self.feed, 3)
+        Entry.objects.update(add_date=timezone.now() - timedelta(days=3))
+        self.entries = self.values(Entry.objects.all(), 'feed__url', 'uid_hash', 'xml', 'add_date', 'fetch_status__timestamp_start')
+
+    def values(self, queryset, *fields):
+        return sorted(tuple(row[f] for f in fields) for row in queryset.values(*fields))
+
+    def export(self, feed_ids=None):
+        out = StringIO()
+        Hub.export_entries(out, feed_ids=feed_ids)
+        return out.getvalue()
+
+    def test_round_trip(self):
+        data = self.export()
+        Feed.objects.all().delete()
+
+        self.assertEqual(
+            {Hub.FEED: [2, 0], Hub.FETCH_STATUS: [1, 0], Hub.ENTRY: [3, 0]},
+            Hub.import_entries(StringIO(data))
+        )
+        self.assertEqual(self.entries, self.values(Entry.objects.all(), 'feed__url', 'uid_hash', 'xml', 'add_date', 'fetch_status__timestamp_start'))
+        self.assertFalse(Feed.objects.get(url='http://example.com/2').enabled)
+
+        # Imported again: all of them exist
+        self.assertEqual(
+            {Hub.FEED: [0, 2], Hub.FETCH_STATUS: [0, 1], Hub.ENTRY: [0, 3]},
+            Hub.import_entries(StringIO(data))
+        )
+        self.assertEqual(3, Entry.objects.count())
+
+    def test_unnormalized_urls(self):
+        # An archive written before the URLs were normalized
+        lines = []
+        for line in self.export().splitlines():
+            record = json.loads(line)
+            for key in ('url', 'feed'):
+                if record.get(key) == 'http://example.com/1':
+                    record[key] = 'HTTP://Example.com:80/1'
+            lines.append(json.dumps(record))
+        Entry.objects.all().delete()
+        FetchStatus.objects.all().delete()
+
+        counts = Hub.import_entries(StringIO('\n'.join(lines)))
+
+        self.assertEqual([0, 2], counts[Hub.FEED])
+        self.assertEqual([3, 0], counts[Hub.ENTRY])
+        self.assertEqual(2, Feed.objects.count())
+        self.assertEqual(3, self.feed.entry_set.count())
+
+    def test_export_feeds(self):
+        other = Feed.objects.get(url='http://example.com/2')
+        records = [json.loads(line) for line in self.export([other.pk]).splitlines()]
+
+        self.assertEqual([Hub.HEADER, Hub.FEED], [record['type'] for record in records])
+        self.assertEqual(other.url, records[1]['url'])
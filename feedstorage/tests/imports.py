@@ -0,0 +1,50 @@
+# Python stdlib
+import os
+import sys
+import json
+import warnings
+import subprocess
+
+# Django
+from django.test import TestCase
+
+# Internal
+from .. import utils
+from ..settings import settings
+
+# Imports feedstorage in a new process and reports which of the Django settings module and the database it has touched
+IMPORT_SCRIPT = '''
+import sys, json
+import feedstorage, feedstorage.settings, feedstorage.utils
+settings_imported = %r in sys.modules
+import feedstorage.models, feedstorage.hub
+from django.db import connection
+sys.stdout.write(json.dumps([settings_imported, connection.connection is not None]))
+'''
+
+
+class ImportKnownValues(TestCase):
+
+    def test_import_cheap(self):
+        settings_module = os.environ['DJANGO_SETTINGS_MODULE']
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        out = subprocess.Popen([sys.executable, '-c', IMPORT_SCRIPT % (settings_module,)], stdout=subprocess.PIPE, env=env).communicate()[0]
+        settings_imported, connected = json.loads(out.strip().splitlines()[-1])
+
+        self.assertFalse(settings_imported)
+        self.assertFalse(connected)
+
+    def test_deprecated_names(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            from ..settings import LOG_FILE, USE_HTTP_COMPRESSION, FEED_STORAGE_SETTINGS
+
+            self.assertEqual(settings.LOG_FILE, LOG_FILE)
+            self.assertEqual(settings.USE_HTTP_COMPRESSION, USE_HTTP_COMPRESSION)
+            self.assertEqual(settings.NOTIFY_DELIVERY, FEED_STORAGE_SETTINGS['NOTIFY_DELIVERY'])
+            self.assertEqual(utils.get_project_root(), utils.PROJECT_ROOT)
+            self.assertEqual([DeprecationWarning] * 4, [w.category for w in caught])
+
+    def test_unknown_names(self):
+        self.assertRaises(AttributeError, getattr, sys.modules['feedstorage.settings'], 'UNKNOWN_SETTING')
+        self.assertFalse(hasattr(utils, 'UNKNOWN'))
@@ -0,0 +1,94 @@
+# Python stdlib
+from StringIO import StringIO
+from datetime import timedelta
+
+# Django
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+# Internal
+from ..management import parse_feeds_option
+from ..management.commands import feedstorage_export, feedstorage_fetch_all
+from ..models import Feed, SubscriptionChange
+from .models import SubscriptionsTestCase, receiver1, receiver2
+
+
+class ParseFeedsOptionKnownValues(TestCase):
+
+    def setUp(self):
+        self.feed = Feed.objects.create(url='http://example.com/feed')
+
+    def test_id_or_url(self):
+        self.assertEqual([self.feed.pk, self.feed.pk], parse_feeds_option([str(self.feed.pk), 'HTTP://Example.com/feed']))
+
+    def test_unknown(self):
+        self.assertRaises(CommandError, parse_feeds_option, ['http://example.com/unknown'])
+        self.assertRaises(CommandError, parse_feeds_option, [str(self.feed.pk + 1)])
+
+    def test_fetch_all_unknown_profiled_feed(self):
+        command = feedstorage_fetch_all.Command()
+
+        self.assertRaises(CommandError, command.handle, profile_feeds=['http://example.com/unknown'])
+
+    def test_export_unknown_feed(self):
+        command = feedstorage_export.Command()
+
+        self.assertRaises(CommandError, command.handle, '-', feeds=['http://example.com/feed', 'http://example.com/unknown'])
+
+
+class PruneKnownValues(TestCase):
+
+    def test_subscription_changes(self):
+        for days in (0, 30):
+            change = SubscriptionChange.objects.create(feed_pk=1, callback='a.b', dispatch_uid='a.b', action=SubscriptionChange.LOAD)
+            SubscriptionChange.objects.filter(pk=change.pk).update(add_date=timezone.now() - timedelta(days=days))
+        out = StringIO()
+        call_command('feedstorage_prune', stdout=out, stderr=out)
+
+        self.assertEqual(1, SubscriptionChange.objects.count())
+        self.assertEqual('0 payloads deleted.\n', out.getvalue())
+
+
+class CoalesceFeedsKnownValues(SubscriptionsTestCase):
+
+    def legacy_feed(self, url):
+        """Creates a Feed with a URL saved before the URLs were normalized."""
+        feed = Feed.objects.create(url=url)
+        Feed.objects.filter(pk=feed.pk).update(url=url)
+        return Feed.objects.get(pk=feed.pk)
+
+    def coalesce(self, **options):
+        out = StringIO()
+        call_command('feedstorage_coalesce_feeds', stdout=out, stderr=out, **options)
+        return out.getvalue()
+
+    def test_unnormalized_listed(self):
+        feed = self.legacy_feed('HTTP://Example.com/x')
+
+        self.assertEqual([(feed, 'http://example.com/x')], Feed.unnormalized())
+        self.assertTrue('HTTP://Example.com/x => http://example.com/x' in self.coalesce())
+        self.assertEqual('HTTP://Example.com/x', Feed.objects.get(pk=feed.pk).url)
+
+    def test_renamed(self):
+        feed = self.legacy_feed('HTTP://Example.com/x')
+        self.coalesce(apply=True)
+
+        self.assertEqual('http://example.com/x', Feed.objects.get(pk=feed.pk).url)
+
+    def test_merged(self):
+        feed = self.legacy_feed('HTTP://Example.com/x')
+        self.subscribe(feed, receiver1)
+        alias = Feed.objects.create(url='http://example.com/alias', alias_of=feed)
+        other = Feed.objects.create(url='http://example.com/x')
+        self.subscribe(other, receiver2)
+        self.coalesce(apply=True)
+
+        feed = Feed.objects.get(pk=feed.pk)
+        self.assertFalse(feed.enabled)
+        self.assertEqual(0, feed.subscription_set.count())
+        self.assertEqual(2, other.subscription_set.count())
+        self.assertEqual(other.pk, Feed.objects.get(pk=alias.pk).alias_of_id)
+        self.assertEqual([], Feed.unnormalized())
+
@@ -0,0 +1,79 @@
+# Python stdlib
+from datetime import timedelta
+
+# Django
+from django.test import TestCase
+from django.utils import timezone
+
+# Internal
+from ..managers import iter_keyset, bulk_insert_raw
+from ..models import Feed, FetchStatus, Entry
+
+
+class AccessPathsKnownValues(TestCase):
+
+    def setUp(self):
+        now = timezone.now()
+        self.feeds = [Feed.objects.create(url='http://feed%s.example.com/' % (i,)) for i in range(2)]
+        for feed in self.feeds:
+            for i in range(3):
+                FetchStatus.objects.create(feed=feed, timestamp_start=now - timedelta(minutes=3 - i), error_msg='error %s' % (i,))
+        self.status = FetchStatus.objects.last_of_feed(self.feeds[0])
+        for i in range(3):
+            Entry.objects.create(feed=self.feeds[0], fetch_status=self.status, xml='<item/>', uid_hash='%s' % (i,))
+
+    def test_last_of_feed(self):
+        self.assertEqual(FetchStatus.objects.filter(feed=self.feeds[0]).latest('timestamp_start').pk, self.status.pk)
+        self.assertFalse('error_msg' in self.status.__dict__)  # Deferred
+        self.assertEqual('error 2', self.status.error_msg)
+
+    def test_last_of_feed_not_lean(self):
+        status = FetchStatus.objects.last_of_feed(self.feeds[0], lean=False)
+
+        self.assertEqual('error 2', status.__dict__.get('error_msg'))
+
+    def test_last_consistent(self):
+        status = FetchStatus.objects.create(feed=self.feeds[0], timestamp_start=timezone.now() - timedelta(minutes=10))
+        last = FetchStatus.objects.last_per_feed([self.feeds[0]])
+
+        self.assertEqual([status.pk], [s.pk for s in last])
+        self.assertEqual(status.pk, FetchStatus.objects.last_of_feed(self.feeds[0]).pk)
+
+    def test_last_of_feed_none(self):
+        feed = Feed.objects.create(url='http://never-fetched.example.com/')
+
+        self.assertEqual(None, FetchStatus.objects.last_of_feed(feed))
+
+    def test_last_per_feed(self):
+        statuses = FetchStatus.objects.last_per_feed()
+
+        self.assertFalse('error_msg' in statuses[0].__dict__)
+        self.assertEqual(set(['error 2']), set(s.error_msg for s in statuses))
+        self.assertEqual(set(f.pk for f in self.feeds), set(s.feed_id for s in statuses))
+
+    def test_recent(self):
+        entries = Entry.objects.recent(self.feeds[0])
+
+        self.assertEqual(['2', '1', '0'], [e.uid_hash for e in entries])
+        self.assertEqual(0, Entry.objects.recent(self.feeds[1]).count())
+
+
+class BulkHelpersKnownValues(TestCase):
+
+    def setUp(self):
+        self.feed = Feed.objects.create(url='http://feed.example.com/')
+        self.status = FetchStatus.objects.create(feed=self.feed, timestamp_start=timezone.now())
+
+    def test_iter_keyset(self):
+        Entry.objects.bulk_create([Entry(feed=self.feed, fetch_status=self.status, xml='<item/>', uid_hash='%s' % (i,)) for i in range(7)])
+        pks = list(Entry.objects.order_by('pk').values_list('pk', flat=True))
+
+        self.assertEqual(pks, [e.pk for e in iter_keyset(Entry.objects.all(), batch_size=3)])
+        self.assertEqual(pks, [e['pk'] for e in iter_keyset(Entry.objects.values('pk'), batch_size=7)])
+        self.assertEqual([], list(iter_keyset(Entry.objects.filter(uid_hash='none'))))
+
+    def test_bulk_insert_raw_keeps_dates(self):
+        old = timezone.now() - timedelta(days=365)
+        bulk_insert_raw(Entry, [Entry(feed=self.feed, fetch_status=self.status, xml='<item/>', uid_hash='old', add_date=old, edit_date=old)])
+
+        self.assertEqual(old, Entry.objects.get(uid_hash='old').add_date)
@@ -0,0 +1,625 @@
+# Python stdlib
+import shutil
+import tempfile
+from datetime import timedelta
+
+# Django
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+# Internal
+from .. import models, signals
+from ..settings import settings, FeedStorageSettings
+from ..models import Feed, FetchStatus, Entry, LazyEntries, Consumer, FetchJob, Payload, Subscription, SubscriptionChange
+from ..utils.loggers import DiagnosticContext
+from ..utils.writers import BackgroundWriter
+
+NOTIFIED = []  # The URLs of the feeds notified to receiver1 with the new entries
+
+
+def receiver1(sender, **kwargs):
+    NOTIFIED.append((kwargs['feed_url'], kwargs['new_entries']))
+
+
+def receiver2(sender, **kwargs):
+    pass
+
+
+def create_entries(feed, nb, start=0):
+    """Creates nb entries of a feed, one fetch status for all of them."""
+    status = FetchStatus.objects.create(feed=feed, timestamp_start=timezone.now())
+    return [
+        Entry.objects.create(feed=feed, fetch_status=status, xml=u'<entry><id>id-%s</id></entry>' % (i,), uid_hash='%032d' % (i,))
+        for i in range(start, start + nb)
+    ]
+
+
+class SubscriptionsTestCase(TestCase):
+    """Forgets the subscriptions loaded by a test since the pk of its feeds may be reused by the next one."""
+
+    def tearDown(self):
+        for s in Subscription.objects.filter(callback__in=[Subscription.prepare_callback(r) for r in (receiver1, receiver2)]):
+            s.unload()
+        for feed_pk in Feed.objects.values_list('pk', flat=True):  # Loaded from the recorded changes only
+            for r in (receiver1, receiver2):
+                signals.new_entries_disconnect(feed_pk, r, Subscription.prepare_dispatch_uid(None, r))
+        signals.LOADED_FEEDS.clear()
+        SubscriptionChange.version = None
+
+    def subscribe(self, feed, receiver):
+        return Subscription.objects.create(feed=feed, callback=receiver)
+
+
+class SubscriptionLoadingKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.feed1 = Feed.objects.create(url='http://example.com/1')
+        self.feed2 = Feed.objects.create(url='http://example.com/2')
+
+    def test_not_loaded_until_needed(self):
+        self.subscribe(self.feed1, receiver1)
+
+        self.assertFalse(self.feed1.pk in signals.LOADED_FEEDS)
+        self.assertEqual((), signals.REGISTRY.receivers(self.feed1.pk))
+
+    def test_loaded_when_receivers_needed(self):
+        self.subscribe(self.feed1, receiver1)
+        self.subscribe(self.feed2, receiver2)
+
+        self.assertEqual((receiver1,), signals.new_entries_receivers(self.feed1))
+        self.assertTrue(self.feed1.pk in signals.LOADED_FEEDS)
+        self.assertFalse(self.feed2.pk in signals.LOADED_FEEDS)
+        self.assertEqual((), signals.REGISTRY.receivers(self.feed2.pk))
+
+    def test_loaded_once(self):
+        self.subscribe(self.feed1, receiver1)
+        signals.load_subscriptions(self.feed1)
+
+        # Not saved: neither loaded nor recorded
+        Subscription.objects.bulk_create([Subscription(feed=self.feed1, callback=Subscription.prepare_callback(receiver2), dispatch_uid='uid2')])
+        with self.assertNumQueries(0):
+            signals.load_subscriptions(self.feed1)
+
+        self.assertEqual((receiver1,), signals.REGISTRY.receivers(self.feed1.pk))
+
+    def test_load_feed(self):
+        self.subscribe(self.feed1, receiver1)
+        self.subscribe(self.feed1, receiver2)
+        self.subscribe(self.feed2, receiver2)
+
+        Subscription.load_feed(self.feed1)
+
+        self.assertEqual((receiver1, receiver2), signals.REGISTRY.receivers(self.feed1.pk))
+        self.assertEqual((), signals.REGISTRY.receivers(self.feed2.pk))
+        self.assertEqual(SubscriptionChange.latest_version(), SubscriptionChange.version)
+
+    def test_unknown_callback_skipped(self):
+        Subscription.objects.create(feed=self.feed1, callback='feedstorage.tests.models.unknown')
+        self.subscribe(self.feed1, receiver1)
+
+        self.assertEqual((receiver1,), signals.new_entries_receivers(self.feed1))
+
+
+class SubscriptionChangeKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.feed = Feed.objects.create(url='http://example.com/1')
+        self.sub = self.subscribe(self.feed, receiver1)
+        signals.load_subscriptions(self.feed)  # Starts the synchronization
+
+    def record(self, receiver, action, pk=None):
+        return SubscriptionChange.objects.create(
+            pk=pk,
+            feed_pk=self.feed.pk,
+            callback=Subscription.prepare_callback(receiver),
+            dispatch_uid=Subscription.prepare_dispatch_uid(None, receiver),
+            action=action
+        )
+
+    def test_change_applied(self):
+        self.subscribe(self.feed, receiver2)  # Recorded, not loaded
+        SubscriptionChange.sync(force=True)
+
+        self.assertEqual((receiver1, receiver2), signals.REGISTRY.receivers(self.feed.pk))
+        self.assertEqual(SubscriptionChange.latest_version(), SubscriptionChange.version)
+
+    def test_not_loaded_feed_ignored(self):
+        feed = Feed.objects.create(url='http://example.com/2')
+        self.subscribe(feed, receiver2)
+        SubscriptionChange.sync(force=True)
+
+        self.assertEqual((), signals.REGISTRY.receivers(feed.pk))
+
+    def test_committed_out_of_order(self):
+        late = self.record(receiver2, SubscriptionChange.LOAD)
+        self.record(receiver1, SubscriptionChange.LOAD)
+        pk = late.pk
+        late.delete()  # Not committed yet
+        SubscriptionChange.sync(force=True)
+
+        self.record(receiver2, SubscriptionChange.LOAD, pk=pk)
+        SubscriptionChange.sync(force=True)
+
+        self.assertEqual((receiver1, receiver2), signals.REGISTRY.receivers(self.feed.pk))
+
+    def test_later_change_wins(self):
+        load = self.record(receiver2, SubscriptionChange.LOAD)
+        self.record(receiver2, SubscriptionChange.UNLOAD)
+        pk = load.pk
+        load.delete()  # Not committed yet
+        SubscriptionChange.sync(force=True)
+
+        self.record(receiver2, SubscriptionChange.LOAD, pk=pk)
+        SubscriptionChange.sync(force=True)
+
+        self.assertEqual((receiver1,), signals.REGISTRY.receivers(self.feed.pk))
+
+    def test_applied_once(self):
+        self.subscribe(self.feed, receiver2)
+        SubscriptionChange.sync(force=True)
+        signals.new_entries_disconnect(self.feed.pk, receiver2, Subscription.prepare_dispatch_uid(None, receiver2))
+        SubscriptionChange.sync(force=True)
+
+        self.assertEqual((receiver1,), signals.REGISTRY.receivers(self.feed.pk))
+
+    def test_callback_changed(self):
+        self.sub.callback = receiver2
+        self.sub.dispatch_uid = None
+        self.sub.save()
+
+        self.assertEqual((), signals.REGISTRY.receivers(self.feed.pk))
+        unload = SubscriptionChange.objects.get(action=SubscriptionChange.UNLOAD)
+        self.assertEqual(Subscription.prepare_callback(receiver1), unload.callback)
+
+        SubscriptionChange.sync(force=True)
+        self.assertEqual((receiver2,), signals.REGISTRY.receivers(self.feed.pk))
+
+    def test_unchanged_save(self):
+        self.sub.save()
+
+        self.assertEqual((receiver1,), signals.REGISTRY.receivers(self.feed.pk))
+        self.assertFalse(SubscriptionChange.objects.filter(action=SubscriptionChange.UNLOAD).exists())
+
+
+class ConsumerKnownValues(TestCase):
+
+    def setUp(self):
+        self.pull_lag = settings.PULL_LAG
+        settings.PULL_LAG = 0
+        self.feed1 = Feed.objects.create(url='http://example.com/1')
+        self.feed2 = Feed.objects.create(url='http://example.com/2')
+        self.entries = create_entries(self.feed1, 3) + create_entries(self.feed2, 2, start=3)
+        self.consumer = Consumer.objects.create(name='consumer')
+
+    def tearDown(self):
+        settings.PULL_LAG = self.pull_lag
+
+    def test_pull(self):
+        self.assertEqual(self.entries[:4], list(self.consumer.pull(limit=4)))
+        self.assertEqual(self.entries[:4], list(self.consumer.pull(limit=4)))  # The cursor is not moved
+
+    def test_pull_feeds(self):
+        self.assertEqual(self.entries[3:], list(self.consumer.pull(feeds=[self.feed2])))
+
+    def test_commit(self):
+        self.consumer.commit(self.entries[1].pk)
+        self.consumer.commit(self.entries[0].pk)  # Never backwards
+
+        self.assertEqual(self.entries[1].pk, Consumer.objects.get(pk=self.consumer.pk).position)
+        self.assertEqual(self.entries[2:], list(self.consumer.pull()))
+
+    def test_consume(self):
+        self.assertEqual(self.entries, list(self.consumer.consume(batch_size=2)))
+        self.assertEqual(self.entries[-1].pk, Consumer.objects.get(pk=self.consumer.pk).position)
+        self.assertEqual([], list(self.consumer.consume(batch_size=2)))
+
+    def test_lag(self):
+        settings.PULL_LAG = 60
+        Entry.objects.filter(pk__in=[e.pk for e in self.entries[:2] + self.entries[3:]]).update(add_date=timezone.now() - timedelta(seconds=120))
+
+        # Stops before the first recent entry, even if later ones are old enough
+        self.assertEqual(self.entries[:2], list(self.consumer.pull()))
+
+
+class FetchJobKnownValues(TestCase):
+
+    def setUp(self):
+        self.in_thread = settings.FETCH_JOBS_IN_THREAD
+        settings.FETCH_JOBS_IN_THREAD = False
+        Feed.objects.create(url='http://127.0.0.1:1/feed')  # Refused right away
+        Feed.objects.create(url='http://127.0.0.1:1/other', enabled=False)
+
+    def tearDown(self):
+        settings.FETCH_JOBS_IN_THREAD = self.in_thread
+
+    def test_queue(self):
+        job = FetchJob.queue(Feed.objects.filter(enabled=True), '[Test]')
+
+        self.assertEqual(FetchJob.PENDING, job.status)
+        self.assertEqual(1, job.nb_feeds)
+        self.assertEqual(['http://127.0.0.1:1/feed'], [f.url for f in job.feeds.all()])
+
+    def test_run_pending(self):
+        job = FetchJob.queue(Feed.objects.all(), '[Test]')
+
+        self.assertEqual(1, FetchJob.run_pending())
+        self.assertEqual(0, FetchJob.run_pending())
+        self.assertFalse(job.run())  # Already run
+
+        job = FetchJob.objects.get(pk=job.pk)
+        self.assertEqual(FetchJob.DONE, job.status)
+        self.assertEqual((2, 2), (job.nb_fetched, job.nb_errors))
+        self.assertEqual(100, job.percent())
+        self.assertTrue(job.heartbeat_date >= job.start_date)
+
+    def test_fail_stale(self):
+        stale = FetchJob.objects.create(prefix_log='[Test]', status=FetchJob.RUNNING, heartbeat_date=timezone.now() - timedelta(seconds=settings.FETCH_JOBS_STALE_AFTER + 1))
+        running = FetchJob.objects.create(prefix_log='[Test]', status=FetchJob.RUNNING, heartbeat_date=timezone.now())
+
+        FetchJob.queue(Feed.objects.all(), '[Test]')
+
+        self.assertEqual(FetchJob.FAILED, FetchJob.objects.get(pk=stale.pk).status)
+        self.assertEqual(FetchJob.RUNNING, FetchJob.objects.get(pk=running.pk).status)
+
+
+class PayloadKnownValues(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+        self.file_storage, self.payload_writer = models.default_file_storage, models.default_payload_writer
+        models.default_file_storage = self.storage
+        models.default_payload_writer = BackgroundWriter(self.storage, in_thread=False)
+
+    def tearDown(self):
+        models.default_file_storage, models.default_payload_writer = self.file_storage, self.payload_writer
+        shutil.rmtree(self.location)
+
+    def test_store(self):
+        payload, created = Payload.store('<rss>broken')
+
+        self.assertTrue(created)
+        self.assertEqual(len('<rss>broken'), payload.size_bytes)
+        self.assertEqual('<rss>broken', payload.read())
+
+    def test_stored_once(self):
+        payload, _ = Payload.store('<rss>broken')
+        Payload.objects.filter(pk=payload.pk).update(last_seen=timezone.now() - timedelta(days=1))
+        same, created = Payload.store('<rss>broken')
+
+        self.assertFalse(created)
+        self.assertEqual(payload.pk, same.pk)
+        self.assertTrue(Payload.objects.get(pk=payload.pk).last_seen > timezone.now() - timedelta(minutes=1))
+
+    def test_missing_file_written(self):
+        payload, _ = Payload.store('<rss>broken')
+        self.storage.delete(payload.name)  # The first write failed
+        Payload.store('<rss>broken')
+
+        self.assertEqual('<rss>broken', payload.read())
+
+    def test_prune(self):
+        now = timezone.now()
+        payloads = []
+        for i in range(3):
+            payload, _ = Payload.store('<rss>broken %s' % (i,) * 100)
+            Payload.objects.filter(pk=payload.pk).update(last_seen=now - timedelta(days=i))
+            payloads.append(payload)
+
+        self.assertEqual(2, Payload.prune(max_bytes=self.storage.size(payloads[0].name)))
+        self.assertEqual([payloads[0].pk], list(Payload.objects.values_list('pk', flat=True)))
+        self.assertFalse(self.storage.exists(payloads[1].name))
+        self.assertFalse(self.storage.exists(payloads[2].name))
+
+    def test_stored_bytes(self):
+        payload, _ = Payload.store('<rss>broken')
+
+        self.assertEqual(self.storage.size(payload.name), Payload.objects.get(pk=payload.pk).stored_bytes)
+
+    def test_prune_sizes_from_database(self):
+        for i in range(3):
+            Payload.store('<rss>broken %s' % (i,) * 100)
+
+        def size(name):
+            raise AssertionError('The size is read from the database.')
+        self.storage.size = size
+
+        self.assertEqual(0, Payload.prune(max_bytes=10 ** 6))
+        self.assertEqual(2, Payload.prune(max_bytes=1 + Payload.objects.order_by('-last_seen')[0].stored_bytes))
+
+    def test_prune_unknown_size(self):
+        payload, _ = Payload.store('<rss>broken' * 100)
+        Payload.objects.update(stored_bytes=None)  # Written before the size was recorded
+
+        self.assertEqual(0, Payload.prune(max_bytes=10 ** 6))
+        self.assertEqual(self.storage.size(payload.name), Payload.objects.get(pk=payload.pk).stored_bytes)
+        self.assertEqual(1, Payload.prune(max_bytes=1))
+
+    def test_prune_no_limit(self):
+        Payload.store('<rss>broken')
+        retention = settings.PAYLOAD_RETENTION_BYTES
+        settings.PAYLOAD_RETENTION_BYTES = None
+        try:
+            self.assertEqual(0, Payload.prune())
+        finally:
+            settings.PAYLOAD_RETENTION_BYTES = retention
+
+        self.assertEqual(1, Payload.objects.count())
+
+
+class FeedMoveKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.feed = Feed.objects.create(url='http://example.com/old')
+        self.subscribe(self.feed, receiver1)
+        self.subscribe(self.feed, receiver2)
+        create_entries(self.feed, 2)
+
+    def test_renamed(self):
+        self.assertEqual(self.feed, self.feed.move('http://example.com/new'))
+
+        feed = Feed.objects.get(pk=self.feed.pk)
+        self.assertEqual('http://example.com/new', feed.url)
+        self.assertTrue(feed.enabled)
+        self.assertEqual(2, feed.subscription_set.count())
+
+    def test_existing_url(self):
+        other = Feed.objects.create(url='http://example.com/new')
+        self.subscribe(other, receiver1)
+
+        self.assertEqual(other, self.feed.move('http://example.com/new'))
+
+        feed = Feed.objects.get(pk=self.feed.pk)
+        self.assertEqual('http://example.com/old', feed.url)
+        self.assertFalse(feed.enabled)
+        self.assertEqual(0, feed.subscription_set.count())
+        self.assertEqual(2, feed.entry_set.count())  # Kept
+        self.assertEqual(
+            sorted(Subscription.prepare_callback(r) for r in (receiver1, receiver2)),
+            sorted(other.subscription_set.values_list('callback', flat=True))
+        )
+        self.assertEqual((receiver2,), signals.REGISTRY.receivers(other.pk))
+        self.assertEqual((), signals.REGISTRY.receivers(feed.pk))
+
+
+
+
+class FeedMoveTransactionKnownValues(TransactionTestCase):
+
+    def test_caller_transaction_not_committed(self):
+        feed = Feed.objects.create(url='http://example.com/old')
+        with transaction.commit_manually():
+            Feed.objects.create(url='http://example.com/other')  # The earlier work of the caller
+            feed.move('http://example.com/new')
+            transaction.rollback()
+
+        self.assertEqual(['http://example.com/old'], list(Feed.objects.values_list('url', flat=True)))
+
+    def test_own_transaction(self):
+        feed = Feed.objects.create(url='http://example.com/old')
+        feed.move('http://example.com/new')
+        transaction.rollback()  # Nothing left to roll back
+
+        self.assertEqual(['http://example.com/new'], list(Feed.objects.values_list('url', flat=True)))
+
+class FeedAliasKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.feed1 = Feed.objects.create(url='http://example.com/1')
+        self.feed2 = Feed.objects.create(url='http://example.com/2')
+        self.feed3 = Feed.objects.create(url='http://example.com/3')
+        del NOTIFIED[:]
+
+    def test_alias_to(self):
+        self.assertEqual(self.feed1, self.feed2.alias_to(self.feed1))
+        self.assertEqual(self.feed1, Feed.objects.get(pk=self.feed2.pk).alias_of)
+
+    def test_alias_to_alias(self):
+        self.feed2.alias_to(self.feed1)
+
+        # The chain is not kept: both end up aliases of the Feed fetched
+        self.assertEqual(self.feed1, self.feed3.alias_to(self.feed2))
+        self.assertEqual(self.feed1, Feed.objects.get(pk=self.feed3.pk).alias_of)
+
+    def test_aliases_moved(self):
+        self.feed2.alias_to(self.feed1)
+        self.feed1.alias_to(self.feed3)
+
+        self.assertEqual(self.feed3, Feed.objects.get(pk=self.feed2.pk).alias_of)
+        self.assertEqual(self.feed3, Feed.objects.get(pk=self.feed1.pk).alias_of)
+
+    def test_alias_to_itself(self):
+        self.feed2.alias_to(self.feed1)
+
+        self.assertRaises(ValueError, self.feed1.alias_to, self.feed1)
+        self.assertRaises(ValueError, self.feed1.alias_to, self.feed2)
+
+    def test_unalias(self):
+        self.feed2.alias_to(self.feed1)
+        self.feed2.unalias()
+
+        self.assertEqual(None, Feed.objects.get(pk=self.feed2.pk).alias_of)
+
+    def test_root(self):
+        self.assertEqual(self.feed1, self.feed1.root())
+        Feed.objects.filter(pk=self.feed2.pk).update(alias_of=self.feed1)
+        Feed.objects.filter(pk=self.feed1.pk).update(alias_of=self.feed2)
+
+        self.assertRaises(ValueError, Feed.objects.get(pk=self.feed1.pk).root)
+
+    def test_clean(self):
+        self.feed2.alias_of = self.feed1
+        self.feed2.clean()
+        self.feed2.save()
+
+        self.feed1.alias_of = self.feed1
+        self.assertRaises(ValidationError, self.feed1.clean)
+        self.feed1.alias_of = self.feed2  # A cycle
+        self.assertRaises(ValidationError, self.feed1.clean)
+        self.feed3.alias_of = self.feed2  # A chain
+        self.assertRaises(ValidationError, self.feed3.clean)
+
+    def test_fetch_cycle(self):
+        Feed.objects.filter(pk=self.feed2.pk).update(alias_of=self.feed1)
+        Feed.objects.filter(pk=self.feed1.pk).update(alias_of=self.feed2)
+
+        self.assertFalse(Feed.objects.get(pk=self.feed1.pk).fetch())
+        self.assertEqual(0, FetchStatus.objects.count())
+
+    def test_fetch_alias(self):
+        self.feed2.alias_to(self.feed1)
+        self.feed1.url = 'http://127.0.0.1:1/'  # Refused, not to go on the network
+        self.feed1.save()
+
+        self.assertFalse(self.feed2.fetch())
+        self.assertEqual([self.feed1.pk], list(FetchStatus.objects.values_list('feed', flat=True)))
+
+    def test_alias_notified(self):
+        self.feed2.alias_to(self.feed1)
+        self.subscribe(self.feed2, receiver1)
+        entries = create_entries(self.feed1, 2)
+
+        self.feed1._notify_new_entries(entries, None, DiagnosticContext())
+
+        self.assertEqual([(self.feed2.url, entries)], NOTIFIED)
+
+    def test_duplicates(self):
+        Feed.objects.filter(pk__in=[self.feed1.pk, self.feed3.pk]).update(body_hash='a' * 40)
+        Feed.objects.filter(pk=self.feed2.pk).update(body_hash='b' * 40)
+
+        self.assertEqual([[self.feed1, self.feed3]], Feed.duplicates())
+
+        self.feed3.alias_to(self.feed1)
+        self.assertEqual([], Feed.duplicates())
+
+
+class NotifyDeliveryKnownValues(SubscriptionsTestCase):
+
+    def setUp(self):
+        self.get_content = models.http.get_content
+        self.delivery = settings.NOTIFY_DELIVERY
+        self.chunk_size = settings.NOTIFY_CHUNK_SIZE
+        settings.NOTIFY_CHUNK_SIZE = 2
+        self.feed = Feed.objects.create(url='http://example.com/1')
+        self.subscribe(self.feed, receiver1)
+        del NOTIFIED[:]
+
+    def tearDown(self):
+        models.http.get_content = self.get_content
+        settings.NOTIFY_DELIVERY = self.delivery
+        settings.NOTIFY_CHUNK_SIZE = self.chunk_size
+        super(NotifyDeliveryKnownValues, self).tearDown()
+
+    def fetch(self, delivery, nb):
+        """Fetches the feed with nb entries, the content being served without going on the network, and returns the notified new entries."""
+        settings.NOTIFY_DELIVERY = delivery
+        data = '<feed>%s</feed>' % (''.join('<entry><id>id-%s</id></entry>' % (i,) for i in range(nb)),)
+        models.http.get_content = lambda url, **kwargs: (data, None, 200, [])
+        self.assertTrue(self.feed.fetch())
+        return [new_entries for _, new_entries in NOTIFIED]
+
+    def test_list(self):
+        notified = self.fetch('list', 5)
+
+        self.assertEqual([list(Entry.objects.order_by('pk'))], notified)
+
+    def test_chunks(self):
+        notified = self.fetch('chunks', 5)
+
+        # Two full chunks as soon as they are stored, then the remainder
+        entries = list(Entry.objects.order_by('pk'))
+        self.assertEqual([entries[:2], entries[2:4], entries[4:]], notified)
+
+    def test_chunks_no_remainder(self):
+        notified = self.fetch('chunks', 4)
+
+        self.assertEqual([2, 2], [len(new_entries) for new_entries in notified])
+
+    def test_lazy(self):
+        notified = self.fetch('lazy', 5)
+
+        self.assertEqual(1, len(notified))
+        self.assertTrue(isinstance(notified[0], LazyEntries))
+        self.assertEqual(5, len(notified[0]))
+        self.assertEqual(list(Entry.objects.order_by('pk')), list(notified[0]))
+
+    def test_lazy_order(self):
+        entries = create_entries(self.feed, 5)
+        ids = [e.pk for e in reversed(entries)]
+
+        # The order of the ids, across the chunks read
+        self.assertEqual(list(reversed(entries)), list(LazyEntries(ids, chunk_size=2)))
+
+    def test_lazy_deleted_skipped(self):
+        entries = create_entries(self.feed, 5)
+        lazy = LazyEntries([e.pk for e in entries], chunk_size=2)
+        Entry.objects.filter(pk__in=[entries[1].pk, entries[4].pk]).delete()
+
+        self.assertEqual(5, len(lazy))  # The ids given
+        self.assertEqual([entries[0], entries[2], entries[3]], list(lazy))
+
+    def test_unknown_delivery(self):
+        self.assertRaises(ImproperlyConfigured, FeedStorageSettings, {'NOTIFY_DELIVERY': 'stream'})
+
+
+class LatestEntryKnownValues(TestCase):
+
+    def setUp(self):
+        Entry.cache().clear()  # The pk of the feeds are reused by the next tests
+        self.feed1 = Feed.objects.create(url='http://example.com/1')
+        self.feed2 = Feed.objects.create(url='http://example.com/2')
+        self.entries = create_entries(self.feed1, 3)
+
+    def test_latest_of_feeds(self):
+        latest = self.entries[-1]
+
+        self.assertEqual(
+            {self.feed1.pk: (latest.pk, latest.add_date), self.feed2.pk: (0, None)},
+            Entry.latest_of_feeds([self.feed1.pk, self.feed2.pk])
+        )
+
+    def test_cached(self):
+        Entry.latest_of_feeds([self.feed1.pk, self.feed2.pk])
+
+        with self.assertNumQueries(0):
+            Entry.latest_of_feeds([self.feed1.pk, self.feed2.pk])
+
+    def test_invalidate_latest(self):
+        Entry.latest_of_feeds([self.feed1.pk])
+        entry = create_entries(self.feed1, 1, start=3)[0]
+        self.assertEqual(self.entries[-1].pk, Entry.latest_of_feeds([self.feed1.pk])[self.feed1.pk][0])  # Still cached
+
+        Entry.invalidate_latest(self.feed1.pk)
+        self.assertEqual(entry.pk, Entry.latest_of_feeds([self.feed1.pk])[self.feed1.pk][0])
+
+    def test_stale_reader(self):
+        cache = Entry.cache()
+        versions = Entry._latest_versions(cache, [self.feed1.pk])  # A reader starts before the new entries
+        entry = create_entries(self.feed1, 1, start=3)[0]
+        Entry.invalidate_latest(self.feed1.pk)
+        cache.set(models.LATEST_ENTRY_CACHE_KEY % (self.feed1.pk, versions[self.feed1.pk]), (self.entries[-1].pk, None))  # and caches after them
+
+        self.assertEqual(entry.pk, Entry.latest_of_feeds([self.feed1.pk])[self.feed1.pk][0])
+
+    def test_version_evicted(self):
+        Entry.latest_of_feeds([self.feed1.pk])
+        Entry.cache().delete(models.LATEST_ENTRY_VERSION_KEY % (self.feed1.pk,))
+        entry = create_entries(self.feed1, 1, start=3)[0]
+
+        self.assertEqual(entry.pk, Entry.latest_of_feeds([self.feed1.pk])[self.feed1.pk][0])
+
+    def test_deleted(self):
+        Entry.latest_of_feeds([self.feed1.pk])
+        self.entries[-1].delete()
+
+        self.assertEqual(self.entries[1].pk, Entry.latest_of_feeds([self.feed1.pk])[self.feed1.pk][0])
+
+    def test_feed_deleted(self):
+        pk = self.feed1.pk  # Reset by delete
+        Entry.latest_of_feeds([pk])
+        self.feed1.delete()  # Deletes its entries
+
+        self.assertEqual((0, None), Entry.latest_of_feeds([pk])[pk])
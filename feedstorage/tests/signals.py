@@ -0,0 +1,208 @@
+# Python stdlib
+import time
+
+# Django
+from django.test import TestCase
+
+# Internal
+from .. import signals
+from ..signals import ReceiverRegistry, NotificationBatch
+from ..utils.pool import CallTimeout
+
+
+def receiver1(sender, **kwargs):
+    pass
+
+
+def receiver2(sender, **kwargs):
+    pass
+
+
+class ReceiverRegistryKnownValues(TestCase):
+
+    def setUp(self):
+        self.registry = ReceiverRegistry()
+
+    def test_connect_once(self):
+        self.assertTrue(self.registry.connect(1, receiver1, 'uid'))
+        self.assertFalse(self.registry.connect(1, receiver1, 'uid'))
+
+        self.assertEqual((receiver1,), self.registry.receivers(1))
+
+    def test_connection_order(self):
+        self.registry.connect(1, receiver2, None)
+        self.registry.connect(1, receiver1, None)
+
+        self.assertEqual((receiver2, receiver1), self.registry.receivers(1))
+
+    def test_disconnect(self):
+        self.registry.connect(1, receiver1, 'uid1')
+        self.registry.connect(1, receiver2, 'uid2')
+
+        self.assertTrue(self.registry.disconnect(1, receiver1, 'uid1'))
+        self.assertFalse(self.registry.disconnect(1, receiver1, 'uid1'))
+        self.assertFalse(self.registry.contains(1, receiver1, 'uid1'))
+        self.assertEqual((receiver2,), self.registry.receivers(1))
+
+    def test_disconnect_keeps_other_uid(self):
+        self.registry.connect(1, receiver1, 'a')
+        self.registry.connect(1, receiver1, 'b')
+
+        self.assertTrue(self.registry.disconnect(1, receiver1, 'a'))
+        self.assertTrue(self.registry.contains(1, receiver1, 'b'))
+        self.assertEqual((receiver1,), self.registry.receivers(1))
+
+    def test_snapshot_not_modified(self):
+        self.registry.connect(1, receiver1, None)
+        snapshot = self.registry.receivers(1)
+        self.registry.connect(1, receiver2, None)
+
+        self.assertEqual((receiver1,), snapshot)
+
+    def test_feeds_separated(self):
+        self.registry.connect(1, receiver1, None)
+
+        self.assertEqual((), self.registry.receivers(2))
+
+
+class FakeFeed(object):
+    """Stands for a Feed whose subscriptions are already loaded."""
+
+    def __init__(self, pk, url):
+        self.pk = pk
+        self.url = url
+
+
+class FakeEntry(object):
+
+    def __init__(self, xml):
+        self.xml = xml
+
+
+class NotificationBatchKnownValues(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.feed1 = FakeFeed(-1, 'http://example.com/1')
+        self.feed2 = FakeFeed(-2, 'http://example.com/2')
+        self.entry1 = FakeEntry(u'<entry><id>id-1</id><title>Title 1</title><updated>2012-11-21T15:30:25Z</updated></entry>')
+        self.entry2 = FakeEntry(u'<entry><id>id-2</id><title>Title 2</title><updated>2012-11-21T15:30:25Z</updated></entry>')
+
+        for feed in (self.feed1, self.feed2):
+            signals.LOADED_FEEDS.add(feed.pk)
+        signals.new_entries_connect(self.feed1.pk, self.receiver_a, 'batch-a')
+        signals.new_entries_connect(self.feed2.pk, self.receiver_a, 'batch-a')
+        signals.new_entries_connect(self.feed2.pk, self.receiver_b, 'batch-b')
+
+    def tearDown(self):
+        signals.new_entries_disconnect(self.feed1.pk, self.receiver_a, 'batch-a')
+        signals.new_entries_disconnect(self.feed2.pk, self.receiver_a, 'batch-a')
+        signals.new_entries_disconnect(self.feed2.pk, self.receiver_b, 'batch-b')
+        for feed in (self.feed1, self.feed2):
+            signals.LOADED_FEEDS.discard(feed.pk)
+
+    def receiver_a(self, sender, **kwargs):
+        self.calls.append(('a', kwargs))
+        return 'a'
+
+    def receiver_b(self, sender, **kwargs):
+        self.calls.append(('b', kwargs))
+        return 'b'
+
+    def test_grouped_per_receiver(self):
+        batch = NotificationBatch()
+        self.assertEqual([], batch.add(self.feed1, [self.entry1]))
+        self.assertEqual([], batch.add(self.feed2, [self.entry2]))
+        self.assertEqual([], self.calls)
+
+        responses = batch.flush()
+        calls = dict(self.calls)
+
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual(['a', 'b'], sorted(response for _, response in responses))
+        self.assertEqual(None, calls['a']['feed_url'])
+        self.assertEqual([self.entry1, self.entry2], calls['a']['new_entries'])
+        self.assertEqual({self.feed1.url: [self.entry1], self.feed2.url: [self.entry2]}, calls['a']['new_entries_by_feed'])
+        self.assertEqual([self.entry2], calls['b']['new_entries'])
+        self.assertEqual({self.feed2.url: [self.entry2]}, calls['b']['new_entries_by_feed'])
+        self.assertFalse('merged_xml' in calls['a'])
+
+    def test_flush_empties(self):
+        batch = NotificationBatch()
+        batch.add(self.feed1, [self.entry1])
+        batch.flush()
+
+        self.assertEqual([], batch.flush())
+        self.assertEqual(1, len(self.calls))
+
+    def test_window_flush(self):
+        batch = NotificationBatch(window=60)
+        self.assertEqual([], batch.add(self.feed1, [self.entry1]))
+
+        batch.started = time.time() - 60
+        responses = batch.add(self.feed2, [self.entry2])
+
+        self.assertEqual(2, len(responses))
+        self.assertEqual({}, batch.pending)
+
+    def test_merged_xml(self):
+        batch = NotificationBatch(merged=True)
+        batch.add(self.feed1, [self.entry1])
+        batch.add(self.feed2, [self.entry2])
+        batch.flush()
+        calls = dict(self.calls)
+
+        self.assertTrue('<id>id-1</id>' in calls['a']['merged_xml'])
+        self.assertTrue('<id>id-2</id>' in calls['a']['merged_xml'])
+        self.assertFalse('<id>id-1</id>' in calls['b']['merged_xml'])
+
+    def test_receiver_error_returned(self):
+        def failing(sender, **kwargs):
+            raise ValueError('failed')
+        signals.new_entries_connect(self.feed1.pk, failing, 'batch-failing')
+        try:
+            batch = NotificationBatch()
+            batch.add(self.feed1, [self.entry1])
+            responses = dict(batch.flush())
+        finally:
+            signals.new_entries_disconnect(self.feed1.pk, failing, 'batch-failing')
+
+        self.assertTrue(isinstance(responses[failing], ValueError))
+        self.assertEqual('a', responses[self.receiver_a])
+
+    def test_merged_xml_window_start(self):
+        batch = NotificationBatch(merged=True)
+        started = batch.started = time.time() - 3600
+        batch.add(self.feed1, [self.entry1])
+        batch.flush()
+
+        self.assertTrue('urn:feedstorage:batch:%s' % (int(started),) in dict(self.calls)['a']['merged_xml'])
+
+    def test_latencies(self):
+        batch = NotificationBatch()
+        batch.add(self.feed2, [self.entry2])
+        latencies = []
+        responses = batch.flush(latencies)
+
+        self.assertEqual(len(responses), len(latencies))
+        self.assertTrue(all(latency >= 0 for latency in latencies))
+
+    def test_slow_receiver_timeout(self):
+        def slow(sender, **kwargs):
+            time.sleep(0.5)
+        signals.new_entries_connect(self.feed1.pk, slow, 'batch-slow')
+        try:
+            batch = NotificationBatch(workers=3, timeout=0.1)
+            batch.add(self.feed1, [self.entry1])
+            batch.add(self.feed2, [self.entry2])
+            start = time.time()
+            responses = dict(batch.flush())
+            elapsed = time.time() - start
+        finally:
+            signals.new_entries_disconnect(self.feed1.pk, slow, 'batch-slow')
+
+        self.assertTrue(isinstance(responses[slow], CallTimeout))
+        self.assertEqual('a', responses[self.receiver_a])
+        self.assertEqual('b', responses[self.receiver_b])
+        self.assertTrue(elapsed < 0.5)
+
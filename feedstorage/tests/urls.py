@@ -0,0 +1,10 @@
+# Django
+from django.conf.urls import patterns, include, url
+from django.contrib import admin
+
+admin.autodiscover()
+
+urlpatterns = patterns('',
+    url(r'^admin/', include(admin.site.urls)),
+    url(r'^feedstorage/', include('feedstorage.urls')),
+)
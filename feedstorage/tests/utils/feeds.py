@@ -0,0 +1,50 @@
+# Python stdlib
+from StringIO import StringIO
+
+# Dependencies: third-party apps
+from lxml import etree
+
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.feeds import merge_entries, AtomWriter, ATOM_NS
+
+
+class MergeEntriesKnownValues(TestCase):
+
+    def setUp(self):
+        self.rss_item = u'<item><title>Title 1</title><link>http://example.com/1</link><guid>guid-1</guid><pubDate>Wed, 21 Nov 2012 16:30:25 +0100</pubDate></item>'
+        self.atom_entry = u'<entry><id>id-2</id><title>Title 2</title><updated>2012-11-21T15:30:25Z</updated></entry>'
+
+    def merge(self):
+        xml = merge_entries([self.rss_item, self.atom_entry], title='Merged', feed_id='urn:test')
+        return etree.fromstring(xml.encode('utf-8'))
+
+    def test_all_entries_merged(self):
+        doc = self.merge()
+        ids = doc.xpath('/a:feed/a:entry/a:id/text()', namespaces={'a': ATOM_NS})
+
+        self.assertEqual(['guid-1', 'id-2'], ids)
+
+    def test_rss_date_converted(self):
+        doc = self.merge()
+        updated = doc.xpath('/a:feed/a:entry[1]/a:updated/text()', namespaces={'a': ATOM_NS})
+
+        self.assertEqual(['2012-11-21T15:30:25Z'], updated)
+
+
+class AtomWriterKnownValues(TestCase):
+
+    def test_same_as_merged(self):
+        rss_item = u'<item><title>Title 1</title><guid>guid-1</guid><pubDate>Wed, 21 Nov 2012 16:30:25 +0100</pubDate></item>'
+        atom_entry = u'<entry><id>id-2</id><title>T\xeftle 2</title><updated>2012-11-21T15:30:25Z</updated></entry>'
+        out = StringIO()
+        writer = AtomWriter(out, title='Written & merged', feed_id='urn:test', updated='2012-11-22T00:00:00Z')
+        writer.entry(rss_item)
+        writer.entry(atom_entry)
+        writer.close()
+
+        written = etree.fromstring(out.getvalue())
+        merged = etree.fromstring(merge_entries([rss_item, atom_entry], title='Written & merged', feed_id='urn:test', updated='2012-11-22T00:00:00Z').encode('utf-8'))
+        self.assertEqual(etree.tostring(merged, method='c14n'), etree.tostring(written, method='c14n').replace('\n', ''))
@@ -1,8 +1,11 @@
+# Dependencies: third-party apps
+import requests
+
 # Django
 from django.test import TestCase
 
 # Internal
-from ...utils.http import _return
+from ...utils.http import _return, permanent_location, get_content, MAX_REDIRECTS
 
 
 class ReturnUtilKnownValues(TestCase):
@@ -18,3 +21,64 @@ class ReturnUtilKnownValues(TestCase):
         result = _return((False, 'val1'), (False, 'val2'), (False, 'val3'), (True, 4))
 
         self.assertEqual(known, result)
+
+
+class PermanentLocationKnownValues(TestCase):
+
+    def test_permanent_redirects(self):
+        redirects = [(301, 'http://example.com/b'), (308, 'http://example.com/c')]
+        self.assertEqual('http://example.com/c', permanent_location(redirects))
+
+    def test_stops_at_temporary_redirect(self):
+        redirects = [(301, 'http://example.com/b'), (302, 'http://example.com/c'), (301, 'http://example.com/d')]
+        self.assertEqual('http://example.com/b', permanent_location(redirects))
+
+    def test_temporary_redirect_first(self):
+        self.assertEqual(None, permanent_location([(307, 'http://example.com/b'), (301, 'http://example.com/c')]))
+
+    def test_no_redirect(self):
+        self.assertEqual(None, permanent_location([]))
+
+
+class FakeResponse(object):
+
+    def __init__(self, url, status_code, location=None, content=''):
+        self.url = url
+        self.status_code = status_code
+        self.headers = location and {'Location': location} or {}
+        self.history = []
+        self.content = content
+
+
+class GetContentKnownValues(TestCase):
+
+    def setUp(self):
+        self.get = requests.get
+        self.urls = []
+
+    def tearDown(self):
+        requests.get = self.get
+
+    def fake_get(self, responses):
+        def get(url, headers=None):
+            self.urls.append(url)
+            return responses.get(url) or FakeResponse(url, 308, '/loop')
+        requests.get = get
+
+    def test_308_followed(self):
+        self.fake_get({
+            'http://example.com/a': FakeResponse('http://example.com/a', 308, '/b'),
+            'http://example.com/b': FakeResponse('http://example.com/b', 200, content='<rss/>'),
+        })
+        data, status_code, redirects = get_content('http://example.com/a', return_status_code=True, return_redirects=True)
+
+        self.assertEqual(('<rss/>', 200), (data, status_code))
+        self.assertEqual([(308, 'http://example.com/b')], redirects)
+
+    def test_308_loop(self):
+        self.fake_get({})
+        status_code, redirects = get_content('http://example.com/loop', return_status_code=True, return_redirects=True)[1:]
+
+        self.assertEqual(308, status_code)
+        self.assertEqual(MAX_REDIRECTS + 1, len(self.urls))
+        self.assertEqual(MAX_REDIRECTS, len(redirects))
@@ -0,0 +1,17 @@
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.iterators import chunked
+
+
+class ChunkedKnownValues(TestCase):
+
+    def test_chunks(self):
+        self.assertEqual([[0, 1], [2, 3], [4]], list(chunked(range(5), 2)))
+
+    def test_generator(self):
+        self.assertEqual([[0, 1, 2]], list(chunked((i for i in range(3)), 5)))
+
+    def test_empty(self):
+        self.assertEqual([], list(chunked([], 2)))
@@ -1,12 +1,14 @@
 # Python stdlib
 import os
+import logging
+import threading
 from datetime import timedelta, tzinfo, datetime
 
 # Django
 from django.test import TestCase
 
 # Internal
-from ...utils.loggers import windows_safe, make_safe, to_unicode
+from ...utils.loggers import windows_safe, make_safe, to_unicode, DiagnosticContext, QueuedHandler, ImproperlyConfigured
 
 
 class LoggersPathUtilsKnownValues(TestCase):
@@ -83,3 +85,103 @@ class LoggersUnicodeUtilsTestCase(TestCase):
 
         self.assertEqual(u_a, u1_int_converted)
         self.assertEqual(u_b, u2_int_converted)
+
+
+class DiagnosticContextKnownValues(TestCase):
+
+    def test_flush(self):
+        context = DiagnosticContext()
+        context.append('No entries found.')
+        context.append('Entry #%s cannot be parsed.\n%s', 3, 'error')
+        self.assertEqual(2, len(context))
+        self.assertEqual('No entries found.\nEntry #3 cannot be parsed.\nerror', context.flush())
+        self.assertEqual(0, len(context))
+        self.assertEqual('', context.flush())
+
+    def test_lazy(self):
+        class Unformattable(object):
+            def __str__(self):
+                raise AssertionError('Formatted')
+
+        context = DiagnosticContext()
+        context.append('%s', Unformattable())  # Not formatted until flushed
+        self.assertRaises(AssertionError, context.flush)
+
+    def test_contexts_do_not_mix(self):
+        first, second = DiagnosticContext(), DiagnosticContext()
+        first.append('first')
+        second.append('second')
+        self.assertEqual('first', first.flush())
+        self.assertEqual('second', second.flush())
+
+
+class ListHandler(logging.Handler):
+    """Keeps the formatted records, optionally waiting for an event before each one."""
+
+    def __init__(self, wait=None):
+        logging.Handler.__init__(self)
+        self.wait = wait
+        self.records = []
+
+    def emit(self, record):
+        if self.wait is not None:
+            self.wait.wait()
+        self.records.append(record.getMessage())
+
+
+class QueuedHandlerKnownValues(TestCase):
+
+    def make_logger(self, handler):
+        logger = logging.getLogger('feedstorage.tests.%s' % (id(handler),))
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        return logger
+
+    def test_write(self):
+        target = ListHandler()
+        handler = QueuedHandler(target, queue_size=10)
+        logger = self.make_logger(handler)
+        args = ['a']
+        logger.info('%s - %s', 'Fetching', args)
+        args.append('b')  # Formatted when logged, not when written
+        handler.flush()
+        self.assertEqual(["Fetching - ['a']"], target.records)
+        handler.close()
+
+    def test_drop(self):
+        go = threading.Event()
+        target = ListHandler(wait=go)
+        handler = QueuedHandler(target, queue_size=2, overflow='drop')
+        logger = self.make_logger(handler)
+        for i in range(10):
+            logger.info('%s', i)
+        go.set()
+        handler.close()
+        written = [r for r in target.records if not r.endswith('log records dropped because the log queue was full.')]
+        self.assertTrue(len(written) <= 3)  # The one being written and the queued ones
+        self.assertEqual(1, len(target.records) - len(written))
+
+    def test_drop_oldest(self):
+        go = threading.Event()
+        target = ListHandler(wait=go)
+        handler = QueuedHandler(target, queue_size=2, overflow='drop_oldest')
+        logger = self.make_logger(handler)
+        for i in range(10):
+            logger.info('%s', i)
+        go.set()
+        handler.close()
+        written = [r for r in target.records if not r.endswith('log records dropped because the log queue was full.')]
+        self.assertEqual(['8', '9'], written[-2:])  # The newest ones are kept
+
+    def test_block(self):
+        target = ListHandler()
+        handler = QueuedHandler(target, queue_size=1, overflow='block')
+        logger = self.make_logger(handler)
+        for i in range(20):
+            logger.info('%s', i)
+        handler.close()
+        self.assertEqual([str(i) for i in range(20)], target.records)
+
+    def test_overflow_policy(self):
+        self.assertRaises(ImproperlyConfigured, QueuedHandler, ListHandler(), overflow='wait')
@@ -0,0 +1,53 @@
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.metrics import NullSink, MemorySink
+
+
+class NullSinkKnownValues(TestCase):
+
+    def test_disabled(self):
+        sink = NullSink()
+        self.assertFalse(sink.enabled)
+        sink.incr('fetches_total')
+        sink.timing('duration_seconds', 1)
+
+
+class MemorySinkKnownValues(TestCase):
+
+    def test_counters(self):
+        sink = MemorySink()
+        sink.incr('fetches_total', labels={'status_code': 200})
+        sink.incr('fetches_total', labels={'status_code': 200})
+        sink.incr('fetches_total', labels={'status_code': 304})
+        sink.incr('bytes_total', 1024)
+        self.assertEqual(
+            '# TYPE bytes_total counter\n'
+            'bytes_total 1024\n'
+            '# TYPE fetches_total counter\n'
+            'fetches_total{status_code="200"} 2\n'
+            'fetches_total{status_code="304"} 1\n',
+            sink.render()
+        )
+
+    def test_histogram(self):
+        sink = MemorySink(buckets=(0.1, 1))
+        sink.timing('duration_seconds', 0.05, labels={'receiver': 'a"b'})
+        sink.timing('duration_seconds', 0.5, labels={'receiver': 'a"b'})
+        sink.timing('duration_seconds', 2, labels={'receiver': 'a"b'})
+        self.assertEqual(
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{receiver="a\\"b",le="0.1"} 1\n'
+            'duration_seconds_bucket{receiver="a\\"b",le="1"} 2\n'
+            'duration_seconds_bucket{receiver="a\\"b",le="+Inf"} 3\n'
+            'duration_seconds_sum{receiver="a\\"b"} 2.55\n'
+            'duration_seconds_count{receiver="a\\"b"} 3\n',
+            sink.render()
+        )
+
+    def test_reset(self):
+        sink = MemorySink()
+        sink.incr('fetches_total')
+        sink.reset()
+        self.assertEqual('\n', sink.render())
@@ -0,0 +1,36 @@
+# Python stdlib
+from StringIO import StringIO
+
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.opml import iter_outlines, OPMLWriter
+
+
+class OPMLKnownValues(TestCase):
+
+    def test_iter_outlines(self):
+        source = StringIO('''<?xml version="1.0"?>
+            <opml version="1.0"><body>
+                <outline text="Group" group="1">
+                    <outline text="A" xmlUrl="http://a.com/rss" />
+                </outline>
+                <outline text="B" xmlUrl="http://b.com/rss" />
+            </body></opml>''')
+        outlines = [(attrib['xmlUrl'], [a['text'] for a in ancestors]) for attrib, ancestors in iter_outlines(source)]
+
+        self.assertEqual([('http://a.com/rss', ['Group']), ('http://b.com/rss', [])], outlines)
+
+    def test_write_and_read(self):
+        out = StringIO()
+        writer = OPMLWriter(out, u'Title')
+        writer.start(u'Group', callback=u'a.b')
+        writer.feed(u'http://a.com/rss?a=1&b=2')
+        writer.end()
+        writer.feed(u'http://b.com/rss')
+        writer.close()
+
+        outlines = [(attrib['xmlUrl'], [a.get('callback') for a in ancestors]) for attrib, ancestors in iter_outlines(StringIO(out.getvalue()))]
+
+        self.assertEqual([('http://a.com/rss?a=1&b=2', ['a.b']), ('http://b.com/rss', [])], outlines)
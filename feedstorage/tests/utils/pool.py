@@ -0,0 +1,66 @@
+# Python stdlib
+import time
+import threading
+
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.pool import call_all, CallTimeout
+
+
+def double(a):
+    return 2 * a
+
+
+def fail():
+    raise ValueError('failed')
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def thread_sleep(seconds):
+    time.sleep(seconds)
+    return threading.current_thread().ident
+
+
+class CallAllKnownValues(TestCase):
+
+    def test_serial(self):
+        results = call_all([(double, (1,), {}), (double, (), {'a': 2})])
+
+        self.assertEqual([2, 4], [r for r, _ in results])
+
+    def test_parallel_keeps_order(self):
+        results = call_all([(sleep, (0.05,), {}), (double, (3,), {})], workers=2)
+
+        self.assertEqual([0.05, 6], [r for r, _ in results])
+
+    def test_exception_returned(self):
+        results = call_all([(fail, (), {}), (double, (1,), {})], workers=2)
+
+        self.assertTrue(isinstance(results[0][0], ValueError))
+        self.assertEqual(2, results[1][0])
+
+    def test_timeout(self):
+        results = call_all([(sleep, (1,), {}), (double, (1,), {})], workers=2, timeout=0.1)
+
+        self.assertTrue(isinstance(results[0][0], CallTimeout))
+        self.assertEqual(2, results[1][0])
+
+    def test_stuck_call_does_not_block_pool(self):
+        results = call_all([(sleep, (1,), {}), (double, (1,), {}), (double, (2,), {})], workers=2, timeout=0.1)
+
+        self.assertEqual([2, 4], [r for r, _ in results[1:]])
+
+    def test_abandoned_thread_exits(self):
+        calls = [(thread_sleep, (0.2,), {})] + [(thread_sleep, (0.05,), {})] * 20
+        results = call_all(calls, workers=2, timeout=0.1)
+
+        self.assertTrue(isinstance(results[0][0], CallTimeout))
+        threads = set(r for r, _ in results[1:])  # The other worker and the replacement of the stuck one
+        self.assertEqual(2, len(threads))
+
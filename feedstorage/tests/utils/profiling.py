@@ -0,0 +1,51 @@
+# Python stdlib
+import time
+import marshal
+
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.profiling import Profiler, SamplingProfiler
+
+
+def busy(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+    return 'done'
+
+
+class ProfilerKnownValues(TestCase):
+
+    def test_wrap(self):
+        profiler = Profiler()
+        self.assertEqual('done', profiler.wrap(busy)(0.01))
+        self.assertTrue('busy' in profiler.report())
+        self.assertTrue(marshal.loads(profiler.dump()))
+
+
+class SamplingProfilerKnownValues(TestCase):
+
+    def test_wrap(self):
+        profiler = SamplingProfiler(interval=0.001)
+        self.assertEqual('done', profiler.wrap(busy)(0.05))
+        self.assertTrue(profiler.nb_samples > 0)
+        self.assertTrue('busy' in profiler.report())
+        self.assertTrue('busy' in profiler.dump())
+
+    def test_start_stop(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.start()
+        busy(0.05)
+        profiler.stop()
+        nb = profiler.nb_samples
+        busy(0.01)
+        self.assertEqual(nb, profiler.nb_samples)
+
+    def test_empty_stack(self):
+        profiler = SamplingProfiler()
+        profiler.stacks = {(): 2, ('main', 'busy'): 1}
+        profiler.nb_samples = 3
+
+        self.assertTrue('busy' in profiler.report())
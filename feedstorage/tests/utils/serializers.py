@@ -2,7 +2,8 @@
 from django.test import TestCase
 
 # Internal
-from ...utils.serializers import serialize_function, deserialize_function, SerializationFailed, DeserializationFailed
+from ...utils import serializers
+from ...utils.serializers import serialize_function, deserialize_function, clear_deserialized_functions, SerializationFailed, DeserializationFailed
 
 
 def func1(a):
@@ -50,3 +51,29 @@ class SerializationDeserializationKnownValues(TestCase):
     def test_none_deserialization_failed(self):
         f = None
         self.assertRaises(DeserializationFailed, deserialize_function, f)
+
+
+class DeserializationCache(TestCase):
+
+    def setUp(self):
+        clear_deserialized_functions()
+
+    def test_cached(self):
+        name = serialize_function(func1)
+        deserialize_function(name)
+
+        self.assertTrue(serializers._RESOLVED[name] is func1)
+
+    def test_failure_cached(self):
+        name = 'feedstorage.tests.utils.serializers.unknown'
+        self.assertRaises(DeserializationFailed, deserialize_function, name)
+
+        self.assertTrue(name in serializers._RESOLVED)
+        self.assertRaises(DeserializationFailed, deserialize_function, name)
+
+    def test_clear_one(self):
+        name = serialize_function(func1)
+        deserialize_function(name)
+        clear_deserialized_functions(name)
+
+        self.assertFalse(name in serializers._RESOLVED)
@@ -0,0 +1,52 @@
+# Python stdlib
+import json
+import time
+
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.timer import PhaseTimer, percentile
+
+
+class PhaseTimerKnownValues(TestCase):
+
+    def test_phases(self):
+        timer = PhaseTimer()
+        timer.start('download')
+        time.sleep(0.01)
+        timer.start('parse')
+        timer.stop()
+        self.assertEqual(set(['download', 'parse']), set(timer.durations))
+        self.assertTrue(timer.durations['download'] >= 0.01)
+
+    def test_accumulated(self):
+        timer = PhaseTimer()
+        timer.start('dedup')
+        time.sleep(0.01)
+        timer.start('insert')
+        timer.start('dedup')
+        time.sleep(0.01)
+        timer.stop()
+        self.assertTrue(timer.durations['dedup'] >= 0.02)
+
+    def test_to_json(self):
+        timer = PhaseTimer()
+        timer.start('parse')  # Stopped by to_json
+        self.assertEqual(['parse'], json.loads(timer.to_json()).keys())
+        self.assertEqual('{}', PhaseTimer().to_json())
+
+
+class PercentileKnownValues(TestCase):
+
+    def test_nearest_rank(self):
+        values = range(1, 101)
+        self.assertEqual(50, percentile(values, 50))
+        self.assertEqual(95, percentile(values, 95))
+        self.assertEqual(100, percentile(values, 100))
+        self.assertEqual(1, percentile(values, 0))
+
+    def test_few_values(self):
+        self.assertEqual(20, percentile([10, 20], 99))
+        self.assertEqual(10, percentile([10, 20], 50))
+        self.assertEqual(None, percentile([], 50))
@@ -0,0 +1,35 @@
+# Django
+from django.test import TestCase
+
+# Internal
+from ...utils.urls import normalize_url
+
+
+class NormalizeUrlKnownValues(TestCase):
+
+    def test_scheme_and_host_lowercased(self):
+        self.assertEqual('http://www.example.com/Feed', normalize_url(' HTTP://WWW.Example.com/Feed '))
+
+    def test_default_port_removed(self):
+        self.assertEqual('https://example.com/', normalize_url('https://example.com:443'))
+        self.assertEqual('http://example.com:8080/', normalize_url('http://example.com:8080/'))
+
+    def test_ipv6_host(self):
+        self.assertEqual('http://[::1]:8080/feed', normalize_url('http://[::1]:8080/feed'))
+        self.assertEqual('http://[fe80::1]/', normalize_url('http://[FE80::1]:80'))
+
+    def test_invalid_port(self):
+        self.assertEqual(None, normalize_url('http://example.com:abc/'))
+        self.assertEqual(None, normalize_url('http://[::1/feed'))
+
+    def test_fragment_removed(self):
+        self.assertEqual('http://example.com/rss?a=1', normalize_url('http://example.com/rss?a=1#top'))
+
+    def test_tracking_params(self):
+        self.assertEqual('http://example.com/rss?b=2&a=1', normalize_url('http://example.com/rss?utm_source=x&b=2&UTM_Medium=y&a=1&fbclid=z'))
+        self.assertEqual('http://example.com/rss', normalize_url('http://example.com/rss?utm_source=feedburner'))
+
+    def test_not_http(self):
+        self.assertEqual(None, normalize_url('ftp://example.com/rss'))
+        self.assertEqual(None, normalize_url('example.com/rss'))
+        self.assertEqual(None, normalize_url(''))
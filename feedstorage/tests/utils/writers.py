@@ -0,0 +1,73 @@
+# Python stdlib
+import shutil
+import tempfile
+
+# Django
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+
+# Internal
+from ...utils.writers import gzip_data, gunzip_data, BackgroundWriter
+
+
+class GzipKnownValues(TestCase):
+
+    def test_roundtrip(self):
+        data = '<rss>%s</rss>' % ('<item>x</item>' * 1000,)
+        compressed = gzip_data(data)
+        self.assertTrue(len(compressed) < len(data))
+        self.assertEqual(data, gunzip_data(compressed))
+
+
+class BackgroundWriterKnownValues(TestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def read(self, name):
+        f = self.storage.open(name, 'rb')
+        try:
+            return gunzip_data(f.read())
+        finally:
+            f.close()
+
+    def test_in_thread(self):
+        writer = BackgroundWriter(self.storage)
+        writer.write('payloads/a.gz', 'first')
+        writer.write('payloads/b.gz', 'second')
+        writer.flush()
+        self.assertEqual('first', self.read('payloads/a.gz'))
+        self.assertEqual('second', self.read('payloads/b.gz'))
+
+    def test_never_overwritten(self):
+        writer = BackgroundWriter(self.storage, in_thread=False)
+        writer.write('payloads/a.gz', 'first')
+        writer.write('payloads/a.gz', 'second')
+        self.assertEqual('first', self.read('payloads/a.gz'))
+        self.assertEqual(['a.gz'], self.storage.listdir('payloads')[1])
+
+    def test_on_saved(self):
+        sizes = []
+        writer = BackgroundWriter(self.storage)
+        writer.write('payloads/a.gz', 'first', sizes.append)
+        writer.write('payloads/a.gz', 'second', sizes.append)  # Exists: the size of the existing file
+        writer.flush()
+
+        size = self.storage.size('payloads/a.gz')
+        self.assertEqual([size, size], sizes)
+
+    def test_on_error(self):
+        errors = []
+
+        class BrokenStorage(FileSystemStorage):
+            def save(self, name, content):
+                raise IOError('Disk full')
+
+        writer = BackgroundWriter(BrokenStorage(location=self.location), on_error=lambda name, err: errors.append(name))
+        writer.write('payloads/a.gz', 'first')
+        writer.flush()
+        self.assertEqual(['payloads/a.gz'], errors)
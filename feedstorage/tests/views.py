@@ -0,0 +1,122 @@
+# Django
+from django.contrib.auth.models import User
+from django.http import Http404
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+# Internal
+from .. import models, views
+from ..models import Feed, Entry
+from ..settings import settings
+from ..utils.metrics import MemorySink
+from .models import create_entries
+
+
+class EntriesViewKnownValues(TestCase):
+    urls = 'feedstorage.tests.urls'
+
+    def setUp(self):
+        Entry.cache().clear()  # The pk of the feeds are reused by the next tests
+        self.get_content = models.http.get_content
+        self.feed = Feed.objects.create(url='http://example.com/1')
+        self.entries = create_entries(self.feed, 3)
+
+    def tearDown(self):
+        models.http.get_content = self.get_content
+
+    def get(self, feed='http://example.com/1', **headers):
+        return self.client.get('/feedstorage/entries/', {'feed': feed}, **headers)
+
+    def test_entries(self):
+        response = self.get()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/atom+xml; charset=utf-8', response['Content-Type'])
+        self.assertEqual(3, response.content.count('<entry>'))
+        self.assertTrue('Entries of http://example.com/1' in response.content)
+
+    def test_unknown_feed(self):
+        factory = RequestFactory()
+
+        self.assertRaises(Http404, views.entries, factory.get('/feedstorage/entries/', {'feed': 'http://example.com/unknown'}))
+        self.assertRaises(Http404, views.entries, factory.get('/feedstorage/entries/'))
+
+    def test_limit(self):
+        response = self.client.get('/feedstorage/entries/', {'feed': self.feed.pk, 'limit': 2})
+
+        self.assertEqual(2, response.content.count('<entry>'))
+
+    def test_alias(self):
+        alias = Feed.objects.create(url='http://example.com/alias')
+        alias.alias_to(self.feed)
+
+        self.assertEqual(3, self.get(alias.url).content.count('<entry>'))
+
+    def test_if_none_match(self):
+        etag = self.get()['ETag']
+
+        self.assertEqual(304, self.get(HTTP_IF_NONE_MATCH=etag).status_code)
+
+    def test_if_modified_since(self):
+        last_modified = self.get()['Last-Modified']
+
+        self.assertEqual(304, self.get(HTTP_IF_MODIFIED_SINCE=last_modified).status_code)
+
+    def test_fetched(self):
+        etag = self.get()['ETag']
+        models.http.get_content = lambda url, **kwargs: ('<feed><entry><id>id-new</id></entry></feed>', None, 200, [])
+        self.feed.fetch()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
+        self.assertEqual(4, response.content.count('<entry>'))
+
+    def test_deleted(self):
+        etag = self.get()['ETag']
+        self.entries[-1].delete()
+
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.content.count('<entry>'))
+
+
+class MetricsViewKnownValues(TestCase):
+    urls = 'feedstorage.tests.urls'
+
+    def setUp(self):
+        self.metrics = views.default_metrics
+        self.allowed_ips = settings.METRICS_ALLOWED_IPS
+        views.default_metrics = MemorySink()
+        views.default_metrics.incr('feedstorage_fetches_total', labels={'code': '200'})
+
+    def tearDown(self):
+        views.default_metrics = self.metrics
+        settings.METRICS_ALLOWED_IPS = self.allowed_ips
+
+    def test_anonymous(self):
+        response = self.client.get('/feedstorage/metrics/')
+
+        self.assertFalse('feedstorage_fetches_total' in response.content)
+        self.assertTemplateUsed(response, 'admin/login.html')
+
+    def test_staff(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.login(username='admin', password='password')
+        response = self.client.get('/feedstorage/metrics/')
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue('feedstorage_fetches_total' in response.content)
+
+    def test_allowed_ip(self):
+        settings.METRICS_ALLOWED_IPS = ('10.0.0.5',)
+        response = self.client.get('/feedstorage/metrics/', REMOTE_ADDR='10.0.0.5')
+
+        self.assertEqual(200, response.status_code)
+        self.assertTrue('feedstorage_fetches_total' in response.content)
+        self.assertFalse('feedstorage_fetches_total' in self.client.get('/feedstorage/metrics/', REMOTE_ADDR='10.0.0.6').content)
+
+    def test_no_render(self):
+        views.default_metrics = object()
+
+        self.assertRaises(Http404, views.metrics, RequestFactory().get('/feedstorage/metrics/'))
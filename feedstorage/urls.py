@@ -0,0 +1,8 @@
+# Django
+from django.conf.urls import patterns, url
+
+
+urlpatterns = patterns('feedstorage.views',
+    url(r'^metrics/$', 'metrics', name='feedstorage_metrics'),
+    url(r'^entries/$', 'entries', name='feedstorage_entries'),
+)
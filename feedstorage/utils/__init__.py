@@ -1,13 +1,55 @@
 # Python stdlib
+import os
 import os.path
+import sys
+import types
+import warnings
 from importlib import import_module
 
-# Find the path of the project package
-# Resolve a single settings.py module or settings package.
-_settings_module = import_module(os.environ['DJANGO_SETTINGS_MODULE'])
-_project_package = import_module(_settings_module.__package__.split('.')[0])
-PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(_project_package.__file__)), '..'))
+_project_root = None
 
 
 def get_project_root():
-    return PROJECT_ROOT
+    """Returns the outer directory of the project, i.e. the parent directory of the package of its settings.
+    It is found on first call, not when importing.
+    """
+    global _project_root
+    if _project_root is None:
+        # Resolve a single settings.py module or settings package.
+        settings_module = import_module(os.environ['DJANGO_SETTINGS_MODULE'])
+        project_package = import_module((settings_module.__package__ or settings_module.__name__).split('.')[0])
+        _project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(project_package.__file__)), '..'))
+    return _project_root
+
+
+class DeprecatedNamesModule(types.ModuleType):
+    """A module whose former module-level names, computed at import time before, are computed on first access instead.
+    Python 2 has no module __getattr__: the module is replaced in sys.modules by an instance of this class having its attributes.
+    """
+
+    def __init__(self, module, resolve):
+        """
+        Args:
+            module: the replaced module
+            resolve: a function returning the value of a former name or raising AttributeError
+        """
+        super(DeprecatedNamesModule, self).__init__(module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        self._module = module  # Python 2 clears the globals of a module when it is collected, used by its functions
+        self._resolve = resolve
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        value = self._resolve(name)
+        warnings.warn('%s.%s is deprecated.' % (self.__name__, name), DeprecationWarning, stacklevel=2)
+        return value
+
+
+def _resolve_deprecated(name):
+    """PROJECT_ROOT: use get_project_root() instead."""
+    if name == 'PROJECT_ROOT':
+        return get_project_root()
+    raise AttributeError(name)
+
+sys.modules[__name__] = DeprecatedNamesModule(sys.modules[__name__], _resolve_deprecated)
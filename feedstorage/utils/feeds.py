@@ -0,0 +1,153 @@
+# Python stdlib
+import email.utils
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+# Dependencies: third-party apps
+from lxml import etree  # http://lxml.de/
+
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+
+def _atom(tag):
+    """Returns a tag name in the Atom namespace."""
+    return '{%s}%s' % (ATOM_NS, tag)
+
+
+def _localname(element):
+    """Returns the tag name of an element without its namespace."""
+    return etree.QName(element).localname
+
+
+def _rfc822_to_rfc3339(value):
+    """Converts a RSS date (RFC 822) into an Atom date (RFC 3339).
+
+    Returns:
+        A string or None if the date cannot be parsed.
+    """
+    parsed = email.utils.parsedate_tz(value or '')
+    if not parsed:
+        return None
+    timestamp = email.utils.mktime_tz(parsed)
+    return datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def _copy_to_atom(element):
+    """Copies an element and moves the non namespaced tags into the Atom namespace."""
+    element = etree.fromstring(etree.tostring(element))
+    for e in element.iter():
+        if isinstance(e.tag, basestring) and etree.QName(e).namespace is None:  # Skip comments and processing instructions
+            e.tag = _atom(e.tag)
+
+    # The Atom namespace is the default one, also when the entry is serialized alone
+    entry = etree.Element(element.tag, dict(element.attrib), nsmap={None: ATOM_NS})
+    entry.text = element.text
+    entry.extend(element)
+    etree.cleanup_namespaces(entry)
+    return entry
+
+
+def _rss_item_to_atom(item, default_updated):
+    """Converts a RSS item into an Atom entry."""
+    entry = etree.Element(_atom('entry'), nsmap={None: ATOM_NS})
+
+    def text_of(tag):
+        found = item.find(tag)
+        if found is not None and found.text:
+            return found.text
+        return None
+
+    link = text_of('link')
+    etree.SubElement(entry, _atom('id')).text = text_of('guid') or link or ''
+    etree.SubElement(entry, _atom('title')).text = text_of('title') or ''
+    etree.SubElement(entry, _atom('updated')).text = _rfc822_to_rfc3339(text_of('pubDate')) or default_updated
+    if link:
+        etree.SubElement(entry, _atom('link'), href=link)
+    description = text_of('description')
+    if description:
+        etree.SubElement(entry, _atom('summary'), type='html').text = description
+
+    return entry
+
+
+def _now():
+    """Returns the current date as an Atom date."""
+    return datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def entry_to_atom(xml, default_updated, parser=None):
+    """Converts a piece of xml, being a RSS item or an Atom entry, into an Atom entry.
+
+    Args:
+        xml: a xml string, as stored in Entry.xml
+        default_updated: the date of the entry as an Atom date if it has none
+        parser: the XMLParser to use. Default: one keeping the CDATA sections
+
+    Returns:
+        An Element.
+    """
+    if parser is None:
+        parser = etree.XMLParser(strip_cdata=False)
+    if isinstance(xml, unicode):
+        xml = xml.encode('utf-8')
+    element = etree.fromstring(xml, parser=parser)
+    if _localname(element) == 'item':
+        return _rss_item_to_atom(element, default_updated)
+    return _copy_to_atom(element)
+
+
+def merge_entries(entries_xml, title, feed_id, updated=None):
+    """Merges pieces of xml, being RSS items or Atom entries, into one Atom document.
+
+    Args:
+        entries_xml: an iterable of xml strings, as stored in Entry.xml
+        title: the title of the merged feed
+        feed_id: the id of the merged feed
+        updated: the date of the merged feed as an Atom date. Default: now
+
+    Returns:
+        A unicode string.
+    """
+    if updated is None:
+        updated = _now()
+
+    feed = etree.Element(_atom('feed'), nsmap={None: ATOM_NS})
+    etree.SubElement(feed, _atom('title')).text = title
+    etree.SubElement(feed, _atom('id')).text = feed_id
+    etree.SubElement(feed, _atom('updated')).text = updated
+
+    parser = etree.XMLParser(strip_cdata=False)
+    for xml in entries_xml:
+        feed.append(entry_to_atom(xml, updated, parser))
+
+    return etree.tostring(feed, encoding=unicode)
+
+
+class AtomWriter(object):
+    """Writes an Atom document incrementally, entry by entry, like merge_entries but with a constant memory."""
+
+    def __init__(self, out, title, feed_id, updated=None):
+        """
+        Args:
+            out: a file-like object
+            title: the title of the document
+            feed_id: the id of the document
+            updated: the date of the document as an Atom date. Default: now
+        """
+        self.out = out
+        self.updated = updated or _now()
+        self.parser = etree.XMLParser(strip_cdata=False)
+        self._write(u'<?xml version="1.0" encoding="utf-8"?>\n<feed xmlns="%s">\n<title>%s</title>\n<id>%s</id>\n<updated>%s</updated>\n' % (
+            ATOM_NS, escape(title), escape(feed_id), self.updated
+        ))
+
+    def _write(self, s):
+        self.out.write(s.encode('utf-8'))
+
+    def entry(self, xml):
+        """Writes an entry from a piece of xml, being a RSS item or an Atom entry."""
+        self._write(etree.tostring(entry_to_atom(xml, self.updated, self.parser), encoding=unicode) + u'\n')
+
+    def close(self):
+        """Ends the document."""
+        self._write(u'</feed>\n')
@@ -1,9 +1,12 @@
-# Dependencies: third-party apps
-import requests  # http://docs.python-requests.org
+# Python stdlib
+import urlparse
 
 # Django
 from django.utils import timezone
 
+PERMANENT_REDIRECT_CODES = (301, 308)
+MAX_REDIRECTS = 30  # As requests
+
 
 class RequestsModuleError(Exception):
     """An error occured in the Requests third-party module."""
@@ -24,7 +27,24 @@ def _return(*args):
     return to_return
 
 
-def get_content(url, etag=None, use_http_compression=True, return_etag=False, return_status_code=False, return_datetime=False, return_response=False):
+def permanent_location(redirects):
+    """Returns the URL a chain of redirects leads to permanently, i.e. through the permanent redirects at its start.
+
+    Args:
+        redirects: a list of tuples (status_code, location) as returned by get_content
+
+    Returns:
+        A string or None if the first redirect is not permanent.
+    """
+    location = None
+    for status_code, url in redirects:
+        if status_code not in PERMANENT_REDIRECT_CODES:
+            break
+        location = url
+    return location
+
+
+def get_content(url, etag=None, use_http_compression=True, return_etag=False, return_status_code=False, return_datetime=False, return_response=False, return_redirects=False, timer=None):
     """Fetches data and metadata from an URL.
 
     Dependency: requests module (http://docs.python-requests.org): HTTP library, written in Python, for human beings.
@@ -37,14 +57,19 @@ def get_content(url, etag=None, use_http_compression=True, return_etag=False, re
         return_status_code: Whether it must return the HTTP status code. Default=False
         return_datetime: Whether it must return the datetime of fetching. Default=False
         return_response: Whether it must return the response instance. Default=False
+        return_redirects: Whether it must return the redirects followed, as a list of tuples (status_code, location). Default=False
+        timer: a PhaseTimer to time the connect (DNS, connection and headers) and download phases. Default=None
 
     Returns:
         Either a string being the fetched data.
-        Or a tuple wrapping the asked values if AT LEAST ONE of the optional returned values is asked: (data [, etag] [status_code,] [, datetime] [, response]).
+        Or a tuple wrapping the asked values if AT LEAST ONE of the optional returned values is asked: (data [, etag] [status_code,] [, datetime] [, response] [, redirects]).
 
     Raises:
         RequestsModuleError: An error occured in the Requests third-party module.
     """
+    # Imported here: requests takes most of the time needed to import feedstorage.
+    import requests  # http://docs.python-requests.org
+
     error_msg = 'HTTP GET %s' % (url,)
 
     # Sets the headers.
@@ -57,13 +82,28 @@ def get_content(url, etag=None, use_http_compression=True, return_etag=False, re
     downloaded_date = (return_datetime and [timezone.now()] or [None])[0]
 
     # Makes the request.
+    if timer is not None:
+        timer.start('connect')
     try:
         response = requests.get(url, headers=headers)
+        history = list(response.history)
+        # requests does not follow the 308 Permanent Redirect
+        while response.status_code == 308 and response.headers.get('Location') and len(history) < MAX_REDIRECTS:
+            history.append(response)
+            response = requests.get(urlparse.urljoin(response.url, response.headers['Location']), headers=headers)
+            history.extend(response.history)
+        if timer is not None:
+            timer.start('download')
+        data = response.content  # The body is read lazily
     except StandardError as e:
         raise RequestsModuleError('%s - Requests module error\n%s' % (error_msg, e))
+    finally:
+        if timer is not None:
+            timer.stop()
 
-    data = response.content
     etag = (return_etag and [response.headers.get('ETag', None)] or [None])[0]
     status_code = response.status_code
+    urls = [r.url for r in history[1:]] + [response.url]
+    redirects = [(r.status_code, u) for r, u in zip(history, urls)]
 
-    return _return((True, data), (return_etag, etag), (return_status_code, status_code), (return_datetime, downloaded_date), (return_response, response))
+    return _return((True, data), (return_etag, etag), (return_status_code, status_code), (return_datetime, downloaded_date), (return_response, response), (return_redirects, redirects))
@@ -0,0 +1,20 @@
+# Python stdlib
+from itertools import islice
+
+
+def chunked(iterable, size):
+    """Splits an iterable into lists of at most size items.
+
+    Args:
+        iterable: the iterable to split
+        size: the maximum number of items in a chunk
+
+    Returns:
+        A generator of lists.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
@@ -2,7 +2,10 @@
 import os
 import os.path
 import logging
+import logging.handlers
+import Queue
 import string
+import threading
 import unicodedata
 
 # Django
@@ -10,6 +13,9 @@ from django.utils.functional import LazyObject
 from django.core.files.base import ContentFile
 from django.utils.encoding import force_unicode
 
+# Internal
+from .timer import PhaseTimer
+
 
 class ImproperlyConfigured(Exception):
     pass
@@ -57,9 +63,129 @@ def make_safe(s):
     return windows_safe(u''.join(c for c in s if c in valid_chars))
 
 
+class DiagnosticContext(object):
+    """Collects the diagnostic messages and the timings of one task, e.g. the fetch of one Feed.
+
+    It is passed explicitly to what the task calls so that tasks running at the same time do not mix their messages.
+    A message is only formatted with its arguments when the messages are read.
+    """
+
+    def __init__(self, timer=None):
+        self.messages = []  # (msg, args)
+        self.timer = timer if timer is not None else PhaseTimer()
+
+    def __len__(self):
+        return len(self.messages)
+
+    def append(self, msg, *args):
+        """Appends a message, to be formatted with the arguments as with msg % args."""
+        self.messages.append((msg, args))
+
+    def flush(self):
+        """Flushes the messages and returns them as one merged message."""
+        msg = '\n'.join(m % a if a else m for m, a in self.messages)
+        self.messages = []
+        return msg
+
+
+class QueuedHandler(logging.Handler):
+    """Hands the log records over to a background thread which emits them with another handler,
+    so that logging does not wait for the file writes nor for the rotation of the file.
+
+    The queue is bounded. When it is full, the overflow policy applies:
+        - 'drop': the new record is dropped
+        - 'drop_oldest': the oldest record in the queue is dropped to make room for the new one
+        - 'block': the caller waits for some room
+    The number of dropped records is written in the log as soon as the queue has room again.
+    """
+    OVERFLOW_POLICIES = ('drop', 'drop_oldest', 'block')
+
+    def __init__(self, handler, queue_size=10000, overflow='drop'):
+        logging.Handler.__init__(self)
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ImproperlyConfigured('The overflow policy must be one of %s.' % (', '.join(self.OVERFLOW_POLICIES),))
+
+        self.handler = handler
+        self.overflow = overflow
+        self.queue = Queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._write)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def prepare(self, record):
+        """Formats the message in the calling thread so that the arguments are not used later in another thread."""
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            record = self.prepare(record)
+            if self.overflow == 'block':
+                self.queue.put(record)
+                return
+            try:
+                self.queue.put_nowait(record)
+            except Queue.Full:
+                if self.overflow == 'drop_oldest':
+                    try:
+                        self.queue.get_nowait()
+                        self.queue.task_done()
+                    except Queue.Empty:
+                        pass
+                    try:
+                        self.queue.put_nowait(record)
+                    except Queue.Full:
+                        pass
+                self.dropped += 1  # Not exact under contention, good enough to warn
+        except Exception:
+            self.handleError(record)
+
+    def _write(self):
+        while True:
+            record = self.queue.get()
+            try:
+                if record is not None:
+                    self.handler.handle(record)
+                if self.dropped:
+                    dropped, self.dropped = self.dropped, 0
+                    self.handler.handle(logging.LogRecord(
+                        getattr(record, 'name', ''), logging.WARNING, __file__, 0,
+                        '%s log records dropped because the log queue was full.', (dropped,), None
+                    ))
+            except Exception:
+                self.handler.handleError(record)
+            finally:
+                self.queue.task_done()
+
+            if record is None:  # Closed
+                return
+
+    def flush(self):
+        """Waits for the queued records to be written."""
+        if self.thread.is_alive():
+            self.queue.join()
+        self.handler.flush()
+
+    def close(self):
+        """Writes the queued records and stops the background thread."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self.handler.close()
+        logging.Handler.close(self)
+
+
 class DefaultLogger(LazyObject):
-    """Logger with default file handler if no one exists."""
-    def __init__(self, logger_name=None, log_file=None, level=logging.INFO, log_size=5 * 1024 * 2 ** 10, logger_format='%(asctime)s %(levelname)s %(module)s %(message)s'):
+    """Logger with default file handler if no one exists.
+
+    If a queue size is given, the default handler writes in a background thread. (See QueuedHandler)
+    """
+    def __init__(self, logger_name=None, log_file=None, level=logging.INFO, log_size=5 * 1024 * 2 ** 10, logger_format='%(asctime)s %(levelname)s %(module)s %(message)s', queue_size=None, queue_overflow='drop'):
         # IMPORTANT: must be here to avoid recursion
         super(DefaultLogger, self).__init__()
 
@@ -76,7 +202,9 @@ class DefaultLogger(LazyObject):
         self.__dict__['log_size'] = log_size
         self.__dict__['logger_format'] = logger_format
         self.__dict__['level'] = level
-        self.__dict__['messages'] = []
+        self.__dict__['queue_size'] = queue_size
+        self.__dict__['queue_overflow'] = queue_overflow
+        self.__dict__['local'] = threading.local()  # The log buffer of each thread
 
     def _setup(self):
 
@@ -94,11 +222,21 @@ class DefaultLogger(LazyObject):
                 backupCount=50
             )
             handler.formatter = logging.Formatter(fmt=self.logger_format)
+            if self.queue_size:
+                handler = QueuedHandler(handler, queue_size=self.queue_size, overflow=self.queue_overflow)
 
             self.logger.handlers.append(handler)
 
         self._wrapped = self.logger
 
+    @property
+    def messages(self):
+        """The log buffer of the current thread. Use a DiagnosticContext to collect the messages of a task instead."""
+        local = self.__dict__['local']
+        if not hasattr(local, 'messages'):
+            local.messages = []
+        return local.messages
+
     def append_msg(self, msg):
         """Appends a message to the log buffer."""
         self.messages.append(msg)
@@ -106,7 +244,7 @@ class DefaultLogger(LazyObject):
     def flush_messages(self):
         """Flushes the log buffer and returns the messages as one merged message."""
         msg = '\n'.join(self.messages)
-        self.__dict__['messages'] = []
+        self.__dict__['local'].messages = []
         return msg
 
     def log_messages(self, lvl=logging.ERROR, start='', end=''):
@@ -118,9 +256,9 @@ class DefaultLogger(LazyObject):
 
 class LoggerWithStorage(DefaultLogger):
     """Logger with a Storage."""
-    def __init__(self, storage=None, logger_name=None, log_file=None, level=logging.INFO, log_size=5 * 1024 * 2 ** 10, logger_format='%(asctime)s %(levelname)s %(module)s %(message)s'):
+    def __init__(self, storage=None, logger_name=None, log_file=None, level=logging.INFO, log_size=5 * 1024 * 2 ** 10, logger_format='%(asctime)s %(levelname)s %(module)s %(message)s', queue_size=None, queue_overflow='drop'):
         # IMPORTANT: must be here to avoid recursion
-        super(LoggerWithStorage, self).__init__(logger_name, log_file, level, log_size, logger_format)
+        super(LoggerWithStorage, self).__init__(logger_name, log_file, level, log_size, logger_format, queue_size, queue_overflow)
 
         if not (storage and logger_name):
             raise ImproperlyConfigured('A storage AND a logger name must be provided.')
@@ -0,0 +1,158 @@
+# Python stdlib
+import socket
+import threading
+
+# Upper bounds of the histogram buckets, in seconds.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def _labels_key(labels):
+    """Returns a hashable and ordered version of a dict of labels."""
+    if not labels:
+        return ()
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    """Escapes a label value for the Prometheus text format."""
+    return ('%s' % (value,)).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels_key, extra=()):
+    """Formats labels for the Prometheus text format: {name="value",...}"""
+    labels = labels_key + extra
+    if not labels:
+        return ''
+    return '{%s}' % (','.join('%s="%s"' % (k, _escape(v)) for k, v in labels),)
+
+
+def _format_number(value):
+    """Formats a number for the Prometheus text format."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else '%s' % (value,)
+
+
+class NullSink(object):
+    """A sink ignoring all the metrics. Check enabled to avoid computing them at all."""
+    enabled = False
+
+    def incr(self, name, value=1, labels=None):
+        """Increments a counter.
+
+        Args:
+            name: the name of the counter
+            value: the increment. Default: 1
+            labels: a dict of labels. Default: None
+        """
+        pass
+
+    def timing(self, name, seconds, labels=None):
+        """Records a duration in a histogram.
+
+        Args:
+            name: the name of the histogram
+            seconds: the duration in seconds
+            labels: a dict of labels. Default: None
+        """
+        pass
+
+
+class MemorySink(NullSink):
+    """A sink keeping the counters and histograms in memory to expose them in the Prometheus text format.
+
+    The metrics are those of the current process only.
+    """
+    enabled = True
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        self.counters = {}  # name => {labels_key: value}
+        self.histograms = {}  # name => {labels_key: [count per bucket..., sum, count]}
+
+    def incr(self, name, value=1, labels=None):
+        key = _labels_key(labels)
+        self.lock.acquire()
+        try:
+            values = self.counters.setdefault(name, {})
+            values[key] = values.get(key, 0) + value
+        finally:
+            self.lock.release()
+
+    def timing(self, name, seconds, labels=None):
+        key = _labels_key(labels)
+        self.lock.acquire()
+        try:
+            values = self.histograms.setdefault(name, {})
+            histogram = values.get(key)
+            if histogram is None:
+                histogram = values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+        finally:
+            self.lock.release()
+
+    def reset(self):
+        """Forgets all the metrics."""
+        self.lock.acquire()
+        try:
+            self.counters = {}
+            self.histograms = {}
+        finally:
+            self.lock.release()
+
+    def render(self):
+        """Returns the metrics in the Prometheus text format."""
+        self.lock.acquire()
+        try:
+            lines = []
+            for name in sorted(self.counters):
+                lines.append('# TYPE %s counter' % (name,))
+                for key, value in sorted(self.counters[name].items()):
+                    lines.append('%s%s %s' % (name, _format_labels(key), _format_number(value)))
+
+            for name in sorted(self.histograms):
+                lines.append('# TYPE %s histogram' % (name,))
+                for key, histogram in sorted(self.histograms[name].items()):
+                    for i, bound in enumerate(self.buckets):
+                        lines.append('%s_bucket%s %s' % (name, _format_labels(key, (('le', _format_number(bound)),)), histogram[i]))
+                    lines.append('%s_bucket%s %s' % (name, _format_labels(key, (('le', '+Inf'),)), histogram[-1]))
+                    lines.append('%s_sum%s %s' % (name, _format_labels(key), _format_number(histogram[-2])))
+                    lines.append('%s_count%s %s' % (name, _format_labels(key), histogram[-1]))
+        finally:
+            self.lock.release()
+
+        return '\n'.join(lines) + '\n'
+
+
+class StatsdSink(NullSink):
+    """A sink sending the metrics to a statsd server over UDP.
+
+    The label values are appended to the name: name.value1.value2
+    """
+    enabled = True
+
+    def __init__(self, host='localhost', port=8125, prefix=''):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def _name(self, name, labels):
+        parts = [self.prefix, name] + ['%s' % (v,) for k, v in _labels_key(labels)]
+        return '.'.join(p.replace('.', '_').replace(':', '_') for p in parts if p)
+
+    def _send(self, data):
+        try:
+            self.socket.sendto(data, self.address)
+        except socket.error:
+            pass  # Metrics must never break the fetching
+
+    def incr(self, name, value=1, labels=None):
+        self._send('%s:%s|c' % (self._name(name, labels), value))
+
+    def timing(self, name, seconds, labels=None):
+        self._send('%s:%d|ms' % (self._name(name, labels), seconds * 1000))
@@ -0,0 +1,72 @@
+# Python stdlib
+from xml.sax.saxutils import escape, quoteattr
+
+# Dependencies: third-party apps
+from lxml import etree  # http://lxml.de/
+
+
+def iter_outlines(source):
+    """Parses an OPML document incrementally and yields its feeds.
+    The parsed elements are freed as soon as possible so that huge documents can be read with a constant memory.
+
+    Args:
+        source: a filename or a file-like object
+
+    Returns:
+        A generator of tuples (attrib, ancestors): attrib is a dict of the attributes of an outline having a xmlUrl attribute
+        and ancestors is a tuple of the attributes of its parent outlines, outermost first.
+    """
+    ancestors = []
+    for event, element in etree.iterparse(source, events=('start', 'end'), tag='outline'):
+        if event == 'start':
+            ancestors.append(dict(element.attrib))
+            continue
+
+        attrib = ancestors.pop()
+        if attrib.get('xmlUrl'):
+            yield attrib, tuple(ancestors)
+
+        # Free the memory
+        element.clear()
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+class OPMLWriter(object):
+    """Writes an OPML document incrementally."""
+
+    def __init__(self, out, title):
+        """
+        Args:
+            out: a file-like object
+            title: the title of the document
+        """
+        self.out = out
+        self.depth = 1
+        self._write(u'<?xml version="1.0" encoding="utf-8"?>\n<opml version="1.0">\n<head><title>%s</title></head>\n<body>' % (escape(title),))
+
+    def _write(self, s):
+        self.out.write(s.encode('utf-8'))
+
+    def _outline(self, attrib, end):
+        attrs = u' '.join(u'%s=%s' % (k, quoteattr(v)) for k, v in attrib if v is not None)
+        self._write(u'\n%s<outline %s%s>' % (u'  ' * self.depth, attrs, end))
+
+    def feed(self, url, **attrib):
+        """Writes an outline for a feed."""
+        self._outline([('type', u'rss'), ('text', url), ('xmlUrl', url)] + sorted(attrib.items()), u' /')
+
+    def start(self, text, **attrib):
+        """Starts a group of outlines."""
+        self._outline([('text', text)] + sorted(attrib.items()), u'')
+        self.depth += 1
+
+    def end(self):
+        """Ends a group of outlines."""
+        self.depth -= 1
+        self._write(u'\n%s</outline>' % (u'  ' * self.depth,))
+
+    def close(self):
+        """Ends the document."""
+        self._write(u'\n</body>\n</opml>\n')
+
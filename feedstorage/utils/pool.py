@@ -0,0 +1,111 @@
+# Python stdlib
+import time
+import Queue
+import threading
+
+# Django
+from django.db import connection
+
+
+class CallTimeout(Exception):
+    """A call did not return before its timeout."""
+    pass
+
+
+def _call(func, args, kwargs):
+    """Calls a function and returns its response or the exception raised, and the time elapsed in seconds."""
+    start = time.time()
+    try:
+        response = func(*args, **kwargs)
+    except Exception as err:
+        response = err
+    return response, time.time() - start
+
+
+def call_all(calls, workers=1, timeout=None):
+    """Calls several functions, robustly, either one after the other or concurrently in a bounded pool of threads.
+
+    A thread cannot be killed: when a call times out, its thread is abandoned and a new one is started
+    to keep the pool running so that a stuck call does not block the other ones.
+    An abandoned thread exits as soon as its call returns instead of taking new calls next to its replacement.
+    Each thread closes its own database connection when it exits.
+
+    The threads only live for one call_all: the calls are network requests which take much longer
+    than starting a thread, and a pool kept between the calls would keep a database connection open per thread.
+
+    Args:
+        calls: a list of tuples (func, args, kwargs)
+        workers: the maximum number of calls running at the same time. Default: 1, i.e. one after the other in the current thread
+        timeout: the maximum number of seconds to wait for each call. Default: None, i.e. no timeout. Ignored if workers is 1.
+
+    Returns:
+        A list of tuples (response, latency) in the same order as the calls. The response is the exception raised if the call failed or a CallTimeout if it timed out.
+    """
+    if workers <= 1 or len(calls) <= 1:
+        return [_call(*c) for c in calls]
+
+    tasks = Queue.Queue()
+    for i, c in enumerate(calls):
+        tasks.put((i, c))
+
+    cond = threading.Condition()
+    started = {}  # index => start time
+    results = {}  # index => (response, latency)
+
+    def work():
+        try:
+            while True:
+                try:
+                    i, (func, args, kwargs) = tasks.get_nowait()
+                except Queue.Empty:
+                    return
+
+                cond.acquire()
+                started[i] = time.time()
+                cond.release()
+
+                result = _call(func, args, kwargs)
+
+                cond.acquire()
+                try:
+                    if i in results:  # The call timed out: this thread has been replaced
+                        return
+                    results[i] = result
+                    cond.notify()
+                finally:
+                    cond.release()
+        finally:
+            connection.close()
+
+    def spawn():
+        t = threading.Thread(target=work)
+        t.daemon = True  # Do not prevent the process from exiting because of a stuck call
+        t.start()
+
+    for _ in range(min(workers, len(calls))):
+        spawn()
+
+    cond.acquire()
+    try:
+        while len(results) < len(calls):
+            wait = None
+            if timeout is not None:
+                now = time.time()
+                for i, start in started.items():
+                    if i in results:
+                        continue
+                    remaining = start + timeout - now
+                    if remaining <= 0:
+                        results[i] = (CallTimeout('No response after %ss.' % (timeout,)), now - start)
+                        spawn()  # Replace the abandoned thread
+                    elif wait is None or remaining < wait:
+                        wait = remaining
+                if len(results) == len(calls):
+                    break
+                if wait is None:  # Some calls are not started yet
+                    wait = timeout
+            cond.wait(wait)
+    finally:
+        cond.release()
+
+    return [results[i] for i in range(len(calls))]
@@ -1,6 +1,8 @@
 # Python stdlib
 from importlib import import_module
 
+_RESOLVED = {}  # Cache of the deserialized functions: name => callable, or None if it cannot be retrieved
+
 
 class SerializationFailed(Exception):
     pass
@@ -51,6 +53,9 @@ def deserialize_function(name):
     It DOES NOT work with:
         - static method i.e. methods using the @staticmethod decorator
 
+    The result is cached, even when the function/classmethod cannot be retrieved:
+    use clear_deserialized_functions to forget it.
+
     Args:
         name: a string being the function/classmethod to deserialize
 
@@ -63,28 +68,55 @@ def deserialize_function(name):
     if callable(name):
         return name
 
-    if name is not None:
+    try:
+        f = _RESOLVED[name]
+    except KeyError:
+        f = _RESOLVED[name] = _resolve_function(name)
+    except TypeError:  # Unhashable
+        f = None
+
+    if f is None:
+        raise DeserializationFailed('No function/classmethod can be retrieved from the string: %s' % (name,))
+    return f
 
-        # Look for the function name
-        sep = name.rfind('.')
-        if sep > 0:
 
-            module_name = name[:sep]
-            function_name = name[sep + 1:]
+def _resolve_function(name):
+    """Retrieves a function or a class method given a string.
+
+    Returns:
+        A callable or None if it cannot be retrieved.
+    """
+    if not isinstance(name, basestring):
+        return None
 
-            f = None
-            try:  # try module....function
-                f = getattr(import_module(module_name), function_name)
-            except:
-                try:  # try module....class.function (classmethod)
-                    # Get the class
-                    sep = module_name.rfind('.')
-                    klass = getattr(import_module(module_name[:sep]), module_name[sep + 1:])
-                    f = getattr(klass, function_name)
-                except:
-                    pass
+    module_name, _, function_name = name.rpartition('.')
+    if not module_name:
+        return None
 
-            if callable(f):
-                return f
+    try:  # try module....function
+        owner = import_module(module_name)
+    except ImportError:  # try module....class.function (classmethod)
+        module_name, _, class_name = module_name.rpartition('.')
+        if not module_name:
+            return None
+        try:
+            owner = getattr(import_module(module_name), class_name)
+        except (ImportError, AttributeError):
+            return None
 
-    raise DeserializationFailed('No function/classmethod can be retrieved from the string: %s' % (name,))
+    f = getattr(owner, function_name, None)
+    if callable(f):
+        return f
+    return None
+
+
+def clear_deserialized_functions(name=None):
+    """Clears the cache of the deserialized functions, including the names which could not be retrieved.
+
+    Args:
+        name: the string of the function/classmethod to forget. Default: None, i.e. all of them
+    """
+    if name is None:
+        _RESOLVED.clear()
+    else:
+        _RESOLVED.pop(name, None)
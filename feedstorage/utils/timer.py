@@ -0,0 +1,54 @@
+# Python stdlib
+import json
+import math
+import time
+
+
+class PhaseTimer(object):
+    """Measures the time spent in successive phases of a task.
+
+    Only one phase is timed at a time: starting a phase stops the current one.
+    The time of a phase started several times is accumulated.
+    """
+
+    def __init__(self):
+        self.durations = {}  # phase => seconds
+        self._phase = None
+        self._start = None
+
+    def start(self, phase):
+        """Stops the current phase if any and starts timing another one."""
+        self.stop()
+        self._phase = phase
+        self._start = time.time()
+
+    def stop(self):
+        """Stops timing the current phase if any."""
+        if self._phase is not None:
+            self.durations[self._phase] = self.durations.get(self._phase, 0) + time.time() - self._start
+            self._phase = self._start = None
+
+    def to_json(self):
+        """Returns the durations as a compact JSON object, in seconds."""
+        self.stop()
+        return json.dumps(
+            dict((k, round(v, 4)) for k, v in self.durations.items()),
+            sort_keys=True,
+            separators=(',', ':')
+        )
+
+
+def percentile(values, p):
+    """Returns the p-th percentile of a list of values with the nearest-rank method.
+
+    Args:
+        values: a sorted list of numbers
+        p: a number between 0 and 100
+
+    Returns:
+        A number or None if there is no value.
+    """
+    if not values:
+        return None
+    rank = int(math.ceil(p / 100.0 * len(values)))  # Starts at 1
+    return values[min(max(rank, 1), len(values)) - 1]
@@ -0,0 +1,55 @@
+# Python stdlib
+import urlparse
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+# Query parameters added to track the readers, which do not change the feed
+TRACKING_PARAMS = ('fbclid', 'gclid', 'mc_cid', 'mc_eid')
+TRACKING_PARAMS_PREFIX = 'utm_'
+
+
+def _is_tracking_param(param):
+    """Whether a query parameter, as key=value, is only used to track the readers."""
+    key = param.split('=', 1)[0].lower()
+    return key in TRACKING_PARAMS or key.startswith(TRACKING_PARAMS_PREFIX)
+
+
+def normalize_url(url):
+    """Normalizes a feed URL so that the same feed is always written the same way.
+
+    Strips the whitespaces, lowercases the scheme and the host, removes the default port, the tracking parameters of the query and the fragment.
+    The other parameters are kept as they are, in the same order.
+
+    Args:
+        url: the URL to normalize
+
+    Returns:
+        A string or None if it is not a valid HTTP(S) URL, e.g. with a port which is not a number.
+    """
+    if not url:
+        return None
+
+    try:
+        parts = urlparse.urlsplit(url.strip())
+        port = parts.port
+    except ValueError:  # Invalid IPv6 address or port
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in DEFAULT_PORTS or not parts.hostname:
+        return None
+
+    netloc = parts.hostname  # Lowercased, without the brackets of an IPv6 address
+    if ':' in netloc:
+        netloc = '[%s]' % (netloc,)
+    if parts.username is not None:
+        userinfo = parts.username
+        if parts.password is not None:
+            userinfo += ':' + parts.password
+        netloc = userinfo + '@' + netloc
+    if port is not None and str(port) != DEFAULT_PORTS[scheme]:
+        netloc += ':%s' % (port,)
+
+    query = '&'.join(p for p in parts.query.split('&') if p and not _is_tracking_param(p))
+
+    return urlparse.urlunsplit((scheme, netloc, parts.path or '/', query, ''))
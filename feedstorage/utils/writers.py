@@ -0,0 +1,111 @@
+# Python stdlib
+import gzip
+import Queue
+import atexit
+import threading
+from cStringIO import StringIO
+
+# Django
+from django.core.files.base import ContentFile
+
+
+def gzip_data(data):
+    """Compresses data with gzip.
+
+    Returns:
+        A string.
+    """
+    out = StringIO()
+    f = gzip.GzipFile(fileobj=out, mode='wb')
+    try:
+        f.write(data)
+    finally:
+        f.close()
+    return out.getvalue()
+
+
+def gunzip_data(data):
+    """Decompresses data compressed with gzip."""
+    f = gzip.GzipFile(fileobj=StringIO(data), mode='rb')
+    try:
+        return f.read()
+    finally:
+        f.close()
+
+
+class BackgroundWriter(object):
+    """Compresses and saves files with a Storage, in a background thread or right away.
+
+    The files are written in the order they are given and are never overwritten.
+    The files still queued are written before the process exits.
+    """
+
+    def __init__(self, storage, in_thread=True, queue_size=100, on_error=None):
+        """
+        Args:
+            storage: the Storage to save the files with
+            in_thread: whether the files are written in a background thread. Default: True
+            queue_size: the maximum number of files waiting to be written. When it is reached, write waits for some room. Default: 100
+            on_error: a callable called with the name of a file and the exception raised when it cannot be saved in the thread. Default: None
+        """
+        self.storage = storage
+        self.in_thread = in_thread
+        self.queue = Queue.Queue(maxsize=queue_size)
+        self.on_error = on_error
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def write(self, name, data, on_saved=None):
+        """Compresses and saves data as the file name unless it exists.
+
+        Args:
+            name: the name of the file
+            data: the data to compress
+            on_saved: a callable called with the size of the file in bytes once it is saved, or exists. Default: None
+        """
+        if not self.in_thread:
+            self._save(name, data, on_saved)
+            return
+
+        self._start()
+        self.queue.put((name, data, on_saved))
+
+    def flush(self):
+        """Waits for the queued files to be written."""
+        if self._thread is not None:
+            self.queue.join()
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        self._lock.acquire()
+        try:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run)
+                thread.daemon = True
+                thread.start()
+                atexit.register(self.flush)
+                self._thread = thread
+        finally:
+            self._lock.release()
+
+    def _run(self):
+        while True:
+            name, data, on_saved = self.queue.get()
+            try:
+                self._save(name, data, on_saved)
+            except Exception as err:
+                if self.on_error is not None:
+                    self.on_error(name, err)
+            finally:
+                self.queue.task_done()
+
+    def _save(self, name, data, on_saved=None):
+        if not self.storage.exists(name):
+            compressed = gzip_data(data)
+            self.storage.save(name, ContentFile(compressed))
+            size = len(compressed)
+        elif on_saved is not None:
+            size = self.storage.size(name)
+        if on_saved is not None:
+            on_saved(size)
@@ -1 +1,116 @@
-# Create your views here.
+# Python stdlib
+import hashlib
+
+# Django
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+# Internal
+from .settings import settings
+from .metrics import default_metrics
+from .models import Feed, Entry
+from .utils.feeds import merge_entries
+from .utils.urls import normalize_url
+
+
+def metrics(request):
+    """Exposes the metrics of the current process in the Prometheus text format.
+    Requires a sink able to render them, i.e. the METRICS_SINK setting being feedstorage.utils.metrics.MemorySink
+
+    Only the staff members and the IP addresses of the METRICS_ALLOWED_IPS setting, e.g. the Prometheus server, can read them:
+    they show the names of the receivers and the status codes of the feeds.
+    """
+    if not hasattr(default_metrics, 'render'):
+        raise Http404
+    if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+        return _render_metrics(request)
+    return staff_member_required(_render_metrics)(request)
+
+
+def _render_metrics(request):
+    return HttpResponse(default_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _entries_state(request):
+    """Reads the Feeds and the number of entries asked by a request of the entries view and their latest entries.
+    Computed once per request since it is needed by the conditional GET and the view.
+
+    Returns:
+        A dict with the keys feed_ids, feed_urls, limit, etag and last_modified.
+    """
+    if hasattr(request, '_feedstorage_entries'):
+        return request._feedstorage_entries
+
+    values = request.GET.getlist('feed')
+    ids = [int(v) for v in values if v.isdigit()]
+    urls = [normalize_url(v) or v for v in values if not v.isdigit()]
+    if not ids and not urls:
+        raise Http404
+
+    # The entries of an alias are stored with the Feed it is an alias of
+    feeds = Feed.objects.filter(pk__in=ids) | Feed.objects.filter(url__in=urls)
+    feed_ids = set()
+    feed_urls = []
+    for pk, url, alias_of_id in feeds.values_list('pk', 'url', 'alias_of'):
+        feed_urls.append(url)
+        feed_ids.add(alias_of_id or pk)
+    if not feed_ids:
+        raise Http404
+    feed_ids = sorted(feed_ids)
+
+    limit = settings.ENTRIES_VIEW_LIMIT
+    if request.GET.get('limit', '').isdigit():
+        limit = max(min(int(request.GET['limit']), limit), 1)
+
+    latest = Entry.latest_of_feeds(feed_ids)
+    dates = [add_date for _, add_date in latest.values() if add_date is not None]
+
+    request._feedstorage_entries = {
+        'feed_ids': feed_ids,
+        'feed_urls': sorted(feed_urls),
+        'limit': limit,
+        'etag': hashlib.sha1(repr((feed_ids, limit, [latest[feed_id] for feed_id in feed_ids]))).hexdigest(),  # The pk of a deleted Entry can be reused
+        'last_modified': dates and max(dates) or None,
+    }
+    return request._feedstorage_entries
+
+
+def _entries_etag(request):
+    return _entries_state(request)['etag']
+
+
+def _entries_last_modified(request):
+    return _entries_state(request)['last_modified']
+
+
+@condition(etag_func=_entries_etag, last_modified_func=_entries_last_modified)
+def entries(request):
+    """Renders the most recent entries of one or several Feeds merged in one Atom document.
+
+    The Feeds are given by id or URL with the feed parameter, which can be repeated, and the number of entries with the limit parameter,
+    at most the ENTRIES_VIEW_LIMIT setting. The document is cached until one of the Feeds gets new entries,
+    and a client sending the ETag or the Last-Modified date it got gets a 304 response until then.
+    """
+    state = _entries_state(request)
+
+    cache = Entry.cache()
+    key = 'feedstorage:entries:%s' % (state['etag'],)
+    xml = cache.get(key)
+    if xml is None:
+        entries_xml = Entry.objects.filter(feed__in=state['feed_ids']).order_by('-pk').values_list('xml', flat=True)[:state['limit']]
+        if len(state['feed_urls']) == 1:
+            title = 'Entries of %s' % (state['feed_urls'][0],)
+        else:
+            title = 'Entries of %s feeds' % (len(state['feed_urls']),)
+        updated = None
+        if state['last_modified'] is not None:
+            last_modified = state['last_modified']
+            if timezone.is_aware(last_modified):
+                last_modified = last_modified.astimezone(timezone.utc)
+            updated = last_modified.strftime('%Y-%m-%dT%H:%M:%SZ')
+        xml = merge_entries(entries_xml, title, 'urn:feedstorage:entries:%s' % (','.join(str(pk) for pk in state['feed_ids']),), updated)
+        cache.set(key, xml, settings.ENTRIES_CACHE_TIMEOUT)
+
+    return HttpResponse(xml, content_type='application/atom+xml; charset=utf-8')